@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Dict, Optional, Any
+import json
 from datetime import datetime, timedelta
-from app.services.stock_data import StockDataService
-# from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from app.services.async_stock_data import AsyncStockDataService, get_async_stock_service
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.financial_bundle import ReportUnavailableError
+from app.services.risk import RiskModelUnavailableError
+from app.services.indicators import parse_indicators
+from app.core.auth import TokenData, get_current_user
 
 router = APIRouter(
     prefix="/stocks",
@@ -10,26 +17,141 @@ router = APIRouter(
     # dependencies=[Depends(get_current_user)]
 )
 
+def _server_error(e: Exception) -> HTTPException:
+    """Chuyển lỗi từ service thành HTTPException (503 khi nguồn dữ liệu đang ngắt mạch)"""
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    if isinstance(e, (RiskModelUnavailableError, ReportUnavailableError)):
+        return HTTPException(status_code=503, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+def _not_modified(request: Request, response: Response, version: str) -> Optional[Response]:
+    """Gắn ETag theo phiên bản dữ liệu; trả về 304 nếu client đã có phiên bản này"""
+    etag = f'"{version}"'
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
 @router.get("/list")
-async def get_stock_list():
+async def get_stock_list(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, max_length=500),
+    limit: Optional[int] = Query(None, ge=0),
+    fields: Optional[List[str]] = Query(None),
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
+    """
+    Lấy danh sách mã cổ phiếu (phục vụ từ bộ nhớ, kèm ETag theo phiên bản danh sách)
+    
+    Args:
+        cursor: Con trỏ trang tiếp theo (lấy từ header X-Next-Cursor của trang trước)
+        limit: Số mã mỗi trang (không truyền cursor/limit/fields thì trả về toàn bộ danh sách)
+        fields: Các cột cần trả về, ví dụ fields=symbol&fields=exchange
+    """
+    if cursor is not None or limit is not None or fields:
+        try:
+            rows, next_cursor = await stock_service.get_stock_list_page(
+                cursor, limit if limit is not None else 100, fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise _server_error(e)
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return rows
+    try:
+        universe = await stock_service.get_universe()
+        not_modified = _not_modified(request, response, universe.version)
+        if not_modified is not None:
+            return not_modified
+        return await stock_service.get_stock_list()
+    except Exception as e:
+        raise _server_error(e)
+
+@router.get("/search")
+async def search_stocks(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
-    Lấy danh sách mã cổ phiếu
+    Tìm kiếm mã cổ phiếu theo tiền tố mã hoặc theo tên công ty (có dấu hoặc không dấu)
+    
+    Args:
+        q: Từ khóa tìm kiếm, ví dụ "VN", "vinamilk", "ngan hang"
+        limit: Số lượng kết quả tối đa
     """
     try:
-        stock_service = StockDataService()
-        stock_list = stock_service.get_stock_list()
-        if stock_list is None:
-            raise HTTPException(status_code=500, detail="Failed to retrieve stock list")
-        return stock_list
+        return await stock_service.search_stocks(q, limit)
+    except Exception as e:
+        raise _server_error(e)
+
+@router.get("/prices")
+async def get_stock_prices(
+    symbols: List[str] = Query(...),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    days: int = 30,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
+    """
+    Lấy dữ liệu giá của nhiều cổ phiếu trong một request
+    
+    Args:
+        symbols: Danh sách mã cổ phiếu (lặp tham số hoặc phân cách bằng dấu phẩy)
+        start_date: Ngày bắt đầu (YYYY-MM-DD)
+        end_date: Ngày kết thúc (YYYY-MM-DD)
+        days: Số ngày dữ liệu cần lấy (nếu không chỉ định start_date và end_date)
+    """
+    try:
+        symbol_list = [s.strip().upper() for item in symbols for s in item.split(",") if s.strip()]
+        if not symbol_list:
+            raise HTTPException(status_code=400, detail="At least one symbol is required")
+        if len(symbol_list) > settings.BATCH_MAX_SYMBOLS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.BATCH_MAX_SYMBOLS} symbols per request"
+            )
+            
+        # Xử lý ngày tháng
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+            
+        # Kiểm tra ngày hợp lệ
+        start = datetime.strptime(start_date, '%Y-%m-%d')
+        end = datetime.strptime(end_date, '%Y-%m-%d')
+        if end < start:
+            raise HTTPException(
+                status_code=400,
+                detail="end_date must be greater than or equal to start_date"
+            )
+            
+        # Lấy dữ liệu song song
+        data = await stock_service.get_stock_prices(symbol_list, start_date, end_date)
+        return data
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/price")
 async def get_stock_price(
     symbol: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    days: int = 30
+    days: int = 30,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
 ):
     """
     Lấy dữ liệu giá cổ phiếu
@@ -57,16 +179,18 @@ async def get_stock_price(
             )
             
         # Lấy dữ liệu
-        stock_service = StockDataService()
-        data = stock_service.get_stock_price(symbol, start_date, end_date)
+        data = await stock_service.get_stock_price(symbol, start_date, end_date)
         return data
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/info")
-async def get_stock_info(symbol: str):
+async def get_stock_info(
+    symbol: str,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
     Lấy thông tin cơ bản của cổ phiếu
     
@@ -74,14 +198,16 @@ async def get_stock_info(symbol: str):
         symbol: Mã cổ phiếu
     """
     try:
-        stock_service = StockDataService()
-        info = stock_service.get_stock_info(symbol)
+        info = await stock_service.get_stock_info(symbol)
         return info
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/basic-info")
-async def get_stock_basic_info(symbol: str):
+async def get_stock_basic_info(
+    symbol: str,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
     Lấy thông tin cơ bản chi tiết của cổ phiếu
     
@@ -89,14 +215,16 @@ async def get_stock_basic_info(symbol: str):
         symbol: Mã cổ phiếu
     """
     try:
-        stock_service = StockDataService()
-        info = stock_service.get_stock_basic_info(symbol)
+        info = await stock_service.get_stock_basic_info(symbol)
         return info
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/management")
-async def get_stock_management(symbol: str):
+async def get_stock_management(
+    symbol: str,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
     Lấy thông tin ban lãnh đạo của cổ phiếu
     
@@ -104,14 +232,16 @@ async def get_stock_management(symbol: str):
         symbol: Mã cổ phiếu
     """
     try:
-        stock_service = StockDataService()
-        info = stock_service.get_stock_management(symbol)
+        info = await stock_service.get_stock_management(symbol)
         return info
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/major-shareholders")
-async def get_stock_major_shareholders(symbol: str):
+async def get_stock_major_shareholders(
+    symbol: str,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
     Lấy thông tin cổ đông lớn của cổ phiếu
     
@@ -119,14 +249,16 @@ async def get_stock_major_shareholders(symbol: str):
         symbol: Mã cổ phiếu
     """
     try:
-        stock_service = StockDataService()
-        info = stock_service.get_stock_major_shareholders(symbol)
+        info = await stock_service.get_stock_major_shareholders(symbol)
         return info
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/dividend-history")
-async def get_stock_dividend_history(symbol: str):
+async def get_stock_dividend_history(
+    symbol: str,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
     Lấy lịch sử cổ tức của cổ phiếu
     
@@ -134,14 +266,16 @@ async def get_stock_dividend_history(symbol: str):
         symbol: Mã cổ phiếu
     """
     try:
-        stock_service = StockDataService()
-        info = stock_service.get_stock_dividend_history(symbol)
+        info = await stock_service.get_stock_dividend_history(symbol)
         return info
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/events")
-async def get_stock_events(symbol: str):
+async def get_stock_events(
+    symbol: str,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
     Lấy thông tin sự kiện của cổ phiếu
     
@@ -149,18 +283,18 @@ async def get_stock_events(symbol: str):
         symbol: Mã cổ phiếu
     """
     try:
-        stock_service = StockDataService()
-        info = stock_service.get_stock_events(symbol)
+        info = await stock_service.get_stock_events(symbol)
         return info
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/financials")
 async def get_stock_financials(
     symbol: str,
     report_type: str = 'balance_sheet',
     period: str = 'year',
-    lang: str = 'vi'
+    lang: str = 'vi',
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
 ):
     """
     Lấy báo cáo tài chính của cổ phiếu
@@ -172,8 +306,7 @@ async def get_stock_financials(
         lang: Ngôn ngữ ('vi', 'en')
     """
     try:
-        stock_service = StockDataService()
-        data = stock_service.get_stock_financials(
+        data = await stock_service.get_stock_financials(
             symbol=symbol,
             report_type=report_type,
             period=period,
@@ -183,24 +316,53 @@ async def get_stock_financials(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/screen")
 async def screen_stocks(
-    limit: int = 100
+    request: Request,
+    response: Response,
+    limit: int = 100,
+    filter_expr: Optional[str] = Query(None, alias="filter", max_length=1000),
+    sort: Optional[str] = Query(None, max_length=200),
+    fields: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = Query(None, max_length=500),
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
 ):
     """
     Lọc cổ phiếu theo tiêu chí
     
     Args:
         limit: Số lượng kết quả tối đa
+        filter: Biểu thức lọc trên các cột, ví dụ
+            "pe < 12 and roe > 15 and close > ma50 and exchange == 'HOSE'"
+        sort: Biểu thức sắp xếp tăng dần, thêm dấu "-" để giảm dần (ví dụ "-roe")
+        fields: Các cột cần trả về (mặc định: symbol, name, exchange, close và các cột dùng trong biểu thức)
+        cursor: Con trỏ trang tiếp theo (lấy từ header X-Next-Cursor của trang trước)
     """
+    if filter_expr or sort or fields or cursor:
+        try:
+            rows, next_cursor = await stock_service.screen_stocks_page(
+                limit, filter_expr=filter_expr, sort=sort, fields=fields, cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise _server_error(e)
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return rows
     try:
-        stock_service = StockDataService()
-        stocks = stock_service.screen_stocks(limit=limit)
-        return stocks
+        universe = await stock_service.get_universe()
+        not_modified = _not_modified(request, response, f"{universe.version}-{limit}")
+        if not_modified is not None:
+            return not_modified
+        rows, last = universe.page(None, limit, screen=True)
+        if last is not None:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor([last])
+        return rows
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/{symbol}/technical-analysis")
 async def get_technical_analysis(
@@ -208,7 +370,9 @@ async def get_technical_analysis(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     days: int = 30,
-    indicators: List[str] = ["MA", "RSI", "MACD", "BB"]
+    indicators: List[str] = Query(["MA", "RSI", "MACD", "BB"]),
+    response_format: str = Query("index", alias="format", pattern="^(index|columnar)$"),
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
 ):
     """
     Lấy phân tích kỹ thuật của cổ phiếu
@@ -218,7 +382,10 @@ async def get_technical_analysis(
         start_date: Ngày bắt đầu (YYYY-MM-DD)
         end_date: Ngày kết thúc (YYYY-MM-DD)
         days: Số ngày dữ liệu cần lấy (nếu không chỉ định start_date và end_date)
-        indicators: Danh sách các chỉ báo kỹ thuật cần tính toán
+        indicators: Danh sách các chỉ báo kỹ thuật cần tính toán, có thể kèm tham số:
+            MA, RSI, MACD, BB, SMA(50), EMA(34), RSI(9), BB(20,2.5), ATR(14), Stoch(14,3), OBV, HV(20)
+        format: "index" (mặc định, {dòng: giá trị} cho từng chuỗi) hoặc "columnar"
+            (một mảng "dates" dùng chung, mỗi chuỗi là {"offset", "values"}, giá trị thiếu là null)
     """
     try:
         # Xử lý ngày tháng
@@ -252,39 +419,103 @@ async def get_technical_analysis(
                 detail=f"Invalid date format. Please use YYYY-MM-DD format: {str(e)}"
             )
             
+        # Kiểm tra các chỉ báo yêu cầu
+        try:
+            parse_indicators(indicators)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+            
         # Lấy dữ liệu
-        stock_service = StockDataService()
-        data = stock_service.get_technical_analysis(
+        data = await stock_service.get_technical_analysis(
             symbol=symbol,
             start_date=start_date,
             end_date=end_date,
-            indicators=indicators
+            indicators=indicators,
+            layout=response_format
         )
+        if response_format == "columnar":
+            # Đã là kiểu JSON thuần: bỏ qua jsonable_encoder, serialize một lần
+            return Response(
+                content=json.dumps(data, separators=(",", ":"), ensure_ascii=False),
+                media_type="application/json"
+            )
         return data
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
+
+@router.get("/{symbol}/indicators")
+async def get_market_indicators(
+    symbol: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
+    """
+    Lấy chỉ báo kỹ thuật đã tính sẵn cho toàn thị trường (job hàng ngày)
+    
+    Args:
+        symbol: Mã cổ phiếu
+        start_date: Ngày bắt đầu (YYYY-MM-DD), mặc định toàn bộ dữ liệu đã tính
+        end_date: Ngày kết thúc (YYYY-MM-DD)
+    
+    Trả về giá trị mới nhất ("latest") và chuỗi theo dạng columnar ("data").
+    """
+    try:
+        data = await stock_service.get_market_indicators(symbol, start_date, end_date)
+    except Exception as e:
+        raise _server_error(e)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"No market indicators for {symbol}")
+    return data
+
+@router.get("/{symbol}/indicators/live")
+async def get_live_indicators(
+    symbol: str,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
+    """
+    Lấy giá trị mới nhất của MA, RSI, MACD, BB tính đến phiên hiện tại
+    
+    Args:
+        symbol: Mã cổ phiếu
+    
+    Chỉ báo được cập nhật tăng dần theo từng phiên (trạng thái streaming),
+    không tính lại toàn bộ lịch sử.
+    """
+    try:
+        data = await stock_service.get_live_indicators(symbol)
+    except Exception as e:
+        raise _server_error(e)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"No price data for {symbol}")
+    return data
 
 @router.get("/{symbol}/fundamental-analysis")
-async def get_fundamental_analysis(symbol: str):
+async def get_fundamental_analysis(
+    symbol: str,
+    deadline: Optional[float] = Query(None, gt=0, le=60),
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
     """
     Lấy phân tích cơ bản của cổ phiếu
     
     Args:
         symbol: Mã cổ phiếu
+        deadline: Thời gian chờ tối đa (giây); mục nào quá hạn được đánh dấu "timeout" trong "sections"
     """
     try:
-        stock_service = StockDataService()
-        analysis = stock_service.get_fundamental_analysis(symbol)
+        analysis = await stock_service.get_fundamental_analysis(symbol, deadline=deadline)
         return analysis
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/portfolio/analysis")
 async def get_portfolio_analysis(
     symbols: List[str],
-    weights: Optional[List[float]] = None
+    weights: Optional[List[float]] = None,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
 ):
     """
     Phân tích danh mục đầu tư
@@ -300,21 +531,21 @@ async def get_portfolio_analysis(
                 detail="Number of weights must match number of symbols"
             )
             
-        stock_service = StockDataService()
-        analysis = stock_service.get_portfolio_analysis(
+        analysis = await stock_service.get_portfolio_analysis(
             symbols=symbols,
             weights=weights
         )
         return analysis
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _server_error(e)
 
 @router.get("/portfolio/performance")
 async def get_portfolio_performance(
     symbols: List[str],
     weights: Optional[List[float]] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
 ):
     """
     Theo dõi hiệu suất danh mục đầu tư
@@ -325,26 +556,88 @@ async def get_portfolio_performance(
         start_date: Ngày bắt đầu (YYYY-MM-DD)
         end_date: Ngày kết thúc (YYYY-MM-DD)
     """
+    if weights and len(weights) != len(symbols):
+        raise HTTPException(
+            status_code=400,
+            detail="Number of weights must match number of symbols"
+        )
     try:
-        if weights and len(weights) != len(symbols):
-            raise HTTPException(
-                status_code=400,
-                detail="Number of weights must match number of symbols"
-            )
-            
         # Xử lý ngày tháng
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
         if not start_date:
             start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
             
-        stock_service = StockDataService()
-        performance = stock_service.get_portfolio_performance(
+        performance = await stock_service.get_portfolio_performance(
             symbols=symbols,
             weights=weights,
             start_date=start_date,
             end_date=end_date
         )
         return performance
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise _server_error(e) 
+
+@router.get("/portfolio/risk")
+async def get_portfolio_risk(
+    symbols: List[str] = Query(...),
+    weights: Optional[List[float]] = Query(None),
+    confidence: float = Query(0.95, ge=0.5, lt=1.0),
+    horizon_days: int = Query(1, ge=1, le=245),
+    value: Optional[float] = Query(None, gt=0),
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
+    """
+    Đo rủi ro danh mục từ ma trận hiệp phương sai tính sẵn hàng đêm
+    
+    Args:
+        symbols: Danh sách mã cổ phiếu trong danh mục
+        weights: Tỷ trọng theo giá trị của từng cổ phiếu (nếu không có sẽ tính bằng nhau)
+        confidence: Độ tin cậy của VaR/CVaR (mặc định 95%)
+        horizon_days: Số phiên nắm giữ
+        value: Giá trị danh mục, để trả thêm mức lỗ bằng tiền
+    """
+    try:
+        return await stock_service.get_portfolio_risk(
+            symbols=symbols,
+            weights=weights,
+            confidence=confidence,
+            horizon_days=horizon_days,
+            value=value
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise _server_error(e)
+
+@router.get("/portfolio/{portfolio_id}/risk")
+async def get_stored_portfolio_risk(
+    portfolio_id: str,
+    confidence: float = Query(0.95, ge=0.5, lt=1.0),
+    horizon_days: int = Query(1, ge=1, le=245),
+    current_user: TokenData = Depends(get_current_user),
+    stock_service: AsyncStockDataService = Depends(get_async_stock_service)
+):
+    """
+    Đo rủi ro của danh mục đã lưu (tỷ trọng theo giá trị các vị thế): VaR, CVaR, beta so với VN-Index
+    và mức đóng góp rủi ro của từng vị thế. Chỉ chủ sở hữu danh mục (theo token) được xem;
+    danh mục của người khác trả 404 như danh mục không tồn tại
+    
+    Args:
+        portfolio_id: Mã danh mục
+        confidence: Độ tin cậy của VaR/CVaR (mặc định 95%)
+        horizon_days: Số phiên nắm giữ
+    """
+    try:
+        risk = await stock_service.get_stored_portfolio_risk(
+            portfolio_id, current_user.username, confidence=confidence, horizon_days=horizon_days
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise _server_error(e)
+    if risk is None:
+        raise HTTPException(status_code=404, detail=f"Portfolio {portfolio_id} not found")
+    return risk
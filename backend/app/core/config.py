@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 
@@ -30,6 +30,45 @@ class Settings(BaseSettings):
     # Cache Configuration
     CACHE_DIR: str = "./cache"
     CACHE_EXPIRE_SECONDS: int = 3600
+    PRICE_STORE_DIR: str = "./data/prices"
+    # Seconds today's unfinished bar is served from memory before it is fetched again
+    PRICE_LIVE_TTL_SECONDS: int = 60
+    INDICATOR_STATE_DIR: str = "./data/indicator_state"
+    # Symbols whose streaming indicator state is kept in memory
+    INDICATOR_STATE_MAX_SYMBOLS: int = 2000
+    # Calendar days of bars read to bring streaming indicators up to the live bar
+    LIVE_INDICATOR_LOOKBACK_DAYS: int = 14
+    MARKET_INDICATOR_DIR: str = "./data/market_indicators"
+    # Symbols whose full-history indicator series are kept in memory
+    INDICATOR_CACHE_MAX_SYMBOLS: int = 256
+    # Calendar days of history the nightly market-wide indicators are computed over
+    MARKET_INDICATOR_HISTORY_DAYS: int = 730
+    MARKET_SNAPSHOT_DIR: str = "./data/market_snapshot"
+    # Nightly snapshot builds kept on disk
+    MARKET_SNAPSHOT_KEEP: int = 3
+    # Annual risk-free rate used by portfolio Sharpe ratios
+    RISK_FREE_RATE: float = 0.0
+    RISK_MODEL_DIR: str = "./data/risk_model"
+    # Trading days of returns the risk model's covariance is estimated over
+    RISK_WINDOW_DAYS: int = 245
+    # Index portfolio betas are measured against
+    RISK_BENCHMARK: str = "VNINDEX"
+    UNIVERSE_REFRESH_SECONDS: int = 3600
+    # Seconds each company profile section stays fresh
+    PROFILE_TTL_SECONDS: Dict[str, float] = {
+        "overview": 86400,
+        "officers": 604800,
+        "shareholders": 604800,
+        "events": 21600
+    }
+    PROFILE_CACHE_MAX_ENTRIES: int = 8000
+    # Financial statements are kept in financial_data until a new period is due
+    FINANCIAL_PERSIST: bool = True
+    FINANCIAL_RECHECK_SECONDS: int = 86400
+    FINANCIAL_QUARTER_LAG_DAYS: int = 30
+    FINANCIAL_YEAR_LAG_DAYS: int = 90
+    FINANCIAL_RETRY_SECONDS: int = 300
+    FINANCIAL_CACHE_MAX_BUNDLES: int = 4000
 
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
@@ -38,6 +77,26 @@ class Settings(BaseSettings):
     # VNStock Configuration
     VNSTOCK_USERNAME: str
     VNSTOCK_PASSWORD: str
+    VNSTOCK_CLIENT_IDLE_SECONDS: int = 900
+    VNSTOCK_CLIENT_MAX_ENTRIES: int = 2000
+    # Requests per second allowed for each vendor source
+    SOURCE_RATE_LIMITS: Dict[str, float] = {"VCI": 10.0, "TCBS": 5.0}
+    SOURCE_MIN_RATE: float = 0.5
+    SOURCE_TARGET_LATENCY_SECONDS: float = 2.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+    SOURCE_ROUTER_WINDOW: int = 200
+    SOURCE_MAX_ERROR_RATE: float = 0.5
+    SOURCE_ROUTER_MAX_AGE_SECONDS: float = 300.0
+
+    # Worker Pools
+    IO_THREAD_POOL_SIZE: int = 32
+    CPU_THREAD_POOL_SIZE: int = 4
+    FANOUT_POOL_SIZE: int = 32
+    BATCH_MAX_CONCURRENCY: int = 8
+    BATCH_MAX_SYMBOLS: int = 200
+    FUNDAMENTAL_DEADLINE_SECONDS: float = 8.0
+    FUNDAMENTAL_MAX_IN_FLIGHT: int = 16
 
     # Security
     SECURITY_PASSWORD_SALT: str
@@ -0,0 +1,87 @@
+import base64
+import json
+import math
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Type
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return date.fromisoformat(value["$d"])
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def _matches(value: Any, kind: Type) -> bool:
+    if isinstance(value, bool):
+        return kind is bool
+    if kind is float:
+        # Sort keys: any number but NaN (missing values are sorted as +inf)
+        return isinstance(value, (int, float)) and not math.isnan(value)
+    return isinstance(value, kind)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last returned row as an opaque, URL-safe cursor
+
+    Args:
+        values (Sequence[Any]): Keyset values, in the order of the keyset columns
+
+    Returns:
+        str: Cursor to pass back to get the following page
+    """
+    payload = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(
+    cursor: Optional[str],
+    size: Optional[int] = None,
+    types: Optional[Sequence[Type]] = None
+) -> Optional[List[Any]]:
+    """Decode a cursor made by encode_cursor
+
+    Cursors come back from clients, so a forged one must fail here as a
+    ValueError rather than deep in the code seeking past it.
+
+    Args:
+        cursor (Optional[str]): Cursor from the client, None or empty for the first page
+        size (Optional[int]): Expected number of keyset values, if known
+        types (Optional[Sequence[Type]]): Expected type of each keyset value, if known;
+            float accepts any number but NaN
+
+    Returns:
+        Optional[List[Any]]: Keyset values, None for the first page
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise ValueError("Invalid cursor")
+    values = [_decode_value(value) for value in values]
+    if types is not None and (
+        len(values) != len(types) or not all(_matches(value, kind) for value, kind in zip(values, types))
+    ):
+        raise ValueError("Invalid cursor")
+    return values
@@ -6,8 +6,15 @@ import uvicorn
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.api.routers import stock
-from app.services.stock_data import StockDataService
+from app.services.stock_data import (
+    StockDataService, source_breakers, source_limiter, source_router, symbol_universe,
+    company_profiles, market_indicators, indicator_cache, market_snapshots, search_index,
+    risk_models, fanout_pool, indicator_states
+)
+from app.services.async_stock_data import shutdown_async_stock_service
+from app.services.coalescing import flights
 
 # Configure logging
 logger.add(
@@ -32,11 +39,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include API router
 app.include_router(stock.router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def startup_event():
+    symbol_universe.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    symbol_universe.stop()
+    shutdown_async_stock_service()
+
 @app.get("/")
 async def root():
     return JSONResponse(
@@ -59,12 +76,37 @@ async def health_check():
     except Exception as e:
         cache_status = f"unhealthy: {str(e)}"
 
+    # Vendor sources: circuit breaker state and current adaptive rate
+    breakers = source_breakers.snapshot()
+    rates = source_limiter.rates_snapshot()
+    latency = source_router.snapshot()
+    sources = {
+        source: {
+            **breakers.get(source, {"state": "closed"}),
+            "rate_per_second": rates.get(source),
+            "latency": latency.get(source, {})
+        }
+        for source in sorted(set(breakers) | set(rates) | set(latency))
+    }
+    degraded = any(info["state"] != "closed" for info in sources.values())
+
     return JSONResponse(
         content={
-            "status": "healthy",
+            "status": "degraded" if degraded else "healthy",
             "version": "1.0.0",
             "database_status": "not configured",
-            "cache_status": cache_status
+            "cache_status": cache_status,
+            "coalescing": flights.stats(),
+            "fanout": fanout_pool.stats(),
+            "universe": symbol_universe.stats(),
+            "company_profiles": company_profiles.stats(),
+            "market_indicators": market_indicators.stats(),
+            "indicator_states": indicator_states.stats(),
+            "indicator_cache": indicator_cache.stats(),
+            "market_snapshot": market_snapshots.stats(),
+            "search_index": search_index.stats(),
+            "risk_model": risk_models.stats(),
+            "sources": sources
         }
     )
 
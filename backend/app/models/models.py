@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -22,6 +22,9 @@ class User(Base):
 
 class Stock(Base):
     __tablename__ = "stocks"
+    __table_args__ = (
+        Index("ix_stocks_exchange_symbol", "exchange", "symbol"),
+    )
 
     id = Column(String(36), primary_key=True)
     symbol = Column(String(10), unique=True, nullable=False)
@@ -38,6 +41,9 @@ class Stock(Base):
 
 class PriceData(Base):
     __tablename__ = "price_data"
+    __table_args__ = (
+        Index("ix_price_data_stock_id_date", "stock_id", "date"),
+    )
 
     id = Column(String(36), primary_key=True)
     stock_id = Column(String(36), ForeignKey("stocks.id"), nullable=False)
@@ -55,6 +61,9 @@ class PriceData(Base):
 
 class FinancialData(Base):
     __tablename__ = "financial_data"
+    __table_args__ = (
+        Index("ix_financial_data_stock_id_type_period", "stock_id", "data_type", "period"),
+    )
 
     id = Column(String(36), primary_key=True)
     stock_id = Column(String(36), ForeignKey("stocks.id"), nullable=False)
@@ -70,6 +79,10 @@ class FinancialData(Base):
 
 class Strategy(Base):
     __tablename__ = "strategies"
+    __table_args__ = (
+        Index("ix_strategies_user_id_created_at", "user_id", "created_at"),
+        Index("ix_strategies_is_public_created_at", "is_public", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
@@ -78,7 +91,7 @@ class Strategy(Base):
     code = Column(Text, nullable=False)
     parameters = Column(JSON)
     is_public = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
@@ -87,6 +100,9 @@ class Strategy(Base):
 
 class Backtest(Base):
     __tablename__ = "backtests"
+    __table_args__ = (
+        Index("ix_backtests_strategy_id_created_at", "strategy_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True)
     strategy_id = Column(String(36), ForeignKey("strategies.id"), nullable=False)
@@ -96,7 +112,7 @@ class Backtest(Base):
     parameters = Column(JSON)
     results = Column(JSON)
     status = Column(String(20))  # running, completed, failed
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
@@ -104,6 +120,9 @@ class Backtest(Base):
 
 class Portfolio(Base):
     __tablename__ = "portfolios"
+    __table_args__ = (
+        Index("ix_portfolios_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
@@ -111,7 +130,7 @@ class Portfolio(Base):
     description = Column(Text)
     initial_capital = Column(Float, nullable=False)
     current_value = Column(Float)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
@@ -120,6 +139,9 @@ class Portfolio(Base):
 
 class Position(Base):
     __tablename__ = "positions"
+    __table_args__ = (
+        Index("ix_positions_portfolio_id_created_at", "portfolio_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True)
     portfolio_id = Column(String(36), ForeignKey("portfolios.id"), nullable=False)
@@ -127,7 +149,7 @@ class Position(Base):
     quantity = Column(Integer, nullable=False)
     average_price = Column(Float, nullable=False)
     current_price = Column(Float)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
@@ -0,0 +1,298 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from .stock_data import StockDataService, get_stock_service
+from .universe import UniverseSnapshot
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class AsyncStockDataService:
+    """Async facade over StockDataService
+
+    vnstock and pandas calls are blocking, so they are dispatched to bounded
+    thread pools instead of running on the event loop. Vendor I/O and
+    DataFrame computation get separate pools, so a burst of slow upstream
+    calls cannot starve indicator computation and the other way round.
+    """
+
+    def __init__(
+        self,
+        service: Optional[StockDataService] = None,
+        io_workers: Optional[int] = None,
+        cpu_workers: Optional[int] = None
+    ):
+        """Initialize the facade
+
+        Args:
+            service (Optional[StockDataService]): Wrapped service, defaults to the shared one
+            io_workers (Optional[int]): Size of the vendor I/O pool
+            cpu_workers (Optional[int]): Size of the DataFrame/compute pool
+        """
+        self.service = service or get_stock_service()
+        self.io_workers = io_workers or settings.IO_THREAD_POOL_SIZE
+        self.cpu_workers = cpu_workers or settings.CPU_THREAD_POOL_SIZE
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=self.io_workers,
+            thread_name_prefix="stock-io"
+        )
+        self._cpu_pool = ThreadPoolExecutor(
+            max_workers=self.cpu_workers,
+            thread_name_prefix="stock-cpu"
+        )
+
+    async def run_io(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking vendor call on the I/O pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, functools.partial(func, *args, **kwargs))
+
+    async def run_cpu(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run DataFrame/NumPy work on the compute pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_pool, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop both pools"""
+        self._io_pool.shutdown(wait=wait)
+        self._cpu_pool.shutdown(wait=wait)
+
+    async def get_universe(self) -> UniverseSnapshot:
+        return await self.run_io(self.service.get_universe)
+
+    async def search_stocks(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return await self.run_io(self.service.search_stocks, query, limit)
+
+    async def get_stock_list(self) -> List[Dict[str, Any]]:
+        return await self.run_io(self.service.get_stock_list)
+
+    async def get_stock_list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.run_io(self.service.get_stock_list_page, cursor, limit, fields)
+
+    async def get_stock_price(self, symbol: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_stock_price, symbol, start_date, end_date)
+
+    async def get_stock_prices(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return await self.run_io(
+            self.service.get_stock_prices,
+            symbols,
+            start_date,
+            end_date,
+            max_concurrency=max_concurrency
+        )
+
+    async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_stock_info, symbol)
+
+    async def get_stock_basic_info(self, symbol: str) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_stock_basic_info, symbol)
+
+    async def get_stock_management(self, symbol: str) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_stock_management, symbol)
+
+    async def get_stock_major_shareholders(self, symbol: str) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_stock_major_shareholders, symbol)
+
+    async def get_stock_dividend_history(self, symbol: str) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_stock_dividend_history, symbol)
+
+    async def get_stock_events(self, symbol: str) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_stock_events, symbol)
+
+    async def get_stock_financials(
+        self,
+        symbol: str,
+        report_type: str = 'balance_sheet',
+        period: str = 'year',
+        lang: str = 'vi'
+    ) -> Dict[str, Any]:
+        return await self.run_io(
+            self.service.get_stock_financials,
+            symbol=symbol,
+            report_type=report_type,
+            period=period,
+            lang=lang
+        )
+
+    async def get_financial_ratio(self, symbol: str, period: str = 'year') -> Dict[str, Any]:
+        return await self.run_io(self.service.get_financial_ratio, symbol, period)
+
+    async def screen_stocks(
+        self,
+        limit: int = 100,
+        filter_expr: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.run_io(
+            self.service.screen_stocks,
+            limit=limit,
+            filter_expr=filter_expr,
+            sort=sort,
+            fields=fields
+        )
+
+    async def screen_stocks_page(
+        self,
+        limit: int = 100,
+        filter_expr: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.run_io(
+            self.service.screen_stocks_page,
+            limit=limit,
+            filter_expr=filter_expr,
+            sort=sort,
+            fields=fields,
+            cursor=cursor
+        )
+
+    async def get_technical_analysis(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        indicators: List[str] = ["MA", "RSI", "MACD", "BB"],
+        layout: str = "index"
+    ) -> Dict[str, Any]:
+        try:
+            # Fetch on the I/O pool, compute indicators on the CPU pool
+            hist_data = await self.run_io(
+                self.service.get_price_history,
+                symbol,
+                self.service.warmup_start(start_date, indicators),
+                end_date
+            )
+            if hist_data is None or hist_data.empty:
+                return {
+                    "symbol": symbol,
+                    "data": {}
+                }
+            analysis = await self.run_cpu(
+                self.service.cached_technical_indicators,
+                symbol,
+                hist_data,
+                indicators,
+                start_date,
+                end_date,
+                layout=layout
+            )
+            return {
+                "symbol": symbol,
+                "data": analysis
+            }
+        except Exception as e:
+            logger.error(f"Error getting technical analysis for {symbol}: {str(e)}")
+            raise
+
+    async def update_live_indicators(self, symbol: str, time: Any, close: float) -> Dict[str, Any]:
+        return await self.run_io(self.service.update_live_indicators, symbol, time, close)
+
+    async def get_live_indicators(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return await self.run_io(self.service.get_live_indicators, symbol)
+
+    async def get_market_indicators(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await self.run_cpu(self.service.get_market_indicators, symbol, start_date, end_date)
+
+    async def get_fundamental_analysis(self, symbol: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_fundamental_analysis, symbol, deadline=deadline)
+
+    async def get_portfolio_analysis(
+        self,
+        symbols: List[str],
+        weights: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        return await self.run_io(self.service.get_portfolio_analysis, symbols=symbols, weights=weights)
+
+    async def get_portfolio_performance(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        weights: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        return await self.run_io(
+            self.service.get_portfolio_performance,
+            symbols=symbols,
+            start_date=start_date,
+            end_date=end_date,
+            weights=weights
+        )
+
+
+    async def get_portfolio_risk(
+        self,
+        symbols: List[str],
+        weights: Optional[List[float]] = None,
+        confidence: float = 0.95,
+        horizon_days: int = 1,
+        value: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return await self.run_cpu(
+            self.service.get_portfolio_risk,
+            symbols=symbols,
+            weights=weights,
+            confidence=confidence,
+            horizon_days=horizon_days,
+            value=value
+        )
+
+    async def get_stored_portfolio_risk(
+        self,
+        portfolio_id: str,
+        user_id: str,
+        confidence: float = 0.95,
+        horizon_days: int = 1
+    ) -> Optional[Dict[str, Any]]:
+        return await self.run_io(
+            self.service.get_stored_portfolio_risk,
+            portfolio_id,
+            user_id,
+            confidence=confidence,
+            horizon_days=horizon_days
+        )
+
+
+_async_service_lock = threading.Lock()
+_async_service: Optional[AsyncStockDataService] = None
+
+def get_async_stock_service() -> AsyncStockDataService:
+    """FastAPI dependency returning the process-wide AsyncStockDataService"""
+    global _async_service
+    if _async_service is None:
+        with _async_service_lock:
+            if _async_service is None:
+                _async_service = AsyncStockDataService()
+    return _async_service
+
+def shutdown_async_stock_service() -> None:
+    """Release the thread pools of the shared facade"""
+    global _async_service
+    with _async_service_lock:
+        if _async_service is not None:
+            _async_service.shutdown(wait=False)
+            _async_service = None
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+# HTTP statuses below 500 that still mean the source is struggling
+THROTTLING_STATUSES = {408, 429}
+
+# Transport errors of the HTTP client stacks that do not subclass the builtins
+TRANSPORT_ERRORS = {
+    'ConnectionError', 'Timeout', 'TimeoutError', 'TimeoutException', 'TransportError',
+    'ProtocolError', 'ChunkedEncodingError', 'MaxRetryError', 'NewConnectionError', 'RemoteDisconnected'
+}
+
+
+def is_source_failure(error: BaseException) -> bool:
+    """Whether an error means the source itself is unhealthy
+
+    Transport errors, timeouts, throttling and 5xx responses count as
+    source failures. Errors about the request (unknown symbol, empty data,
+    other 4xx responses) do not: the source answered.
+
+    Args:
+        error (BaseException): Error raised by a vendor call
+
+    Returns:
+        bool: True if the error should count against the source
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is None:
+        status = getattr(error, 'status_code', None)
+    if isinstance(status, int):
+        return status >= 500 or status in THROTTLING_STATUSES
+    return any(cls.__name__ in TRANSPORT_ERRORS for cls in type(error).__mro__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a source whose circuit is open"""
+
+    def __init__(self, source: str, retry_after: float):
+        super().__init__(f"Source {source} is unavailable, retry in {retry_after:.0f}s")
+        self.source = source
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Circuit breaker for one upstream source
+
+    closed: calls go through; consecutive failures are counted.
+    open: calls fail immediately with CircuitOpenError for reset_timeout seconds.
+    half_open: a single trial call is let through; success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(self, source: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize the breaker
+
+        Args:
+            source (str): Source name, used in errors and logs
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds to stay open before a trial call
+        """
+        self.source = source
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._total_failures = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked(time.monotonic())
+
+    def _current_state_locked(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self) -> None:
+        """Check that a call may go through
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a trial call is already running
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state_locked(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self._rejected += 1
+            retry_after = max(0.0, self.reset_timeout - (now - self._opened_at))
+        raise CircuitOpenError(self.source, retry_after)
+
+    def record_success(self) -> None:
+        """Record a successful call"""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.source} closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a call that neither succeeded nor failed, letting the next trial through"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call"""
+        with self._lock:
+            self._failures += 1
+            self._total_failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit for {self.source} opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the breaker state for health reporting"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state_locked(now)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "total_failures": self._total_failures,
+                "rejected": self._rejected,
+                "retry_after": round(max(0.0, self.reset_timeout - (now - self._opened_at)), 1)
+                if state == OPEN else 0.0
+            }
+
+
+class SourceBreakers:
+    """One circuit breaker per vendor source"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize the registry
+
+        Args:
+            failure_threshold (int): Consecutive failures that open a source's circuit
+            reset_timeout (float): Seconds a circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source: str) -> CircuitBreaker:
+        """Get the breaker of a source, creating it on first use"""
+        with self._lock:
+            breaker = self._breakers.get(source)
+            if breaker is None:
+                breaker = CircuitBreaker(source, self.failure_threshold, self.reset_timeout)
+                self._breakers[source] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get the state of every breaker seen so far"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {source: breaker.snapshot() for source, breaker in breakers.items()}
+
+    def state(self, source: str) -> Optional[str]:
+        """Get the circuit state of a source (None if never called)"""
+        with self._lock:
+            breaker = self._breakers.get(source)
+        return None if breaker is None else breaker.state
@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from vnstock import Vnstock, Listing
+
+logger = logging.getLogger(__name__)
+
+ClientKey = Tuple[str, str]
+
+
+class VendorClientRegistry:
+    """Process-wide registry of vnstock clients keyed by (source, symbol)
+
+    Building ``Vnstock().stock(...)`` sets up the quote/company/finance
+    helpers and their HTTP sessions every time. The registry keeps those
+    clients alive between requests so their connection pools are reused,
+    and drops entries that have not been used for ``idle_seconds``.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: float = 900,
+        max_entries: int = 2000,
+        factory: Optional[Callable[[str, str], Any]] = None
+    ):
+        """Initialize the registry
+
+        Args:
+            idle_seconds (float): Evict clients not used for this many seconds
+            max_entries (int): Maximum number of clients kept (least recently used are evicted)
+            factory (Optional[Callable[[str, str], Any]]): Builds a client from (symbol, source)
+        """
+        self.idle_seconds = idle_seconds
+        self.max_entries = max_entries
+        self._factory = factory or self._default_factory
+        self._clients: "OrderedDict[ClientKey, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._vnstock: Optional[Vnstock] = None
+        self._listing: Optional[Listing] = None
+        self._last_sweep = time.monotonic()
+        self._created = 0
+        self._hits = 0
+        self._evicted = 0
+
+    def _default_factory(self, symbol: str, source: str) -> Any:
+        if self._vnstock is None:
+            self._vnstock = Vnstock()
+        return self._vnstock.stock(symbol=symbol, source=source)
+
+    def get(self, symbol: str, source: str = 'VCI') -> Any:
+        """Get a shared client for a symbol and source, creating it if needed
+
+        Args:
+            symbol (str): Stock symbol
+            source (str): Data source ('VCI', 'TCBS')
+
+        Returns:
+            Any: vnstock stock client
+        """
+        key = (source, symbol.upper())
+        now = time.monotonic()
+        with self._lock:
+            self._sweep_locked(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients[key] = (entry[0], now)
+                self._clients.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+
+        # Build outside the lock so a slow client setup does not block other symbols
+        client = self._factory(key[1], source)
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                # Another thread won the race, keep its client
+                self._clients.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._clients[key] = (client, now)
+            self._created += 1
+            while len(self._clients) > self.max_entries:
+                self._clients.popitem(last=False)
+                self._evicted += 1
+        return client
+
+    def get_listing(self) -> Listing:
+        """Get the shared Listing client
+
+        Returns:
+            Listing: vnstock listing client
+        """
+        with self._lock:
+            if self._listing is None:
+                self._listing = Listing()
+            return self._listing
+
+    def evict_idle(self) -> int:
+        """Drop clients idle for longer than ``idle_seconds``
+
+        Returns:
+            int: Number of evicted clients
+        """
+        with self._lock:
+            return self._sweep_locked(time.monotonic(), force=True)
+
+    def _sweep_locked(self, now: float, force: bool = False) -> int:
+        # Sweeping is amortised: at most a few times per idle period
+        if not force and now - self._last_sweep < self.idle_seconds / 4:
+            return 0
+        self._last_sweep = now
+        expired = [key for key, (_, used) in self._clients.items() if now - used > self.idle_seconds]
+        for key in expired:
+            del self._clients[key]
+        if expired:
+            self._evicted += len(expired)
+            logger.info(f"Evicted {len(expired)} idle vendor clients")
+        return len(expired)
+
+    def clear(self) -> None:
+        """Drop every cached client"""
+        with self._lock:
+            self._clients.clear()
+            self._listing = None
+
+    def stats(self) -> Dict[str, int]:
+        """Get registry counters
+
+        Returns:
+            Dict[str, int]: Size, hits, created and evicted counts
+        """
+        with self._lock:
+            return {
+                "size": len(self._clients),
+                "hits": self._hits,
+                "created": self._created,
+                "evicted": self._evicted
+            }
+
+    def __len__(self) -> int:
+        return len(self._clients)
@@ -0,0 +1,122 @@
+import inspect
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class _Call:
+    """An in-flight upstream call shared by every waiter with the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one upstream request
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for and share its result (or its exception).
+    Waiters get their own copy of a DataFrame or Series result, so one
+    caller changing it in place cannot affect the others. Nothing is
+    cached once the call completes.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._total = 0
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run func for key, or join the call already in flight for key
+
+        Args:
+            key (Hashable): Identity of the upstream request
+            func (Callable[..., T]): Function performing the request
+
+        Returns:
+            T: Result of the (possibly shared) call
+        """
+        with self._lock:
+            self._total += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            if isinstance(call.result, (pd.DataFrame, pd.Series)):
+                return call.result.copy()
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def coalesce(self) -> Callable[[Callable[..., T]], Callable[..., T]]:
+        """Decorator coalescing concurrent calls of a service method
+
+        The key is built from the method name and its arguments bound to
+        the signature (defaults applied), so positional, keyword and
+        defaulted spellings of a call share one flight; a 'symbol'
+        argument is upper-cased, in the key and in the call. The instance
+        itself is not part of the key.
+        """
+        def decorator(func: Callable[..., T]) -> Callable[..., T]:
+            signature = inspect.signature(func)
+
+            @wraps(func)
+            def wrapper(instance: Any, *args: Any, **kwargs: Any) -> T:
+                bound = signature.bind(instance, *args, **kwargs)
+                bound.apply_defaults()
+                if isinstance(bound.arguments.get('symbol'), str):
+                    bound.arguments['symbol'] = bound.arguments['symbol'].upper()
+                key = (func.__qualname__, tuple(bound.arguments.items())[1:])
+                return self.do(key, func, *bound.args, **bound.kwargs)
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, int]:
+        """Get coalescing counters
+
+        Returns:
+            Dict[str, int]: Total calls, upstream executions, coalesced calls and in-flight keys
+        """
+        with self._lock:
+            return {
+                "calls": self._total,
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls)
+            }
+
+
+# Shared by every StockDataService instance in the process
+flights = SingleFlight()
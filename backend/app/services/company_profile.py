@@ -0,0 +1,187 @@
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .coalescing import SingleFlight, flights
+from .fanout import FanOutPool
+
+logger = logging.getLogger(__name__)
+
+# Profile section -> seconds it stays fresh. Overview figures move daily,
+# events a few times a day, officers and shareholders rarely.
+DEFAULT_TTLS: Dict[str, float] = {
+    'overview': 24 * 3600,
+    'officers': 7 * 24 * 3600,
+    'shareholders': 7 * 24 * 3600,
+    'events': 6 * 3600
+}
+
+# fetch(symbol, section) -> section rows
+SectionFetcher = Callable[[str, str], List[Dict[str, Any]]]
+
+ProfileKey = Tuple[str, str]
+
+
+class CompanyProfileCache:
+    """Shared cache of company profile sections
+
+    A profile is split into sections (overview, officers, shareholders,
+    events), each cached per symbol with its own TTL. Concurrent misses on
+    the same section share one vendor call, and when a refresh fails the
+    expired rows are served instead of an error. The least recently used
+    symbols are dropped beyond max_entries sections.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 8000,
+        single_flight: Optional[SingleFlight] = None,
+        pool: Optional[FanOutPool] = None
+    ):
+        """Initialize the cache
+
+        Args:
+            ttls (Optional[Dict[str, float]]): Section -> seconds it stays fresh
+            max_entries (int): Maximum number of (symbol, section) entries kept
+            single_flight (Optional[SingleFlight]): Coalesces concurrent misses, defaults to the shared one
+            pool (Optional[FanOutPool]): Runs parallel misses, defaults to a private pool of 8 workers
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self._flights = single_flight or flights
+        self._pool = pool or FanOutPool(max_workers=8, thread_name_prefix="company-profile")
+        self._entries: "OrderedDict[ProfileKey, Tuple[List[Dict[str, Any]], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+
+    @property
+    def sections(self) -> List[str]:
+        return list(self.ttls)
+
+    def _lookup(self, key: ProfileKey) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: ProfileKey, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = (rows, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, symbol: str, section: str, fetch: SectionFetcher) -> List[Dict[str, Any]]:
+        """Get one profile section, fetching it when missing or expired
+
+        Args:
+            symbol (str): Stock symbol
+            section (str): 'overview', 'officers', 'shareholders' or 'events'
+            fetch (SectionFetcher): Vendor fetch used on a miss
+
+        Returns:
+            List[Dict[str, Any]]: Section rows
+        """
+        if section not in self.ttls:
+            raise ValueError(f"Unknown profile section: {section}")
+        key = (symbol.upper(), section)
+        entry = self._lookup(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttls[section]:
+            with self._lock:
+                self._hits += 1
+            return entry[0]
+
+        with self._lock:
+            self._misses += 1
+        try:
+            rows = self._flights.do(('company_profile', key), self._fetch, key, fetch)
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Serving stale {section} for {symbol}: {str(e)}")
+            with self._lock:
+                self._stale += 1
+            return entry[0]
+        return rows
+
+    def _fetch(self, key: ProfileKey, fetch: SectionFetcher) -> List[Dict[str, Any]]:
+        symbol, section = key
+        rows = fetch(symbol, section)
+        self._store(key, rows)
+        return rows
+
+    def get_profile(
+        self,
+        symbol: str,
+        fetch: SectionFetcher,
+        sections: Optional[Sequence[str]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get several sections of one symbol, fetching the missing ones in parallel
+
+        Args:
+            symbol (str): Stock symbol
+            fetch (SectionFetcher): Vendor fetch used on a miss
+            sections (Optional[Sequence[str]]): Sections to get, defaults to all
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Section -> rows
+        """
+        sections = list(sections or self.sections)
+        futures = self._pool.submit_all(
+            {section: functools.partial(self.get, symbol, section, fetch) for section in sections}
+        )
+        return {section: future.result() for section, future in futures.items()}
+
+    def get_many(
+        self,
+        symbols: Sequence[str],
+        section: str,
+        fetch: SectionFetcher,
+        max_workers: int = 8
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get one section for many symbols, fetching the missing ones in parallel
+
+        Args:
+            symbols (Sequence[str]): Stock symbols
+            section (str): Profile section
+            fetch (SectionFetcher): Vendor fetch used on a miss
+            max_workers (int): Maximum concurrent vendor calls
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Symbol -> rows, in input order
+        """
+        unique = list(dict.fromkeys(symbols))
+        if not unique:
+            return {}
+        futures = self._pool.submit_all(
+            {symbol: functools.partial(self.get, symbol, section, fetch) for symbol in unique},
+            limit=max_workers
+        )
+        return {symbol: future.result() for symbol, future in futures.items()}
+
+    def invalidate(self, symbol: Optional[str] = None, section: Optional[str] = None) -> None:
+        """Drop cached sections (all of them when no symbol is given)"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == symbol.upper()]:
+                if section is None or key[1] == section:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale
+            }
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
 from .stock_data import StockDataService
 from .cache import CacheManager
-import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -23,18 +23,16 @@ class DataJobs:
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
         
+        total_fetched = 0
         for symbol in symbols:
             try:
-                logger.info(f"Updating price data for {symbol}")
-                data = self.stock_service.get_stock_price(symbol, start_date, end_date)
-                # Convert DataFrame to dict for caching
-                if isinstance(data, pd.DataFrame):
-                    data_dict = data.to_dict('records')
-                    self.cache_manager.set(f"price_{symbol}", data_dict)
-                else:
-                    self.cache_manager.set(f"price_{symbol}", data)
+                # Chỉ tải các phiên chưa có trong price store
+                fetched = self.stock_service.sync_price_history(symbol, start_date, end_date)
+                total_fetched += fetched
+                logger.info(f"Updated price data for {symbol}: {fetched} new bars")
             except Exception as e:
                 logger.error(f"Error updating price data for {symbol}: {str(e)}")
+        logger.info(f"Price update fetched {total_fetched} bars for {len(symbols)} symbols")
                 
     def update_stock_list(self) -> None:
         """
@@ -62,6 +60,62 @@ class DataJobs:
             except Exception as e:
                 logger.error(f"Error updating info for {symbol}: {str(e)}")
                 
+    def update_market_indicators(self, symbols: List[str], days: int = settings.MARKET_INDICATOR_HISTORY_DAYS) -> Optional[Any]:
+        """
+        Tính chỉ báo kỹ thuật cho toàn thị trường trong một lượt (ma trận mã x ngày)
+        
+        Args:
+            symbols: Danh sách mã cổ phiếu
+            days: Số ngày lịch sử dùng để tính
+            
+        Returns:
+            Snapshot chỉ báo vừa tính, None nếu lỗi
+        """
+        try:
+            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+            return self.stock_service.build_market_indicators(symbols, start_date=start_date)
+        except Exception as e:
+            logger.error(f"Error updating market indicators: {str(e)}")
+            return None
+            
+    def update_financial_ratios(self, symbols: List[str], period: str = 'quarter') -> None:
+        """
+        Nạp chỉ số tài chính của các mã (chỉ gọi nguồn dữ liệu khi có kỳ báo cáo mới)
+        
+        Args:
+            symbols: Danh sách mã cổ phiếu
+            period: Kỳ báo cáo ('year' hoặc 'quarter')
+        """
+        for symbol in symbols:
+            try:
+                self.stock_service.get_financial_ratio(symbol, period)
+            except Exception as e:
+                logger.error(f"Error updating financial ratios for {symbol}: {str(e)}")
+                
+    def update_market_snapshot(self, market: Optional[Any] = None) -> None:
+        """
+        Tạo và công bố snapshot thị trường (mỗi mã một dòng) cho bộ lọc và xếp hạng
+        
+        Args:
+            market: Snapshot chỉ báo toàn thị trường vừa tính (mặc định đọc từ store)
+        """
+        try:
+            self.stock_service.build_market_snapshot(market)
+        except Exception as e:
+            logger.error(f"Error building market snapshot: {str(e)}")
+            
+    def update_risk_model(self, market: Optional[Any] = None) -> None:
+        """
+        Cập nhật ma trận hiệp phương sai cho mô hình rủi ro (chỉ thêm các phiên mới)
+        
+        Args:
+            market: Snapshot chỉ báo toàn thị trường vừa tính (mặc định đọc từ store)
+        """
+        try:
+            self.stock_service.build_risk_model(market)
+        except Exception as e:
+            logger.error(f"Error updating risk model: {str(e)}")
+            
     def run_daily_jobs(self) -> None:
         """
         Chạy các job cập nhật dữ liệu hàng ngày
@@ -80,7 +134,13 @@ class DataJobs:
             symbols = [item.get('symbol') for item in stock_list if item.get('symbol')]
             
             # Cập nhật giá và thông tin cho tất cả cổ phiếu
-            self.update_stock_prices(symbols)
+            # (chỉ các phiên chưa có được tải, nên lịch sử dài chỉ tốn ở lần chạy đầu)
+            self.update_stock_prices(symbols, days=settings.MARKET_INDICATOR_HISTORY_DAYS)
+            self.update_stock_prices([settings.RISK_BENCHMARK], days=settings.MARKET_INDICATOR_HISTORY_DAYS)
+            market = self.update_market_indicators(symbols)
+            self.update_risk_model(market)
+            self.update_financial_ratios(symbols)
+            self.update_market_snapshot(market)
             self.update_stock_info(symbols)
             
         except Exception as e:
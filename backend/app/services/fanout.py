@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar('K', bound=Hashable)
+T = TypeVar('T')
+
+
+class FanOutPool:
+    """Bounded thread pool shared by every parallel fan-out of vendor calls
+
+    Batch prices, profile sections, financial reports and fundamental
+    sections submit their calls here instead of starting a thread pool per
+    request, so the number of vendor threads stays bounded however many
+    requests fan out at once. A batch can be capped below the pool size so
+    one large batch leaves workers for the others. Calls submitted from a
+    pool worker (a fan-out nested in a fan-out) run inline, so nesting
+    cannot fill the pool with waiters and deadlock it.
+
+    Batches whose results are dropped after a deadline share a named lane:
+    its slots are held until each call really finishes, so calls abandoned
+    by their request can never hold more than the lane's limit of workers.
+    cancel() withdraws the calls of such a batch that have not started.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "fan-out"):
+        """Initialize the pool
+
+        Args:
+            max_workers (int): Maximum number of threads
+            thread_name_prefix (str): Prefix of the worker thread names
+        """
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._inline = 0
+        self._active = 0
+        self._cancelled = 0
+        self._lanes: Dict[str, threading.BoundedSemaphore] = {}
+        self._lane_limits: Dict[str, int] = {}
+        self._lane_busy: Dict[str, int] = {}
+
+    def _run(self, call: Callable[[], T]) -> T:
+        self._local.worker = True
+        with self._lock:
+            self._active += 1
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    @staticmethod
+    def _run_inline(call: Callable[[], T]) -> "Future[T]":
+        future: "Future[T]" = Future()
+        try:
+            future.set_result(call())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _slots(self, limit: Optional[int], lane: Optional[str]) -> threading.BoundedSemaphore:
+        size = max(1, min(limit or self.max_workers, self.max_workers))
+        if lane is None:
+            return threading.BoundedSemaphore(size)
+        with self._lock:
+            slots = self._lanes.get(lane)
+            if slots is None:
+                slots = self._lanes[lane] = threading.BoundedSemaphore(size)
+                self._lane_limits[lane] = size
+                self._lane_busy[lane] = 0
+            return slots
+
+    def _release(self, slots: threading.BoundedSemaphore, lane: Optional[str]) -> None:
+        if lane is not None:
+            with self._lock:
+                self._lane_busy[lane] -= 1
+        slots.release()
+
+    def submit_all(
+        self,
+        calls: Mapping[K, Callable[[], T]],
+        limit: Optional[int] = None,
+        lane: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[K, "Future[T]"]:
+        """Start a batch of calls
+
+        Submission blocks while limit calls of the batch (or of its lane)
+        are running, so the batch never holds more than limit workers.
+
+        Args:
+            calls (Mapping[K, Callable[[], T]]): Key -> call without arguments
+            limit (Optional[int]): Maximum concurrent calls of this batch, defaults to the pool size;
+                with a lane, the limit the lane is created with
+            lane (Optional[str]): Share the slots of every batch of this lane instead of a per-batch cap
+            timeout (Optional[float]): Seconds to wait for slots; calls left without one are
+                returned as cancelled futures
+
+        Returns:
+            Dict[K, Future[T]]: Key -> future of the call, in the order of calls
+        """
+        if getattr(self._local, 'worker', False):
+            with self._lock:
+                self._inline += len(calls)
+            return {key: self._run_inline(call) for key, call in calls.items()}
+
+        slots = self._slots(limit, lane)
+        until = time.monotonic() + timeout if timeout is not None else None
+        futures: Dict[K, "Future[T]"] = {}
+        submitted = 0
+        for key, call in calls.items():
+            if not slots.acquire(timeout=max(0.0, until - time.monotonic()) if until is not None else None):
+                future: "Future[T]" = Future()
+                future.cancel()
+                futures[key] = future
+                continue
+            if lane is not None:
+                with self._lock:
+                    self._lane_busy[lane] += 1
+            future = self._pool.submit(self._run, call)
+            # Released when the call finishes or is cancelled, not when its caller gives up
+            future.add_done_callback(lambda _: self._release(slots, lane))
+            futures[key] = future
+            submitted += 1
+        with self._lock:
+            self._submitted += submitted
+            self._cancelled += len(calls) - submitted
+        return futures
+
+    def cancel(self, futures: Iterable["Future[Any]"]) -> int:
+        """Withdraw calls that have not started yet (running ones finish in the background)
+
+        Returns:
+            int: Number of calls withdrawn
+        """
+        cancelled = sum(1 for future in futures if not future.done() and future.cancel())
+        with self._lock:
+            self._cancelled += cancelled
+        return cancelled
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool"""
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool counters"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "submitted": self._submitted,
+                "inline": self._inline,
+                "cancelled": self._cancelled,
+                "lanes": {
+                    lane: {"limit": self._lane_limits[lane], "busy": self._lane_busy[lane]}
+                    for lane in self._lanes
+                }
+            }
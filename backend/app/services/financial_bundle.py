@@ -0,0 +1,446 @@
+import ast
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from .coalescing import SingleFlight, flights
+
+logger = logging.getLogger(__name__)
+
+# Reports loaded together for a (symbol, period, lang)
+REPORT_TYPES = ('balance_sheet', 'income_statement', 'cash_flow', 'financial_ratio')
+
+# Column names carrying the fiscal year and quarter across sources and languages
+YEAR_KEYS = ('yearReport', 'Năm', 'year')
+QUARTER_KEYS = ('lengthReport', 'Kỳ', 'quarter')
+
+# Screener ratio name -> ratio column names used by the vendors
+RATIO_METRICS = {
+    'pe': ('P/E',),
+    'pb': ('P/B',),
+    'ps': ('P/S',),
+    'roe': ('ROE (%)', 'ROE'),
+    'roa': ('ROA (%)', 'ROA'),
+    'eps': ('EPS (VND)', 'EPS'),
+    'bvps': ('BVPS (VND)', 'BVPS')
+}
+
+# fetch(symbol, period, lang) -> report type -> rows; report types left out failed
+BundleFetcher = Callable[[str, str, str], Dict[str, List[Dict[str, Any]]]]
+
+BundleKey = Tuple[str, str, str]
+Period = Tuple[int, int]
+
+_QUARTER_END = {1: (3, 31), 2: (6, 30), 3: (9, 30), 4: (12, 31)}
+
+
+def latest_period(reports: Dict[str, List[Dict[str, Any]]], period: str) -> Optional[Period]:
+    """Get the most recent fiscal period present in the statements
+
+    Args:
+        reports (Dict[str, List[Dict[str, Any]]]): Report type -> rows
+        period (str): 'year' or 'quarter'
+
+    Returns:
+        Optional[Period]: (year, quarter), quarter is 0 for annual reports
+    """
+    latest: Optional[Period] = None
+    for report_type in ('balance_sheet', 'income_statement', 'cash_flow'):
+        for row in reports.get(report_type, []):
+            year = next((row[key] for key in YEAR_KEYS if row.get(key) is not None), None)
+            quarter = next((row[key] for key in QUARTER_KEYS if row.get(key) is not None), 0)
+            try:
+                found = (int(year), int(quarter) if period == 'quarter' else 0)
+            except (TypeError, ValueError):
+                continue
+            if latest is None or found > latest:
+                latest = found
+    return latest
+
+
+def expected_latest_period(period: str, today: date, quarter_lag_days: int, year_lag_days: int) -> Period:
+    """Get the latest period whose report should be published by today
+
+    Args:
+        period (str): 'year' or 'quarter'
+        today (date): Reference date
+        quarter_lag_days (int): Days after quarter end by which quarterly reports are out
+        year_lag_days (int): Days after year end by which annual reports are out
+
+    Returns:
+        Period: (year, quarter), quarter is 0 for annual reports
+    """
+    if period != 'quarter':
+        year = today.year - 1
+        if date(year, 12, 31) + timedelta(days=year_lag_days) > today:
+            year -= 1
+        return (year, 0)
+    year, quarter = today.year, (today.month - 1) // 3
+    while True:
+        if quarter == 0:
+            year, quarter = year - 1, 4
+        month, day = _QUARTER_END[quarter]
+        if date(year, month, day) + timedelta(days=quarter_lag_days) <= today:
+            return (year, quarter)
+        quarter -= 1
+
+
+def _column_label(key: Any) -> str:
+    """Last level of a (possibly multi-level) column name, also once stored as text"""
+    if isinstance(key, str) and key.startswith('('):
+        try:
+            key = ast.literal_eval(key)
+        except (ValueError, SyntaxError):
+            return key
+    if isinstance(key, (tuple, list)) and key:
+        key = key[-1]
+    return str(key)
+
+
+def _row_period(row: Dict[str, Any]) -> Optional[Period]:
+    labels = {_column_label(key): value for key, value in row.items()}
+    year = next((labels[key] for key in YEAR_KEYS if labels.get(key) is not None), None)
+    quarter = next((labels[key] for key in QUARTER_KEYS if labels.get(key) is not None), 0)
+    try:
+        return int(year), int(quarter)
+    except (TypeError, ValueError):
+        return None
+
+
+def ratio_metrics(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Get the screener ratios (pe, pb, roe, ...) of the most recent period
+
+    Args:
+        rows (List[Dict[str, Any]]): Financial ratio rows, one per period
+
+    Returns:
+        Dict[str, float]: Ratio name -> value as reported by the vendor; missing ratios are left out
+    """
+    dated = [(period, row) for row, period in ((row, _row_period(row)) for row in rows) if period is not None]
+    if not dated:
+        return {}
+    latest = max(dated, key=lambda item: item[0])[1]
+    labels = {_column_label(key): value for key, value in latest.items()}
+    metrics: Dict[str, float] = {}
+    for name, candidates in RATIO_METRICS.items():
+        for candidate in candidates:
+            value = labels.get(candidate)
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if not math.isnan(value):
+                metrics[name] = value
+                break
+    return metrics
+
+
+def _jsonable(value: Any) -> Any:
+    """Make vendor rows storable in a JSON column (NaN -> None, others -> str)"""
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if hasattr(value, 'item'):
+        return _jsonable(value.item())
+    return str(value)
+
+
+class ReportUnavailableError(Exception):
+    """Raised when a report failed to load and no earlier copy is stored"""
+
+    def __init__(self, symbol: str, report_type: str):
+        super().__init__(f"{report_type} for {symbol} is temporarily unavailable")
+        self.symbol = symbol
+        self.report_type = report_type
+
+
+def default_session_factory() -> Any:
+    """Open a session on the application database"""
+    from app.core.database import SessionLocal
+    return SessionLocal()
+
+
+class FinancialStatementStore:
+    """Financial statements cached as one bundle per (symbol, period, lang)
+
+    A bundle holds the balance sheet, income statement, cash flow and
+    financial ratios, loaded together on a miss and persisted to the
+    financial_data table. Statements only change when a company publishes
+    a new period, so a bundle is served locally as long as it contains the
+    latest period that should be out by now (allowing for the reporting
+    lag). Once a newer period is due, the vendor is asked again at most
+    every recheck_seconds until it appears.
+
+    A report that fails while the others load does not fail the bundle:
+    its previous rows are kept and marked 'stale', or it is marked
+    'missing' when there are none, and it is retried after retry_seconds.
+    At most max_bundles bundles are kept in memory, least recently used
+    first out; evicted bundles are reloaded from the database.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        recheck_seconds: float = 86400,
+        quarter_lag_days: int = 30,
+        year_lag_days: int = 90,
+        single_flight: Optional[SingleFlight] = None,
+        retry_seconds: float = 300,
+        max_bundles: int = 4000
+    ):
+        """Initialize the store
+
+        Args:
+            session_factory (Optional[Callable[[], Any]]): Opens a database session, None keeps bundles in memory only
+            recheck_seconds (float): Minimum seconds between vendor checks for an overdue period
+            quarter_lag_days (int): Days after quarter end by which quarterly reports are expected
+            year_lag_days (int): Days after year end by which annual reports are expected
+            single_flight (Optional[SingleFlight]): Coalesces concurrent misses, defaults to the shared one
+            retry_seconds (float): Seconds before a bundle with failed reports is fetched again
+            max_bundles (int): Maximum number of bundles kept in memory
+        """
+        self.session_factory = session_factory
+        self.recheck_seconds = recheck_seconds
+        self.quarter_lag_days = quarter_lag_days
+        self.year_lag_days = year_lag_days
+        self._flights = single_flight or flights
+        self.retry_seconds = retry_seconds
+        self.max_bundles = max_bundles
+        self._bundles: "OrderedDict[BundleKey, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._fetches = 0
+        self._evictions = 0
+        self._version = 0
+
+    def _put_locked(self, key: BundleKey, bundle: Dict[str, Any]) -> None:
+        self._bundles[key] = bundle
+        self._bundles.move_to_end(key)
+        self._version += 1
+        while len(self._bundles) > self.max_bundles:
+            self._bundles.popitem(last=False)
+            self._evictions += 1
+
+    def _is_current(self, bundle: Dict[str, Any], period: str) -> bool:
+        if bundle.get('missing') or bundle.get('stale'):
+            return time.time() - bundle['checked_at'] < self.retry_seconds
+        expected = expected_latest_period(period, date.today(), self.quarter_lag_days, self.year_lag_days)
+        latest = bundle.get('latest_period')
+        if latest is not None and tuple(latest) >= expected:
+            return True
+        return time.time() - bundle['checked_at'] < self.recheck_seconds
+
+    def get(self, symbol: str, period: str, lang: str, fetch: BundleFetcher) -> Dict[str, Any]:
+        """Get the statement bundle, fetching it only when a new period may be out
+
+        Args:
+            symbol (str): Stock symbol
+            period (str): 'year' or 'quarter'
+            lang (str): 'vi' or 'en'
+            fetch (BundleFetcher): Loads every report type from the vendor
+
+        Returns:
+            Dict[str, Any]: {'reports': report type -> rows, 'latest_period', 'checked_at',
+                'stale': report types kept from the previous load, 'missing': report types not loaded}
+        """
+        key = (symbol.upper(), period, lang)
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is not None:
+                self._bundles.move_to_end(key)
+        if bundle is None:
+            bundle = self._load(key)
+            if bundle is not None:
+                with self._lock:
+                    if key in self._bundles:
+                        bundle = self._bundles[key]
+                    else:
+                        self._put_locked(key, bundle)
+        if bundle is not None and self._is_current(bundle, period):
+            with self._lock:
+                self._hits += 1
+            return bundle
+
+        try:
+            return self._flights.do(('financial_bundle', key), self._refresh, key, fetch)
+        except Exception as e:
+            if bundle is None:
+                raise
+            logger.warning(f"Serving stored financial statements for {symbol}: {str(e)}")
+            return bundle
+
+    def _refresh(self, key: BundleKey, fetch: BundleFetcher) -> Dict[str, Any]:
+        symbol, period, lang = key
+        fetched = fetch(symbol, period, lang)
+        with self._lock:
+            previous = self._bundles.get(key)
+        failed = [report_type for report_type in REPORT_TYPES if report_type not in fetched]
+        stale = [
+            report_type for report_type in failed
+            if previous is not None and report_type not in previous.get('missing', [])
+        ]
+        reports = {
+            report_type: fetched[report_type] if report_type in fetched
+            else previous['reports'][report_type] if report_type in stale else []
+            for report_type in REPORT_TYPES
+        }
+        latest = latest_period(reports, period)
+        bundle = {
+            'reports': reports,
+            'latest_period': list(latest) if latest is not None else None,
+            'checked_at': time.time(),
+            'stale': stale,
+            'missing': [report_type for report_type in failed if report_type not in stale]
+        }
+        if failed:
+            logger.warning(f"Financial statements for {symbol} loaded without {', '.join(failed)}")
+        with self._lock:
+            self._put_locked(key, bundle)
+            self._fetches += 1
+        self._persist(key, bundle)
+        return bundle
+
+    def _period_date(self, latest: Optional[List[int]]) -> datetime:
+        if not latest:
+            return datetime.utcnow()
+        year, quarter = latest
+        month, day = _QUARTER_END[quarter or 4]
+        return datetime(year, month, day)
+
+    def _persist(self, key: BundleKey, bundle: Dict[str, Any]) -> None:
+        if self.session_factory is None:
+            return
+        from app.models.models import FinancialData, Stock
+
+        symbol, period, lang = key
+        # Reports that failed to load keep their stored rows
+        failed = set(bundle.get('stale', [])) | set(bundle.get('missing', []))
+        try:
+            db = self.session_factory()
+            try:
+                stock = db.query(Stock).filter(Stock.symbol == symbol).first()
+                if stock is None:
+                    stock = Stock(id=str(uuid4()), symbol=symbol)
+                    db.add(stock)
+                    db.flush()
+                for report_type, rows in bundle['reports'].items():
+                    if report_type in failed:
+                        continue
+                    row = (
+                        db.query(FinancialData)
+                        .filter(
+                            FinancialData.stock_id == stock.id,
+                            FinancialData.data_type == report_type,
+                            FinancialData.period == period
+                        )
+                        .first()
+                    )
+                    if row is None:
+                        row = FinancialData(id=str(uuid4()), stock_id=stock.id, data_type=report_type, period=period)
+                        db.add(row)
+                    # One row per statement and period; languages are kept side by side
+                    data = dict(row.data or {})
+                    data[lang] = {
+                        'latest_period': bundle['latest_period'],
+                        'checked_at': bundle['checked_at'],
+                        'records': _jsonable(rows)
+                    }
+                    row.data = data
+                    row.date = self._period_date(bundle['latest_period'])
+                db.commit()
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error saving financial statements for {symbol}: {str(e)}")
+
+    def _load(self, key: BundleKey) -> Optional[Dict[str, Any]]:
+        if self.session_factory is None:
+            return None
+        from app.models.models import FinancialData, Stock
+
+        symbol, period, lang = key
+        try:
+            db = self.session_factory()
+            try:
+                rows = (
+                    db.query(FinancialData)
+                    .join(Stock, FinancialData.stock_id == Stock.id)
+                    .filter(Stock.symbol == symbol, FinancialData.period == period)
+                    .all()
+                )
+                stored = {row.data_type: (row.data or {}).get(lang) for row in rows}
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error loading financial statements for {symbol}: {str(e)}")
+            return None
+
+        present = [report_type for report_type in REPORT_TYPES if stored.get(report_type) is not None]
+        if not present:
+            return None
+        reports = {
+            report_type: stored[report_type]['records'] if report_type in present else []
+            for report_type in REPORT_TYPES
+        }
+        latest = latest_period(reports, period)
+        return {
+            'reports': reports,
+            'latest_period': list(latest) if latest is not None else None,
+            'checked_at': min(stored[report_type].get('checked_at', 0.0) for report_type in present),
+            'stale': [],
+            'missing': [report_type for report_type in REPORT_TYPES if report_type not in present]
+        }
+
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever a bundle is added, replaced or dropped"""
+        return self._version
+
+    def latest_ratios(self, period: str = 'quarter') -> Dict[str, Dict[str, float]]:
+        """Get the latest screener ratios of every symbol with a bundle in memory
+
+        Args:
+            period (str): Preferred period; bundles of the other period fill in the remaining symbols
+
+        Returns:
+            Dict[str, Dict[str, float]]: Symbol -> ratio name -> value
+        """
+        with self._lock:
+            bundles = sorted(self._bundles.items(), key=lambda item: item[0][1] == period)
+        ratios: Dict[str, Dict[str, float]] = {}
+        # Bundles of the preferred period come last, so they win
+        for (symbol, _, _), bundle in bundles:
+            metrics = ratio_metrics(bundle['reports'].get('financial_ratio', []))
+            if metrics:
+                ratios[symbol] = metrics
+        return ratios
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Drop bundles from memory (all of them when no symbol is given)"""
+        with self._lock:
+            self._version += 1
+            if symbol is None:
+                self._bundles.clear()
+                return
+            for key in [key for key in self._bundles if key[0] == symbol.upper()]:
+                del self._bundles[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store counters"""
+        with self._lock:
+            return {
+                "bundles": len(self._bundles),
+                "hits": self._hits,
+                "fetches": self._fetches,
+                "evictions": self._evictions
+            }
@@ -0,0 +1,118 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .indicators import IndicatorEngine, Series, parse_indicators
+
+logger = logging.getLogger(__name__)
+
+# load() -> (bar times, {'close': ..., 'high': ..., 'low': ..., 'volume': ...})
+InputLoader = Callable[[], Tuple[np.ndarray, Dict[str, np.ndarray]]]
+
+
+class _Entry:
+    """Full-history series of one symbol at one data version"""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.times: Optional[np.ndarray] = None
+        self.engine: Optional[IndicatorEngine] = None
+        self.series: Dict[str, Series] = {}
+        self.lock = threading.Lock()
+
+
+class IndicatorSeriesCache:
+    """Indicator series computed over a symbol's whole stored history
+
+    Entries are keyed by (symbol, data version, indicator spec). The
+    version comes from the price store and changes whenever bars are
+    written, so new or revised bars invalidate a symbol's entries on the
+    next read without any explicit call. Range requests slice the cached
+    full series instead of recomputing.
+
+    Each symbol keeps its IndicatorEngine, so intermediates (EMAs, true
+    range, ...) are also shared across requests asking for different
+    specs. The least recently used symbols are dropped beyond max_symbols.
+    """
+
+    def __init__(self, max_symbols: int = 256):
+        """Initialize the cache
+
+        Args:
+            max_symbols (int): Maximum number of symbols kept
+        """
+        self.max_symbols = max_symbols
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def _entry(self, symbol: str, version: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None or entry.version != version:
+                if entry is not None:
+                    self._invalidations += 1
+                entry = _Entry(version)
+                self._entries[symbol] = entry
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_symbols:
+                self._entries.popitem(last=False)
+            return entry
+
+    def get(
+        self,
+        symbol: str,
+        version: str,
+        indicators: Sequence[str],
+        load: InputLoader
+    ) -> Tuple[np.ndarray, Dict[str, Series]]:
+        """Get full-history series, computing only the specs not cached yet
+
+        Args:
+            symbol (str): Stock symbol
+            version (str): Version of the symbol's stored bars
+            indicators (Sequence[str]): Indicator specs
+            load (InputLoader): Reads the stored bars on a miss
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, Series]]: Bar times and spec label -> series
+        """
+        specs = parse_indicators(indicators)
+        entry = self._entry(symbol.upper(), version)
+        with entry.lock:
+            if entry.engine is None:
+                times, prices = load()
+                entry.times = times
+                entry.engine = IndicatorEngine(**prices)
+            missing: List[str] = [spec.label for spec in specs if spec.label not in entry.series]
+            if missing:
+                entry.series.update(entry.engine.compute(missing))
+            with self._lock:
+                if missing:
+                    self._misses += 1
+                else:
+                    self._hits += 1
+            return entry.times, {spec.label: entry.series[spec.label] for spec in specs}
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Drop cached series (all of them when no symbol is given)"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol.upper(), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            return {
+                "symbols": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations
+            }
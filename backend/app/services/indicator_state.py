@@ -0,0 +1,493 @@
+import json
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .indicators import BB_STD, BB_WINDOW, MA_WINDOWS, MACD_FAST, MACD_SIGNAL, MACD_SLOW, RSI_WINDOW
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+# Running sums are recomputed from the window this often to stop float drift
+RESYNC_EVERY = 512
+
+# bootstrap(symbol, time) -> bars up to time with 'time' and 'close' columns
+HistoryLoader = Callable[[str, pd.Timestamp], Optional[pd.DataFrame]]
+
+
+class RollingWindow:
+    """Fixed-size window of the latest values with running sums
+
+    Sums are kept relative to the first observed value, so the sum of
+    squares keeps its precision for large prices.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: Deque[float] = deque(maxlen=size)
+        self.shift: Optional[float] = None
+        self._sum = 0.0
+        self._squares = 0.0
+        self._missing = 0
+        self._updates = 0
+
+    def _add(self, value: float, sign: int) -> None:
+        if math.isnan(value):
+            self._missing += sign
+            return
+        if self.shift is None:
+            self.shift = value
+        centred = value - self.shift
+        self._sum += sign * centred
+        self._squares += sign * centred * centred
+
+    def _resync(self) -> None:
+        self._sum = 0.0
+        self._squares = 0.0
+        self._missing = 0
+        for value in self.values:
+            self._add(value, 1)
+
+    def push(self, value: float) -> None:
+        """Append a new value, evicting the oldest one when full"""
+        if len(self.values) == self.size:
+            self._add(self.values[0], -1)
+        self.values.append(value)
+        self._add(value, 1)
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._resync()
+
+    def replace_last(self, value: float) -> None:
+        """Replace the most recent value"""
+        self._add(self.values[-1], -1)
+        self.values[-1] = value
+        self._add(value, 1)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size and self._missing == 0
+
+    def mean(self) -> float:
+        if not self.full:
+            return NAN
+        return self._sum / self.size + self.shift
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1)"""
+        if not self.full or self.size < 2:
+            return NAN
+        variance = (self._squares - self._sum * self._sum / self.size) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "values": list(self.values), "shift": self.shift}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingWindow":
+        window = cls(data["size"])
+        window.values.extend(data["values"])
+        window.shift = data["shift"]
+        window._resync()
+        return window
+
+
+class EMAState:
+    """Exponential moving average carry (pandas ewm, adjust=False)
+
+    NaN inputs keep the previous value and decay its weight, exactly as
+    pandas does with ignore_na=False.
+    """
+
+    def __init__(self, span: Optional[int] = None, alpha: Optional[float] = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.weighted = NAN
+        self.old_weight = 1.0
+        self._checkpoint: Tuple[float, float] = (NAN, 1.0)
+
+    def _apply(self, value: float) -> float:
+        if not math.isnan(self.weighted):
+            self.old_weight *= 1.0 - self.alpha
+            if not math.isnan(value):
+                if self.weighted != value:
+                    self.weighted = (
+                        (self.old_weight * self.weighted + self.alpha * value) / (self.old_weight + self.alpha)
+                    )
+                self.old_weight = 1.0
+        elif not math.isnan(value):
+            self.weighted = value
+        return self.weighted
+
+    def update(self, value: float) -> float:
+        """Feed a new bar"""
+        self._checkpoint = (self.weighted, self.old_weight)
+        return self._apply(value)
+
+    def revise(self, value: float) -> float:
+        """Replace the last bar fed"""
+        self.weighted, self.old_weight = self._checkpoint
+        return self._apply(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "weighted": self.weighted, "old_weight": self.old_weight,
+                "checkpoint": list(self._checkpoint)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EMAState":
+        state = cls(alpha=data["alpha"])
+        state.weighted = data["weighted"]
+        state.old_weight = data["old_weight"]
+        state._checkpoint = tuple(data["checkpoint"])
+        return state
+
+
+class MACDState:
+    """MACD line (fast EMA - slow EMA) and its signal EMA"""
+
+    def __init__(self, fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+        self.line = NAN
+
+    def update(self, close: float, revise: bool = False) -> None:
+        step = 'revise' if revise else 'update'
+        self.line = getattr(self.fast, step)(close) - getattr(self.slow, step)(close)
+        getattr(self.signal, step)(self.line)
+
+    def values(self) -> Dict[str, float]:
+        return {"MACD": self.line, "Signal": self.signal.weighted}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"fast": self.fast.to_dict(), "slow": self.slow.to_dict(),
+                "signal": self.signal.to_dict(), "line": self.line}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MACDState":
+        state = cls()
+        state.fast = EMAState.from_dict(data["fast"])
+        state.slow = EMAState.from_dict(data["slow"])
+        state.signal = EMAState.from_dict(data["signal"])
+        state.line = data["line"]
+        return state
+
+
+class RSIState:
+    """RSI from simple averages (as the endpoint) or Wilder smoothing
+
+    Mirrors IndicatorEngine.rsi: the first bar and changes next to a
+    missing close count as no change.
+    """
+
+    def __init__(self, window: int = RSI_WINDOW, wilder: bool = False):
+        self.window = window
+        self.wilder = wilder
+        self.prev_close = NAN
+        self.bars = 0
+        self.avg_gain = NAN
+        self.avg_loss = NAN
+        self._seed_gain = 0.0
+        self._seed_loss = 0.0
+        self._gains = RollingWindow(window)
+        self._losses = RollingWindow(window)
+        self._checkpoint: Tuple[float, ...] = ()
+
+    def _change(self, close: float) -> float:
+        if self.bars == 0:
+            return 0.0
+        change = close - self.prev_close
+        return 0.0 if math.isnan(change) else change
+
+    def update(self, close: float, revise: bool = False) -> None:
+        if revise:
+            (self.prev_close, self.bars, self.avg_gain, self.avg_loss,
+             self._seed_gain, self._seed_loss) = self._checkpoint
+        else:
+            self._checkpoint = (self.prev_close, self.bars, self.avg_gain, self.avg_loss,
+                                self._seed_gain, self._seed_loss)
+        change = self._change(close)
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+
+        if not self.wilder:
+            if revise:
+                self._gains.replace_last(gain)
+                self._losses.replace_last(loss)
+            else:
+                self._gains.push(gain)
+                self._losses.push(loss)
+            self.avg_gain, self.avg_loss = self._gains.mean(), self._losses.mean()
+        elif 1 <= self.bars < self.window:
+            self._seed_gain += gain
+            self._seed_loss += loss
+        elif self.bars == self.window:
+            self.avg_gain = (self._seed_gain + gain) / self.window
+            self.avg_loss = (self._seed_loss + loss) / self.window
+        elif self.bars > self.window:
+            self.avg_gain = (self.avg_gain * (self.window - 1) + gain) / self.window
+            self.avg_loss = (self.avg_loss * (self.window - 1) + loss) / self.window
+
+        self.prev_close = close
+        self.bars += 1
+
+    def value(self) -> float:
+        if math.isnan(self.avg_gain) or math.isnan(self.avg_loss):
+            return NAN
+        if self.avg_loss == 0:
+            return NAN if self.avg_gain == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window": self.window, "wilder": self.wilder, "prev_close": self.prev_close, "bars": self.bars,
+            "avg_gain": self.avg_gain, "avg_loss": self.avg_loss,
+            "seed_gain": self._seed_gain, "seed_loss": self._seed_loss,
+            "gains": self._gains.to_dict(), "losses": self._losses.to_dict(),
+            "checkpoint": list(self._checkpoint)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RSIState":
+        state = cls(data["window"], data["wilder"])
+        state.prev_close = data["prev_close"]
+        state.bars = data["bars"]
+        state.avg_gain = data["avg_gain"]
+        state.avg_loss = data["avg_loss"]
+        state._seed_gain = data["seed_gain"]
+        state._seed_loss = data["seed_loss"]
+        state._gains = RollingWindow.from_dict(data["gains"])
+        state._losses = RollingWindow.from_dict(data["losses"])
+        state._checkpoint = tuple(data["checkpoint"])
+        return state
+
+
+class SymbolIndicatorState:
+    """Streaming MA, RSI, MACD and BB state of one symbol
+
+    Each new bar, or a revision of the last bar, updates every indicator
+    in O(1). Windows of the same length are shared, so MA20 and the
+    Bollinger middle band come from one window. Values match
+    IndicatorEngine run on the same history within float tolerance.
+    """
+
+    def __init__(self):
+        self.windows = {window: RollingWindow(window) for window in sorted(set(MA_WINDOWS) | {BB_WINDOW})}
+        self.rsi = RSIState(RSI_WINDOW)
+        self.rsi_wilder = RSIState(RSI_WINDOW, wilder=True)
+        self.macd = MACDState()
+        self.last_time: Optional[int] = None
+        self.bars = 0
+
+    def update(self, time: Any, close: float) -> bool:
+        """Apply a bar: a new time appends, the last time revises
+
+        Args:
+            time (Any): Bar time (anything pd.Timestamp accepts)
+            close (float): Close price
+
+        Returns:
+            bool: True if the bar was new, False if it revised the last one
+        """
+        stamp = pd.Timestamp(time).value
+        if self.last_time is not None and stamp < self.last_time:
+            raise ValueError(f"Bar at {pd.Timestamp(time)} is older than the last bar")
+        revise = self.last_time == stamp
+        close = float(close) if close is not None else NAN
+        for window in self.windows.values():
+            if revise:
+                window.replace_last(close)
+            else:
+                window.push(close)
+        self.rsi.update(close, revise)
+        self.rsi_wilder.update(close, revise)
+        self.macd.update(close, revise)
+        if not revise:
+            self.bars += 1
+        self.last_time = stamp
+        return not revise
+
+    def values(self) -> Dict[str, Any]:
+        """Current indicator values, same names as the technical analysis endpoint"""
+        middle = self.windows[BB_WINDOW].mean()
+        width = self.windows[BB_WINDOW].std() * BB_STD
+        return {
+            "time": pd.Timestamp(self.last_time).isoformat() if self.last_time is not None else None,
+            "MA": {f"MA{window}": self.windows[window].mean() for window in MA_WINDOWS},
+            "RSI": self.rsi.value(),
+            "RSI_Wilder": self.rsi_wilder.value(),
+            "MACD": self.macd.values(),
+            "BB": {"Upper": middle + width, "Middle": middle, "Lower": middle - width}
+        }
+
+    @classmethod
+    def from_history(cls, times: Sequence[Any], closes: Sequence[float]) -> "SymbolIndicatorState":
+        """Build the state by replaying a price history"""
+        state = cls()
+        for time, close in zip(times, closes):
+            state.update(time, close)
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "windows": {str(size): window.to_dict() for size, window in self.windows.items()},
+            "rsi": self.rsi.to_dict(),
+            "rsi_wilder": self.rsi_wilder.to_dict(),
+            "macd": self.macd.to_dict(),
+            "last_time": self.last_time,
+            "bars": self.bars
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SymbolIndicatorState":
+        state = cls()
+        state.windows = {int(size): RollingWindow.from_dict(window) for size, window in data["windows"].items()}
+        state.rsi = RSIState.from_dict(data["rsi"])
+        state.rsi_wilder = RSIState.from_dict(data["rsi_wilder"])
+        state.macd = MACDState.from_dict(data["macd"])
+        state.last_time = data["last_time"]
+        state.bars = data["bars"]
+        return state
+
+
+def _finite(value: Any) -> Any:
+    """Replace NaN with None in indicator values"""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class IndicatorStateStore:
+    """Per-symbol streaming indicator state, persisted as one JSON file per symbol
+
+    The state is written when a new bar is appended; revisions of the last
+    bar only touch memory, since the next revision or bar supersedes them.
+    A symbol without state is bootstrapped once from its price history.
+    At most max_symbols states are kept in memory, least recently used
+    first out; an evicted symbol is read back from its file.
+    """
+
+    def __init__(self, state_dir: str = "data/indicator_state", max_symbols: int = 2000):
+        """Initialize the store
+
+        Args:
+            state_dir (str): Directory holding one state file per symbol
+            max_symbols (int): Maximum number of symbol states kept in memory
+        """
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.max_symbols = max_symbols
+        self._states: "OrderedDict[str, SymbolIndicatorState]" = OrderedDict()
+        self._states_lock = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._evictions = 0
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _file(self, symbol: str) -> Path:
+        return self.state_dir / f"{symbol}.json"
+
+    def _remember(self, symbol: str, state: SymbolIndicatorState) -> None:
+        with self._states_lock:
+            self._states[symbol] = state
+            self._states.move_to_end(symbol)
+            while len(self._states) > self.max_symbols:
+                self._states.popitem(last=False)
+                self._evictions += 1
+
+    def _load_locked(self, symbol: str) -> Optional[SymbolIndicatorState]:
+        with self._states_lock:
+            state = self._states.get(symbol)
+            if state is not None:
+                self._states.move_to_end(symbol)
+                return state
+        path = self._file(symbol)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = SymbolIndicatorState.from_dict(json.load(f))
+        except Exception as e:
+            logger.error(f"Error reading indicator state for {symbol}: {str(e)}")
+            return None
+        self._remember(symbol, state)
+        return state
+
+    def _save_locked(self, symbol: str, state: SymbolIndicatorState) -> None:
+        path = self._file(symbol)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the current indicator values of a symbol (None without state)"""
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            state = self._load_locked(symbol)
+            return _finite(state.values()) if state is not None else None
+
+    def update(
+        self,
+        symbol: str,
+        time: Any,
+        close: float,
+        bootstrap: Optional[HistoryLoader] = None
+    ) -> Dict[str, Any]:
+        """Apply a new or revised bar and get the updated indicator values
+
+        Args:
+            symbol (str): Stock symbol
+            time (Any): Bar time
+            close (float): Close price
+            bootstrap (Optional[HistoryLoader]): Loads history when the symbol has no state yet
+
+        Returns:
+            Dict[str, Any]: Indicator values (NaN as None)
+        """
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            state = self._load_locked(symbol)
+            if state is None:
+                history = bootstrap(symbol, pd.Timestamp(time)) if bootstrap is not None else None
+                if history is not None and not history.empty:
+                    state = SymbolIndicatorState.from_history(history['time'], history['close'])
+                else:
+                    state = SymbolIndicatorState()
+                self._remember(symbol, state)
+                self._save_locked(symbol, state)
+            if state.update(time, close):
+                self._save_locked(symbol, state)
+            return _finite(state.values())
+
+    def last_time(self, symbol: str) -> Optional[pd.Timestamp]:
+        """Get the time of the last bar applied to a symbol (None without state)"""
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            state = self._load_locked(symbol)
+            return pd.Timestamp(state.last_time) if state is not None and state.last_time is not None else None
+
+    def reset(self, symbol: str) -> None:
+        """Drop the state of a symbol, e.g. after a corporate action adjusts its history"""
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            with self._states_lock:
+                self._states.pop(symbol, None)
+            path = self._file(symbol)
+            if path.exists():
+                path.unlink()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store counters"""
+        with self._states_lock:
+            return {"symbols": len(self._states), "evictions": self._evictions}
@@ -0,0 +1,559 @@
+import logging
+import re
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MA_WINDOWS = (5, 10, 20, 50, 200)
+RSI_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BB_WINDOW = 20
+BB_STD = 2.0
+
+# EMAs never fully forget their seed; after this many spans the seed
+# weighs less than 1e-4 of the value
+EMA_WARMUP_SPANS = 4
+
+# Average trading days per calendar day (weekends and exchange holidays)
+TRADING_DAYS_PER_YEAR = 245
+
+Series = Union[np.ndarray, Dict[str, np.ndarray]]
+
+
+class IndicatorEngine:
+    """Technical indicators over contiguous float64 close arrays
+
+    Works on one series or on a (symbols x bars) matrix; every operation
+    runs along the last axis, so a whole market is one vectorized pass.
+
+    Every moving window is answered from the same prefix sums (values,
+    squared values and NaN counts), so all SMAs and rolling deviations cost
+    one pass over the data plus O(1) per bar. Intermediate series (SMAs,
+    rolling std, EMAs, price deltas) are memoized on the engine, so
+    indicators that need the same input compute it once, e.g. the 20-bar
+    SMA shared by MA20 and the Bollinger middle band.
+
+    Results follow pandas' rolling semantics: a window containing a NaN,
+    or shorter than the window length, yields NaN.
+
+    Indicators are looked up in the INDICATORS registry; high, low and
+    volume are only needed by the indicators that declare them as inputs.
+    """
+
+    def __init__(
+        self,
+        close: Union[np.ndarray, Sequence[float]],
+        high: Any = None,
+        low: Any = None,
+        volume: Any = None
+    ):
+        """Initialize the engine
+
+        Args:
+            close (Union[np.ndarray, Sequence[float]]): Close prices in time order (1-D, or 2-D with time last)
+            high (Any): High prices, same shape as close
+            low (Any): Low prices, same shape as close
+            volume (Any): Traded volume, same shape as close
+        """
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.size = self.close.shape[-1]
+        self.inputs: Dict[str, np.ndarray] = {"close": self.close}
+        for name, values in (("high", high), ("low", low), ("volume", volume)):
+            if values is not None:
+                self.inputs[name] = np.ascontiguousarray(values, dtype=np.float64)
+        self._memo: Dict[Hashable, Any] = {}
+
+    def _cached(self, key: Hashable, compute: Any) -> Any:
+        value = self._memo.get(key)
+        if value is None:
+            value = compute()
+            self._memo[key] = value
+        return value
+
+    def _prefix_sums(self):
+        def compute():
+            missing = np.isnan(self.close)
+            # Centre the prices so the squared sums keep their precision
+            with np.errstate(invalid='ignore', divide='ignore'):
+                counts = np.sum(~missing, axis=-1, keepdims=True)
+                shift = np.where(missing, 0.0, self.close).sum(axis=-1, keepdims=True) / np.maximum(counts, 1)
+            centred = np.where(missing, 0.0, self.close - shift)
+            zero = np.zeros(self.close.shape[:-1] + (1,))
+            return (
+                np.concatenate((zero, np.cumsum(centred, axis=-1)), axis=-1),
+                np.concatenate((zero, np.cumsum(centred * centred, axis=-1)), axis=-1),
+                np.concatenate((zero.astype(np.int64), np.cumsum(missing, axis=-1)), axis=-1),
+                shift
+            )
+        return self._cached('prefix_sums', compute)
+
+    def _window_sums(self, window: int):
+        sums, squares, missing, shift = self._prefix_sums()
+        window_sum = sums[..., window:] - sums[..., :-window]
+        window_squares = squares[..., window:] - squares[..., :-window]
+        complete = (missing[..., window:] - missing[..., :-window]) == 0
+        return window_sum, window_squares, complete, shift
+
+    def sma(self, window: int) -> np.ndarray:
+        """Simple moving average"""
+        def compute():
+            out = np.full(self.close.shape, np.nan)
+            if window <= self.size:
+                window_sum, _, complete, shift = self._window_sums(window)
+                out[..., window - 1:] = np.where(complete, window_sum / window + shift, np.nan)
+            return out
+        return self._cached(('sma', window), compute)
+
+    def rolling_std(self, window: int) -> np.ndarray:
+        """Rolling sample standard deviation (ddof=1)"""
+        def compute():
+            out = np.full(self.close.shape, np.nan)
+            if 1 < window <= self.size:
+                window_sum, window_squares, complete, _ = self._window_sums(window)
+                variance = (window_squares - window_sum * window_sum / window) / (window - 1)
+                out[..., window - 1:] = np.where(complete, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+            return out
+        return self._cached(('std', window), compute)
+
+    def ema(self, span: int, values: Any = None, key: Hashable = 'close') -> np.ndarray:
+        """Exponential moving average (adjust=False), seeded with the first value
+
+        Args:
+            span (int): EMA span
+            values (Any): Series to smooth, defaults to the close prices
+            key (Hashable): Memo key of values, so EMAs of other series are cached too
+        """
+        def compute():
+            return _ewm(self.close if values is None else values, span=span)
+        return self._cached(('ema', key, span), compute)
+
+    def derived(self, key: Hashable, compute: Callable[[], np.ndarray]) -> "IndicatorEngine":
+        """Engine over an intermediate series, built once, so its windows are memoized too"""
+        return self._cached(('engine', key), lambda: IndicatorEngine(compute()))
+
+    def input(self, name: str) -> np.ndarray:
+        """Get a price input ('close', 'high', 'low' or 'volume')"""
+        values = self.inputs.get(name)
+        if values is None:
+            raise ValueError(f"Indicator needs {name} prices")
+        return values
+
+    def delta(self) -> np.ndarray:
+        """Bar-to-bar change of the close, 0 where undefined"""
+        def compute():
+            out = np.zeros(self.close.shape)
+            if self.size > 1:
+                out[..., 1:] = np.diff(self.close, axis=-1)
+            return np.nan_to_num(out, nan=0.0)
+        return self._cached('delta', compute)
+
+    def rsi(self, window: int = RSI_WINDOW, wilder: bool = False) -> np.ndarray:
+        """Relative strength index
+
+        Args:
+            window (int): Look-back length
+            wilder (bool): Wilder smoothing instead of simple averages of gains and losses
+        """
+        def compute():
+            gain = self.derived('gain', lambda: np.maximum(self.delta(), 0.0))
+            loss = self.derived('loss', lambda: np.maximum(-self.delta(), 0.0))
+            if wilder:
+                avg_gain = _wilder_average(gain.close, window)
+                avg_loss = _wilder_average(loss.close, window)
+            else:
+                avg_gain = gain.sma(window)
+                avg_loss = loss.sma(window)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return self._cached(('rsi', window, wilder), compute)
+
+    def macd(self, fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL) -> Dict[str, np.ndarray]:
+        """MACD line and its signal line"""
+        def compute():
+            line = self.ema(fast) - self.ema(slow)
+            return {"MACD": line, "Signal": self.ema(signal, line, key=('macd', fast, slow))}
+        return self._cached(('macd', fast, slow, signal), compute)
+
+    def bollinger(self, window: int = BB_WINDOW, num_std: float = BB_STD) -> Dict[str, np.ndarray]:
+        """Bollinger bands around the SMA"""
+        def compute():
+            middle = self.sma(window)
+            width = self.rolling_std(window) * num_std
+            return {"Upper": middle + width, "Middle": middle, "Lower": middle - width}
+        return self._cached(('bb', window, num_std), compute)
+
+    def returns(self) -> np.ndarray:
+        """Simple bar-to-bar returns of the close, NaN on the first bar"""
+        def compute():
+            out = np.full(self.close.shape, np.nan)
+            if self.size > 1:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    out[..., 1:] = self.close[..., 1:] / self.close[..., :-1] - 1.0
+            return out
+        return self._cached('returns', compute)
+
+    def true_range(self) -> np.ndarray:
+        """Largest of high - low and the gaps from the previous close"""
+        def compute():
+            high, low = self.input('high'), self.input('low')
+            out = high - low
+            if self.size > 1:
+                previous = self.close[..., :-1]
+                out[..., 1:] = np.fmax(
+                    out[..., 1:],
+                    np.fmax(np.abs(high[..., 1:] - previous), np.abs(low[..., 1:] - previous))
+                )
+            return out
+        return self._cached('true_range', compute)
+
+    def rolling_extreme(self, name: str, window: int, highest: bool) -> np.ndarray:
+        """Rolling max (highest) or min of a price input, NaN if the window has a NaN"""
+        def compute():
+            values = self.input(name)
+            out = np.full(values.shape, np.nan)
+            if window <= self.size:
+                windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+                out[..., window - 1:] = windows.max(axis=-1) if highest else windows.min(axis=-1)
+            return out
+        return self._cached(('extreme', name, window, highest), compute)
+
+    def compute(self, indicators: Sequence[str]) -> Dict[str, Series]:
+        """Compute the requested indicators
+
+        Intermediate series (EMAs, deltas, true range, rolling extremes)
+        are memoized on the engine, so each is computed once however many
+        of the requested indicators depend on it.
+
+        Args:
+            indicators (Sequence[str]): Indicator specs, e.g. "MA", "RSI", "EMA(34)", "Stoch(14,3)"
+
+        Returns:
+            Dict[str, Series]: Spec label -> array, or sub-series name -> array
+        """
+        result: Dict[str, Series] = {}
+        for spec in parse_indicators(indicators):
+            definition = INDICATORS[spec.name]
+            result[spec.label] = definition.compute(self, *spec.params)
+        return result
+
+
+class IndicatorDefinition(NamedTuple):
+    """A registered indicator
+
+    compute(engine, *params) returns an array or {sub-series name: array};
+    lookback(*params) is the number of warm-up bars it needs.
+    """
+    name: str
+    defaults: Tuple[float, ...]
+    inputs: Tuple[str, ...]
+    compute: Callable[..., Series]
+    lookback: Callable[..., int]
+
+
+class IndicatorSpec(NamedTuple):
+    """A parsed indicator request such as EMA(34)"""
+    name: str
+    params: Tuple[float, ...]
+    label: str
+
+
+# Registered indicators by upper-cased name
+INDICATORS: Dict[str, IndicatorDefinition] = {}
+
+_SPEC_PATTERN = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\(([^()]*)\))?\s*$')
+
+
+def register_indicator(
+    name: str,
+    defaults: Tuple[float, ...] = (),
+    inputs: Tuple[str, ...] = ('close',),
+    lookback: Optional[Callable[..., int]] = None
+) -> Callable[[Callable[..., Series]], Callable[..., Series]]:
+    """Decorator registering compute(engine, *params) as an indicator
+
+    Args:
+        name (str): Name used in specs (matched case-insensitively)
+        defaults (Tuple[float, ...]): Parameter defaults; a spec may override a prefix of them
+        inputs (Tuple[str, ...]): Price inputs the indicator reads
+        lookback (Optional[Callable[..., int]]): Warm-up bars for the given parameters, 0 if omitted
+    """
+    def register(compute: Callable[..., Series]) -> Callable[..., Series]:
+        INDICATORS[name.upper()] = IndicatorDefinition(
+            name, tuple(defaults), tuple(inputs), compute, lookback or (lambda *params: 0)
+        )
+        return compute
+    return register
+
+
+def _parse_param(text: str, spec: str) -> float:
+    try:
+        value = float(text)
+    except ValueError:
+        raise ValueError(f"Invalid parameter '{text}' in indicator {spec}")
+    if not value > 0:
+        raise ValueError(f"Parameters must be positive in indicator {spec}")
+    return int(value) if value.is_integer() else value
+
+
+def parse_indicator(spec: str) -> IndicatorSpec:
+    """Parse an indicator spec such as "EMA(34)", "Stoch(14,3)" or "OBV"
+
+    Args:
+        spec (str): Indicator name, optionally followed by parameters in parentheses
+
+    Returns:
+        IndicatorSpec: Registered name, full parameters (defaults filled in) and output label.
+            A bare name keeps its own label ("RSI"); otherwise the label is the
+            canonical "NAME(p1,p2)".
+
+    Raises:
+        ValueError: Unknown indicator or invalid parameters
+    """
+    match = _SPEC_PATTERN.match(spec)
+    if match is None:
+        raise ValueError(f"Invalid indicator spec: {spec}")
+    key, args = match.group(1).upper(), match.group(2)
+    definition = INDICATORS.get(key)
+    if definition is None:
+        raise ValueError(f"Unknown indicator: {match.group(1)}")
+    given = [_parse_param(arg.strip(), spec) for arg in args.split(',')] if args and args.strip() else []
+    if len(given) > len(definition.defaults):
+        raise ValueError(f"{definition.name} takes at most {len(definition.defaults)} parameters")
+    params = tuple(given) + definition.defaults[len(given):]
+    label = definition.name if not given else f"{definition.name}({','.join(str(p) for p in given)})"
+    return IndicatorSpec(key, params, label)
+
+
+def parse_indicators(specs: Sequence[str]) -> List[IndicatorSpec]:
+    """Parse several specs, dropping duplicates (same label)"""
+    parsed = {}
+    for spec in specs:
+        indicator = parse_indicator(spec)
+        parsed.setdefault(indicator.label, indicator)
+    return list(parsed.values())
+
+
+def lookback_bars(indicators: Sequence[str]) -> int:
+    """Number of bars before the first output bar needed for valid values
+
+    Args:
+        indicators (Sequence[str]): Indicator specs
+
+    Returns:
+        int: Warm-up bars required by the most demanding indicator
+    """
+    needs = [0]
+    for spec in parse_indicators(indicators):
+        needs.append(int(INDICATORS[spec.name].lookback(*spec.params)))
+    return max(needs)
+
+
+def _window(value: float) -> int:
+    return max(1, int(round(value)))
+
+
+@register_indicator("MA", lookback=lambda: max(MA_WINDOWS) - 1)
+def _moving_averages(engine: IndicatorEngine) -> Series:
+    return {f"MA{window}": engine.sma(window) for window in MA_WINDOWS}
+
+
+@register_indicator("SMA", defaults=(20,), lookback=lambda window: _window(window) - 1)
+def _sma(engine: IndicatorEngine, window: float) -> Series:
+    return engine.sma(_window(window))
+
+
+@register_indicator("EMA", defaults=(20,), lookback=lambda span: EMA_WARMUP_SPANS * _window(span))
+def _ema(engine: IndicatorEngine, span: float) -> Series:
+    return engine.ema(_window(span))
+
+
+@register_indicator("RSI", defaults=(RSI_WINDOW,), lookback=lambda window: _window(window))
+def _rsi(engine: IndicatorEngine, window: float) -> Series:
+    return engine.rsi(_window(window))
+
+
+@register_indicator(
+    "MACD",
+    defaults=(MACD_FAST, MACD_SLOW, MACD_SIGNAL),
+    lookback=lambda fast, slow, signal: EMA_WARMUP_SPANS * _window(max(fast, slow)) + _window(signal)
+)
+def _macd(engine: IndicatorEngine, fast: float, slow: float, signal: float) -> Series:
+    return engine.macd(_window(fast), _window(slow), _window(signal))
+
+
+@register_indicator("BB", defaults=(BB_WINDOW, BB_STD), lookback=lambda window, num_std: _window(window) - 1)
+def _bollinger(engine: IndicatorEngine, window: float, num_std: float) -> Series:
+    return engine.bollinger(_window(window), float(num_std))
+
+
+@register_indicator(
+    "ATR",
+    defaults=(14,),
+    inputs=('high', 'low', 'close'),
+    # Wilder smoothing is an EMA with span 2 * window - 1
+    lookback=lambda window: EMA_WARMUP_SPANS * (2 * _window(window) - 1)
+)
+def _atr(engine: IndicatorEngine, window: float) -> Series:
+    return _wilder_smooth(engine.true_range(), _window(window))
+
+
+@register_indicator(
+    "Stoch",
+    defaults=(14, 3),
+    inputs=('high', 'low', 'close'),
+    lookback=lambda k_window, d_window: _window(k_window) + _window(d_window) - 2
+)
+def _stochastic(engine: IndicatorEngine, k_window: float, d_window: float) -> Series:
+    k_window, d_window = _window(k_window), _window(d_window)
+
+    def percent_k():
+        highest = engine.rolling_extreme('high', k_window, True)
+        lowest = engine.rolling_extreme('low', k_window, False)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100.0 * (engine.close - lowest) / (highest - lowest)
+
+    k = engine.derived(('stoch_k', k_window), percent_k)
+    return {"K": k.close, "D": k.sma(d_window)}
+
+
+@register_indicator("OBV", inputs=('close', 'volume'))
+def _obv(engine: IndicatorEngine) -> Series:
+    signed = np.sign(engine.delta()) * np.nan_to_num(engine.input('volume'), nan=0.0)
+    return np.cumsum(signed, axis=-1)
+
+
+@register_indicator(
+    "HV",
+    defaults=(20,),
+    lookback=lambda window: _window(window)
+)
+def _historical_volatility(engine: IndicatorEngine, window: float) -> Series:
+    returns = engine.derived('returns', engine.returns)
+    return returns.rolling_std(_window(window)) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+
+def lookback_days(indicators: Sequence[str], margin_days: int = 7) -> int:
+    """Calendar days to read before the requested start to cover lookback_bars
+
+    Args:
+        indicators (Sequence[str]): Requested indicators
+        margin_days (int): Extra days for holiday clusters such as Tet
+
+    Returns:
+        int: Calendar days of warm-up history (0 if none is needed)
+    """
+    bars = lookback_bars(indicators)
+    if bars == 0:
+        return 0
+    return int(np.ceil(bars * 365 / TRADING_DAYS_PER_YEAR)) + margin_days
+
+
+def trim(result: Dict[str, Series], start: int, stop: Optional[int] = None) -> Dict[str, Series]:
+    """Keep bars [start, stop) of every series of an engine result (drops the warm-up bars)"""
+    return {
+        name: {part: values[start:stop] for part, values in series.items()}
+        if isinstance(series, dict) else series[start:stop]
+        for name, series in result.items()
+    }
+
+
+def _wilder_average(changes: np.ndarray, window: int) -> np.ndarray:
+    """Wilder's smoothing of per-bar changes (index 0 has no change)
+
+    Seeded with the mean of the first `window` changes, then
+    avg = (prev * (window - 1) + change) / window.
+    """
+    out = np.full(changes.shape, np.nan)
+    out[..., 1:] = _wilder_smooth(changes[..., 1:], window)
+    return out
+
+
+def _wilder_smooth(values: np.ndarray, window: int) -> np.ndarray:
+    """Wilder's smoothing seeded with the mean of the first `window` values"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < window:
+        return out
+    seed = values[..., :window].mean(axis=-1, keepdims=True)
+    # The recursion is an EMA with alpha = 1 / window started from the seed
+    out[..., window - 1:] = _ewm(np.concatenate((seed, values[..., window:]), axis=-1), alpha=1.0 / window)
+    return out
+
+
+def _ewm(values: np.ndarray, **params: Any) -> np.ndarray:
+    """pandas ewm(adjust=False).mean() along the last axis
+
+    pandas runs the recursion as one compiled pass per column, so a
+    matrix is handed over transposed (one column per symbol).
+    """
+    if values.ndim == 1:
+        return pd.Series(values).ewm(adjust=False, **params).mean().to_numpy()
+    smoothed = pd.DataFrame(values.reshape(-1, values.shape[-1]).T).ewm(adjust=False, **params).mean()
+    return np.ascontiguousarray(smoothed.to_numpy().T).reshape(values.shape)
+
+
+def series_to_dict(values: np.ndarray, index: List[Any]) -> Dict[Any, Any]:
+    """Convert an array to {index label: value} with NaN as None"""
+    objects = values.astype(object)
+    objects[np.isnan(values)] = None
+    return dict(zip(index, objects.tolist()))
+
+
+def to_response(result: Dict[str, Series], index: Sequence[Any]) -> Dict[str, Any]:
+    """Convert engine output to the JSON layout of the technical analysis endpoint
+
+    Args:
+        result (Dict[str, Series]): Output of IndicatorEngine.compute
+        index (Sequence[Any]): Row labels of the price history
+
+    Returns:
+        Dict[str, Any]: Same nesting, each series as {index label: value or None}
+    """
+    labels = list(index)
+    return {
+        name: {part: series_to_dict(values, labels) for part, values in series.items()}
+        if isinstance(series, dict) else series_to_dict(series, labels)
+        for name, series in result.items()
+    }
+
+
+def series_to_columnar(values: np.ndarray, decimals: int = 4) -> Dict[str, Any]:
+    """Encode an array as {"offset", "values"} with NaN as null
+
+    Leading NaNs (the warm-up of a window) are dropped and counted in
+    "offset"; the few NaNs left inside are set to None by position, so the
+    conversion never walks the series in Python.
+    """
+    missing = np.isnan(values)
+    valid = np.flatnonzero(~missing)
+    if len(valid) == 0:
+        return {"offset": len(values), "values": []}
+    offset = int(valid[0])
+    encoded = np.round(values[offset:], decimals).tolist()
+    for position in np.flatnonzero(missing[offset:]).tolist():
+        encoded[position] = None
+    return {"offset": offset, "values": encoded}
+
+
+def to_columnar(result: Dict[str, Series], dates: List[str], decimals: int = 4) -> Dict[str, Any]:
+    """Convert engine output to the compact columnar layout
+
+    Args:
+        result (Dict[str, Series]): Output of IndicatorEngine.compute
+        dates (List[str]): One date per bar, shared by every series
+        decimals (int): Decimal places kept in values
+
+    Returns:
+        Dict[str, Any]: {"dates": [...], indicator: {"offset", "values"} or sub-series -> {"offset", "values"}}
+    """
+    columnar: Dict[str, Any] = {"dates": dates}
+    for name, series in result.items():
+        columnar[name] = (
+            {part: series_to_columnar(values, decimals) for part, values in series.items()}
+            if isinstance(series, dict) else series_to_columnar(series, decimals)
+        )
+    return columnar
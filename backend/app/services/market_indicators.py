@@ -0,0 +1,327 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .indicators import IndicatorEngine, Series, to_columnar
+from .screener import column_name
+from .price_archive import PriceArchive
+
+logger = logging.getLogger(__name__)
+
+ALL_INDICATORS = ("MA", "RSI", "MACD", "BB")
+
+
+class MarketMatrix(NamedTuple):
+    """Aligned daily bars of many symbols (rows) over the union of their dates (columns)"""
+    symbols: np.ndarray
+    dates: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    # Other price columns read on request (e.g. open, high, low); not persisted
+    extra: Optional[Dict[str, np.ndarray]] = None
+
+
+def load_market_matrix(
+    archive: PriceArchive,
+    symbols: Sequence[str],
+    start: Any = None,
+    end: Any = None,
+    extra: Sequence[str] = ()
+) -> MarketMatrix:
+    """Read close and volume of many symbols into symbols x dates matrices
+
+    Args:
+        archive (PriceArchive): Local price archive
+        symbols (Sequence[str]): Stock symbols
+        start (Any): Inclusive start, None for the first bar
+        end (Any): Inclusive end of day, None for the last bar
+        extra (Sequence[str]): Other price columns to align, e.g. ('open', 'high', 'low')
+
+    Returns:
+        MarketMatrix: Rows sorted by symbol; NaN where a symbol has no bar on a date.
+            Symbols without bars in the range are left out.
+    """
+    columns: Dict[str, Dict[str, np.ndarray]] = {}
+    for symbol in sorted({symbol.upper() for symbol in symbols}):
+        bars = archive.read_columns(symbol, start, end, columns=['time', 'close', 'volume', *extra])
+        if len(bars['time']):
+            columns[symbol] = bars
+
+    names = np.array(list(columns), dtype=str)
+    if not columns:
+        empty = np.empty((0, 0))
+        return MarketMatrix(
+            names, np.empty(0, dtype='datetime64[D]'), empty, empty.copy(), {name: empty.copy() for name in extra}
+        )
+
+    days = {symbol: bars['time'].astype('datetime64[D]') for symbol, bars in columns.items()}
+    dates = np.unique(np.concatenate(list(days.values())))
+    aligned = {name: np.full((len(names), len(dates)), np.nan) for name in ('close', 'volume', *extra)}
+    for row, symbol in enumerate(names):
+        positions = np.searchsorted(dates, days[symbol])
+        for name, matrix in aligned.items():
+            matrix[row, positions] = columns[symbol][name]
+    return MarketMatrix(
+        names, dates, aligned.pop('close'), aligned.pop('volume'), aligned
+    )
+
+
+def compute_market_indicators(close: np.ndarray, indicators: Sequence[str] = ALL_INDICATORS) -> Dict[str, Series]:
+    """Compute indicators for every symbol in one vectorized pass
+
+    Symbols do not all trade on the same days (suspensions, late
+    listings), so before computing each row's bars are packed to the left
+    in time order. Windows then span each symbol's own last N sessions, as
+    they would for a single-symbol computation, and the results are
+    scattered back to their dates with NaN on the days a symbol did not
+    trade.
+
+    Args:
+        close (np.ndarray): symbols x dates close matrix, NaN for no bar
+        indicators (Sequence[str]): Any of "MA", "RSI", "MACD", "BB"
+
+    Returns:
+        Dict[str, Series]: Same layout as IndicatorEngine.compute, with symbols x dates arrays
+    """
+    missing = np.isnan(close)
+    order = np.argsort(missing, axis=1, kind='stable')
+    packed = np.take_along_axis(close, order, axis=1)
+
+    def unpack(values: np.ndarray) -> np.ndarray:
+        out = np.empty_like(values)
+        np.put_along_axis(out, order, values, axis=1)
+        out[missing] = np.nan
+        return out
+
+    result = IndicatorEngine(packed).compute(indicators)
+    return {
+        name: {part: unpack(values) for part, values in series.items()}
+        if isinstance(series, dict) else unpack(series)
+        for name, series in result.items()
+    }
+
+
+def _value(value: Any) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+class MarketIndicatorSnapshot:
+    """Indicators of the whole market as symbols x dates arrays"""
+
+    def __init__(self, matrix: MarketMatrix, result: Dict[str, Series], computed_at: float):
+        """Initialize the snapshot
+
+        Args:
+            matrix (MarketMatrix): Prices the indicators were computed from
+            result (Dict[str, Series]): Output of compute_market_indicators
+            computed_at (float): Unix time of the computation
+        """
+        self.matrix = matrix
+        self.result = result
+        self.computed_at = computed_at
+        traded = ~np.isnan(matrix.close)
+        # Column of each symbol's last bar (-1 when it has none)
+        self._last = np.where(
+            traded.any(axis=1), traded.shape[1] - 1 - np.argmax(traded[:, ::-1], axis=1), -1
+        ) if traded.size else np.full(len(matrix.symbols), -1)
+
+    @classmethod
+    def compute(
+        cls,
+        matrix: MarketMatrix,
+        indicators: Sequence[str] = ALL_INDICATORS
+    ) -> "MarketIndicatorSnapshot":
+        """Compute every indicator of a market matrix"""
+        return cls(matrix, compute_market_indicators(matrix.close, indicators), time.time())
+
+    def __len__(self) -> int:
+        return len(self.matrix.symbols)
+
+    def _row(self, symbol: str) -> Optional[int]:
+        symbols = self.matrix.symbols
+        index = int(np.searchsorted(symbols, symbol.upper()))
+        if index < len(symbols) and symbols[index] == symbol.upper():
+            return index
+        return None
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get a symbol's indicator values on its last traded day
+
+        Args:
+            symbol (str): Stock symbol
+
+        Returns:
+            Optional[Dict[str, Any]]: {"date", "close", "volume", indicator values (NaN as None)},
+                None if the symbol is not in the snapshot
+        """
+        row = self._row(symbol)
+        if row is None or self._last[row] < 0:
+            return None
+        column = int(self._last[row])
+        values: Dict[str, Any] = {
+            "date": str(self.matrix.dates[column]),
+            "close": _value(self.matrix.close[row, column]),
+            "volume": _value(self.matrix.volume[row, column])
+        }
+        for name, series in self.result.items():
+            values[name] = (
+                {part: _value(array[row, column]) for part, array in series.items()}
+                if isinstance(series, dict) else _value(series[row, column])
+            )
+        return values
+
+    def latest_columns(self) -> Dict[str, np.ndarray]:
+        """Get every symbol's values on its last traded day, one array per column
+
+        Returns:
+            Dict[str, np.ndarray]: 'symbol', 'date' (text, '' without bars), 'close', 'volume' and one column per
+                indicator series named like "ma50", "rsi", "macd_signal", "bb_upper" (NaN as missing)
+        """
+        rows = np.arange(len(self.matrix.symbols))
+        traded = self._last >= 0
+        columns = np.maximum(self._last, 0)
+
+        def pick(values: np.ndarray) -> np.ndarray:
+            if values.size == 0:
+                return np.full(len(rows), np.nan)
+            return np.where(traded, values[rows, columns], np.nan)
+
+        dates = np.datetime_as_string(self.matrix.dates, unit='D') if len(self.matrix.dates) else np.array([''])
+        latest: Dict[str, np.ndarray] = {
+            "symbol": self.matrix.symbols,
+            "date": np.where(traded, dates[columns], ''),
+            "close": pick(self.matrix.close),
+            "volume": pick(self.matrix.volume)
+        }
+        for name, series in self.result.items():
+            if isinstance(series, dict):
+                for part, array in series.items():
+                    # "MA"/"MA50" -> "ma50", "BB"/"Upper" -> "bb_upper"
+                    label = part if part.upper().startswith(name.upper()) else f"{name}_{part}"
+                    latest[column_name(label)] = pick(array)
+            else:
+                latest[column_name(name)] = pick(series)
+        return latest
+
+    def series(self, symbol: str, start: Any = None, end: Any = None) -> Optional[Dict[str, Any]]:
+        """Get a symbol's indicator series over its trading days, in the columnar layout
+
+        Args:
+            symbol (str): Stock symbol
+            start (Any): Inclusive start date, None for the first date
+            end (Any): Inclusive end date, None for the last date
+
+        Returns:
+            Optional[Dict[str, Any]]: Output of to_columnar, None if the symbol is not in the snapshot
+        """
+        row = self._row(symbol)
+        if row is None:
+            return None
+        dates = self.matrix.dates
+        mask = ~np.isnan(self.matrix.close[row])
+        if start is not None:
+            mask &= dates >= np.datetime64(str(start), 'D')
+        if end is not None:
+            mask &= dates <= np.datetime64(str(end), 'D')
+        columns = np.flatnonzero(mask)
+        result = {
+            name: {part: array[row, columns] for part, array in series.items()}
+            if isinstance(series, dict) else series[row, columns]
+            for name, series in self.result.items()
+        }
+        return to_columnar(result, np.datetime_as_string(dates[columns], unit='D').tolist())
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flatten the snapshot into named arrays ("MA/MA20", "RSI", ...) for storage"""
+        arrays = {
+            "symbols": self.matrix.symbols,
+            "dates": self.matrix.dates,
+            "close": self.matrix.close,
+            "volume": self.matrix.volume,
+            "computed_at": np.array(self.computed_at)
+        }
+        for name, series in self.result.items():
+            if isinstance(series, dict):
+                arrays.update({f"{name}/{part}": array for part, array in series.items()})
+            else:
+                arrays[name] = series
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "MarketIndicatorSnapshot":
+        """Rebuild a snapshot from to_arrays output"""
+        matrix = MarketMatrix(arrays["symbols"], arrays["dates"], arrays["close"], arrays["volume"])
+        result: Dict[str, Series] = {}
+        for key, array in arrays.items():
+            if key in MarketMatrix._fields or key == "computed_at":
+                continue
+            name, _, part = key.partition("/")
+            if part:
+                result.setdefault(name, {})[part] = array
+            else:
+                result[name] = array
+        return cls(matrix, result, float(arrays["computed_at"]))
+
+
+class MarketIndicatorStore:
+    """Latest market-wide indicator snapshot, persisted as one .npz file
+
+    The nightly job writes a new file atomically; readers in any process
+    reload it when its modification time changes, so the API always serves
+    the last complete computation.
+    """
+
+    def __init__(self, store_dir: str = "data/market_indicators"):
+        """Initialize the store
+
+        Args:
+            store_dir (str): Directory holding the snapshot file
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.store_dir / "indicators.npz"
+        self._snapshot: Optional[MarketIndicatorSnapshot] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def save(self, snapshot: MarketIndicatorSnapshot) -> None:
+        """Write a snapshot and make it the current one"""
+        tmp_path = self.path.with_suffix('.npz.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **snapshot.to_arrays())
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._snapshot = snapshot
+            self._mtime = self.path.stat().st_mtime
+
+    def snapshot(self) -> Optional[MarketIndicatorSnapshot]:
+        """Get the current snapshot, None if nothing has been computed yet"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None or mtime != self._mtime:
+                try:
+                    with np.load(self.path, allow_pickle=False) as data:
+                        self._snapshot = MarketIndicatorSnapshot.from_arrays({key: data[key] for key in data.files})
+                    self._mtime = mtime
+                except Exception as e:
+                    logger.error(f"Error loading market indicators: {str(e)}")
+            return self._snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the snapshot size and age for health reporting"""
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "symbols": len(snapshot) if snapshot is not None else 0,
+            "dates": len(snapshot.matrix.dates) if snapshot is not None else 0,
+            "age_seconds": round(time.time() - snapshot.computed_at, 1) if snapshot is not None else None
+        }
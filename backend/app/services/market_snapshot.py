@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .market_indicators import MarketIndicatorSnapshot
+from .screener import ScreenerTable
+
+logger = logging.getLogger(__name__)
+
+# Column name -> trading bars looked back for the return
+RETURN_HORIZONS = {
+    'return_1d': 1,
+    'return_1w': 5,
+    'return_1m': 21,
+    'return_3m': 63,
+    'return_6m': 126,
+    'return_1y': 245
+}
+
+# Trading bars averaged for the liquidity columns
+LIQUIDITY_WINDOW = 20
+
+CURRENT_FILE = "CURRENT"
+
+
+def _pack(values: np.ndarray, order: np.ndarray) -> np.ndarray:
+    return np.take_along_axis(values, order, axis=1)
+
+
+def _bars_back(packed: np.ndarray, counts: np.ndarray, back: int) -> np.ndarray:
+    """Value `back` trading bars before each row's last bar (NaN if the row is shorter)"""
+    if packed.shape[1] == 0:
+        return np.full(len(counts), np.nan)
+    index = counts - 1 - back
+    valid = index >= 0
+    picked = np.take_along_axis(packed, np.maximum(index, 0)[:, None], axis=1)[:, 0]
+    return np.where(valid, picked, np.nan)
+
+
+def _tail_mean(packed: np.ndarray, counts: np.ndarray, window: int) -> np.ndarray:
+    """Mean over each row's last `window` trading bars (NaN if the row is shorter)"""
+    if packed.shape[1] == 0:
+        return np.full(len(counts), np.nan)
+    index = counts[:, None] - window + np.arange(window)[None, :]
+    values = np.take_along_axis(packed, np.clip(index, 0, packed.shape[1] - 1), axis=1)
+    with np.errstate(invalid='ignore'):
+        return np.where(counts >= window, values.mean(axis=1), np.nan)
+
+
+def market_snapshot_columns(
+    listing: Dict[str, np.ndarray],
+    market: MarketIndicatorSnapshot,
+    ratios: Optional[Dict[str, Dict[str, float]]] = None
+) -> Dict[str, np.ndarray]:
+    """Build one row per listed symbol with everything screening and ranking need
+
+    Rows hold the last bar (date, OHLCV), returns over RETURN_HORIZONS,
+    the main indicator values, liquidity over the last LIQUIDITY_WINDOW
+    bars (avg_volume, avg_value, volume_ratio) and key ratios. Horizons and
+    windows count each symbol's own trading bars, so suspensions do not
+    shift them.
+
+    Args:
+        listing (Dict[str, np.ndarray]): Universe columns, sorted by symbol
+        market (MarketIndicatorSnapshot): Market-wide indicators (with open/high/low in matrix.extra)
+        ratios (Optional[Dict[str, Dict[str, float]]]): Symbol -> ratio name -> value
+
+    Returns:
+        Dict[str, np.ndarray]: Column name -> values, one row per listed symbol
+    """
+    matrix = market.matrix
+    latest = market.latest_columns()
+    missing = np.isnan(matrix.close)
+    order = np.argsort(missing, axis=1, kind='stable')
+    counts = (~missing).sum(axis=1)
+
+    close = _pack(matrix.close, order)
+    volume = _pack(np.nan_to_num(matrix.volume, nan=0.0), order)
+    for name, values in (matrix.extra or {}).items():
+        latest[name] = _bars_back(_pack(values, order), counts, 0)
+
+    last_close = _bars_back(close, counts, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, bars in RETURN_HORIZONS.items():
+            latest[name] = last_close / _bars_back(close, counts, bars) - 1.0
+        avg_volume = _tail_mean(volume, counts, LIQUIDITY_WINDOW)
+        latest['avg_volume'] = avg_volume
+        latest['avg_value'] = _tail_mean(close * volume, counts, LIQUIDITY_WINDOW)
+        latest['volume_ratio'] = _bars_back(volume, counts, 0) / avg_volume
+
+    return ScreenerTable.build(listing, latest, ratios).columns
+
+
+class MarketSnapshotStore:
+    """Nightly market snapshot table, one typed .npz file per build
+
+    A build is written under a new file name (its build time) and only
+    then published by atomically replacing the CURRENT pointer, so readers
+    never open a half-written file. Readers load the whole table into
+    memory and swap it in under a lock when CURRENT changes; requests keep
+    using the table they started with.
+    """
+
+    def __init__(self, store_dir: str = "data/market_snapshot", keep: int = 3):
+        """Initialize the store
+
+        Args:
+            store_dir (str): Directory holding the snapshot files
+            keep (int): Number of builds kept on disk
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+        self._table: Optional[ScreenerTable] = None
+        self._lock = threading.Lock()
+
+    def save(self, columns: Dict[str, np.ndarray], built_at: Optional[float] = None) -> ScreenerTable:
+        """Write a new build and publish it
+
+        Args:
+            columns (Dict[str, np.ndarray]): Snapshot columns (numeric or text)
+            built_at (Optional[float]): Unix build time, defaults to now
+
+        Returns:
+            ScreenerTable: The published table, versioned by its build time
+        """
+        built_at = built_at if built_at is not None else time.time()
+        version = datetime.fromtimestamp(built_at).strftime('%Y%m%dT%H%M%S%f')
+        arrays = {name: _typed(values) for name, values in columns.items()}
+        path = self.store_dir / f"snapshot-{version}.npz"
+        tmp_path = path.with_suffix('.npz.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, __built_at__=np.array(built_at), **arrays)
+        os.replace(tmp_path, path)
+
+        pointer = self.store_dir / CURRENT_FILE
+        pointer_tmp = pointer.with_suffix('.tmp')
+        pointer_tmp.write_text(path.name, encoding='utf-8')
+        os.replace(pointer_tmp, pointer)
+
+        table = ScreenerTable(columns, version, built_at)
+        with self._lock:
+            self._table = table
+        self._prune()
+        logger.info(f"Market snapshot {version} published: {len(table)} symbols, {len(columns)} columns")
+        return table
+
+    def _prune(self) -> None:
+        builds = sorted(self.store_dir.glob("snapshot-*.npz"))
+        for path in builds[:-self.keep] if self.keep > 0 else []:
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"Error removing old market snapshot {path.name}: {str(e)}")
+
+    def current(self) -> Optional[ScreenerTable]:
+        """Get the published table, loading a newer build if one was published"""
+        try:
+            name = (self.store_dir / CURRENT_FILE).read_text(encoding='utf-8').strip()
+        except FileNotFoundError:
+            return self._table
+        version = name[len("snapshot-"):-len(".npz")]
+        table = self._table
+        if table is not None and table.version == version:
+            return table
+        with self._lock:
+            if self._table is not None and self._table.version == version:
+                return self._table
+            try:
+                with np.load(self.store_dir / name, allow_pickle=False) as data:
+                    built_at = float(data['__built_at__'])
+                    columns = {key: _untyped(data[key]) for key in data.files if key != '__built_at__'}
+            except Exception as e:
+                logger.error(f"Error loading market snapshot {name}: {str(e)}")
+                return self._table
+            self._table = ScreenerTable(columns, version, built_at)
+            return self._table
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the published build for health reporting"""
+        table = self._table
+        return {
+            "loaded": table is not None,
+            "version": table.version if table is not None else None,
+            "symbols": len(table) if table is not None else 0,
+            "age_seconds": round(time.time() - table.built_at, 1) if table is not None else None
+        }
+
+
+def _typed(values: np.ndarray) -> np.ndarray:
+    """Text columns as fixed-width unicode ('' for missing), so no pickling is needed"""
+    if values.dtype == object:
+        return np.array(['' if value is None else str(value) for value in values.tolist()], dtype=str)
+    return np.asarray(values, dtype=np.float64)
+
+
+def _untyped(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind == 'U':
+        objects = values.astype(object)
+        objects[values == ''] = None
+        return objects
+    return values
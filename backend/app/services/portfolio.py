@@ -0,0 +1,131 @@
+import logging
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .indicators import TRADING_DAYS_PER_YEAR
+
+logger = logging.getLogger(__name__)
+
+
+class PriceMatrix(NamedTuple):
+    """Closes aligned on the union of trading dates
+
+    close has one row per date and one column per symbol (in the order of
+    symbols), NaN where the symbol did not trade that day.
+    """
+    dates: np.ndarray
+    symbols: List[str]
+    close: np.ndarray
+
+
+def align_closes(
+    series: Mapping[str, Tuple[np.ndarray, np.ndarray]],
+    symbols: Optional[Sequence[str]] = None
+) -> PriceMatrix:
+    """Place each symbol's closes on a shared, sorted date axis
+
+    Args:
+        series (Mapping[str, Tuple[np.ndarray, np.ndarray]]): Symbol -> (bar dates, closes)
+        symbols (Optional[Sequence[str]]): Column order, defaults to the mapping order;
+            symbols without data get an all-NaN column
+
+    Returns:
+        PriceMatrix: dates x symbols close matrix
+    """
+    symbols = list(symbols if symbols is not None else series)
+    times = {
+        symbol: np.asarray(series[symbol][0], dtype='datetime64[D]') for symbol in symbols if symbol in series
+    }
+    dates = np.unique(np.concatenate(list(times.values()))) if times else np.empty(0, dtype='datetime64[D]')
+    close = np.full((len(dates), len(symbols)), np.nan)
+    for column, symbol in enumerate(symbols):
+        if symbol not in times:
+            continue
+        values = np.asarray(series[symbol][1], dtype=np.float64)
+        # Non-positive closes are bad ticks, not prices
+        close[np.searchsorted(dates, times[symbol]), column] = np.where(values > 0, values, np.nan)
+    return PriceMatrix(dates, symbols, close)
+
+
+def daily_returns(close: np.ndarray) -> np.ndarray:
+    """Simple daily returns of a dates x symbols close matrix
+
+    A day a symbol did not trade carries its last close forward (a 0%
+    return, the position is still held), and days before its first close
+    are 0% as well, so every row is a return of the same calendar day.
+
+    Returns:
+        np.ndarray: (dates - 1) x symbols returns
+    """
+    if len(close) < 2:
+        return np.zeros((0, close.shape[1]))
+    # Forward fill: index of the last traded row at or before each row
+    index = np.where(np.isnan(close), 0, np.arange(len(close))[:, None])
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = np.take_along_axis(close, index, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = filled[1:] / filled[:-1] - 1.0
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def portfolio_performance(
+    matrix: PriceMatrix,
+    weights: Sequence[float],
+    risk_free_rate: float = 0.0
+) -> Dict[str, Any]:
+    """Performance of a portfolio rebalanced daily to constant weights
+
+    Portfolio daily returns are one matrix product of the daily returns
+    matrix with the weights; every statistic is derived from that single
+    series, so volatility and drawdown describe the portfolio, not a mix
+    of its holdings.
+
+    Args:
+        matrix (PriceMatrix): Aligned closes
+        weights (Sequence[float]): Weight of each column (not renormalized; the rest is cash)
+        risk_free_rate (float): Annual risk-free rate used by the Sharpe ratio
+
+    Returns:
+        Dict[str, Any]: total_return, annualized_return, volatility (annualized),
+            sharpe_ratio (annualized), max_drawdown, and the daily_returns with their dates
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != (len(matrix.symbols),):
+        raise ValueError("Number of weights must match number of symbols")
+    returns = daily_returns(matrix.close) @ weights
+    days = len(returns)
+    if days == 0:
+        return {
+            "total_return": 0.0,
+            "annualized_return": 0.0,
+            "volatility": 0.0,
+            "sharpe_ratio": 0.0,
+            "max_drawdown": 0.0,
+            "daily_returns": [],
+            "dates": []
+        }
+
+    equity = np.cumprod(1.0 + returns)
+    total_return = float(equity[-1] - 1.0)
+    annualized_return = (
+        float(equity[-1] ** (TRADING_DAYS_PER_YEAR / days) - 1.0) if equity[-1] > 0 else -1.0
+    )
+    daily_volatility = float(returns.std(ddof=1)) if days > 1 else 0.0
+    excess = returns - risk_free_rate / TRADING_DAYS_PER_YEAR
+    sharpe_ratio = (
+        float(excess.mean() / daily_volatility * np.sqrt(TRADING_DAYS_PER_YEAR)) if daily_volatility > 0 else 0.0
+    )
+    # Drawdowns from the running peak, starting from the initial value of 1
+    curve = np.concatenate(([1.0], equity))
+    max_drawdown = float((curve / np.maximum.accumulate(curve) - 1.0).min())
+
+    return {
+        "total_return": total_return,
+        "annualized_return": annualized_return,
+        "volatility": daily_volatility * float(np.sqrt(TRADING_DAYS_PER_YEAR)),
+        "sharpe_ratio": sharpe_ratio,
+        "max_drawdown": max_drawdown,
+        "daily_returns": returns.tolist(),
+        "dates": np.datetime_as_string(matrix.dates[1:], unit='D').tolist()
+    }
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PXA1'
+ALIGNMENT = 64
+
+# Column name -> on-disk dtype. 'time' holds datetime64[ns] as int64.
+COLUMNS: Dict[str, str] = {
+    'time': '<i8',
+    'open': '<f8',
+    'high': '<f8',
+    'low': '<f8',
+    'close': '<f8',
+    'volume': '<i8'
+}
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _to_ns(value: Any) -> int:
+    return int(pd.Timestamp(value).value)
+
+
+class PriceArchive:
+    """Columnar on-disk price archive, one file per symbol
+
+    Each file is a small JSON header followed by one contiguous, 64-byte
+    aligned block per column (int64 times, float64 prices, int64 volume).
+    Reads memory-map the file, binary-search the time column and copy out
+    only the requested rows of the requested columns, so a range read never
+    loads the whole history. Files are replaced atomically on write.
+    """
+
+    def __init__(self, archive_dir: str = "data/prices"):
+        """Initialize the archive
+
+        Args:
+            archive_dir (str): Directory holding one archive file per symbol
+        """
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, symbol: str) -> Path:
+        return self.archive_dir / f"{symbol.upper()}.pxa"
+
+    def exists(self, symbol: str) -> bool:
+        """Check whether a symbol has an archive file"""
+        return self._file(symbol).exists()
+
+    def symbols(self) -> List[str]:
+        """List archived symbols"""
+        return sorted(path.stem for path in self.archive_dir.glob("*.pxa"))
+
+    def write(self, symbol: str, bars: pd.DataFrame, meta: Optional[Dict[str, Any]] = None) -> None:
+        """Replace the archive of a symbol
+
+        Args:
+            symbol (str): Stock symbol
+            bars (pd.DataFrame): Bars sorted by 'time'
+            meta (Optional[Dict[str, Any]]): Extra metadata stored in the header
+        """
+        rows = len(bars)
+        arrays: Dict[str, np.ndarray] = {}
+        for name, dtype in COLUMNS.items():
+            if rows == 0:
+                arrays[name] = np.empty(0, dtype=dtype)
+            elif name == 'time':
+                arrays[name] = pd.to_datetime(bars['time']).to_numpy(dtype='datetime64[ns]').view('<i8')
+            elif name in bars.columns:
+                values = pd.to_numeric(bars[name], errors='coerce').to_numpy(dtype='float64')
+                if dtype == '<i8':
+                    values = np.nan_to_num(values, nan=0.0)
+                arrays[name] = values.astype(dtype)
+            else:
+                arrays[name] = np.full(rows, np.nan if dtype == '<f8' else 0, dtype=dtype)
+
+        # Header size depends on the offsets, so lay out columns after a
+        # generously padded header
+        # Content digest, so readers can key derived data on the bars themselves
+        digest = hashlib.sha1()
+        for name in COLUMNS:
+            digest.update(arrays[name].tobytes())
+        columns = []
+        header = {'rows': rows, 'version': digest.hexdigest()[:16], 'columns': columns, 'meta': meta or {}}
+        header_size = _align(len(json.dumps(header)) + 64 * len(COLUMNS) + 64)
+        offset = header_size
+        for name, dtype in COLUMNS.items():
+            columns.append({'name': name, 'dtype': dtype, 'offset': offset})
+            offset = _align(offset + arrays[name].nbytes)
+        header_bytes = json.dumps(header).encode('utf-8')
+        if 8 + len(header_bytes) > header_size:
+            raise ValueError(f"Archive header for {symbol} does not fit in {header_size} bytes")
+
+        path = self._file(symbol)
+        tmp_path = path.with_suffix('.pxa.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            for column in columns:
+                f.seek(column['offset'])
+                f.write(arrays[column['name']].tobytes())
+            f.truncate(offset)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_header_from(f: Any, path: Path) -> Dict[str, Any]:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"Not a price archive: {path}")
+        (length,) = struct.unpack('<I', f.read(4))
+        return json.loads(f.read(length).decode('utf-8'))
+
+    def read_header(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Read the header of a symbol's archive without touching the data
+
+        Args:
+            symbol (str): Stock symbol
+
+        Returns:
+            Optional[Dict[str, Any]]: Row count, column layout and metadata
+        """
+        path = self._file(symbol)
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            return self._read_header_from(f, path)
+
+    def version(self, symbol: str) -> Optional[str]:
+        """Get the content version of a symbol's bars
+
+        The version changes whenever a write changes any bar (new bars,
+        a revised last bar, a filled gap) and stays the same otherwise.
+
+        Args:
+            symbol (str): Stock symbol
+
+        Returns:
+            Optional[str]: Version string, None if nothing is archived
+        """
+        path = self._file(symbol)
+        try:
+            stat = path.stat()
+            with open(path, 'rb') as f:
+                header = self._read_header_from(f, path)
+        except FileNotFoundError:
+            return None
+        # Files written before versions were recorded fall back to the file identity
+        return header.get('version') or f"{header['rows']}-{stat.st_mtime_ns}"
+
+    def read_meta(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Read the metadata stored with a symbol's archive"""
+        header = self.read_header(symbol)
+        return header['meta'] if header is not None else None
+
+    def read_columns(
+        self,
+        symbol: str,
+        start: Any = None,
+        end: Any = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Read a time range of selected columns as typed arrays
+
+        Args:
+            symbol (str): Stock symbol
+            start (Any): Inclusive start (date, string or timestamp), None for the first bar
+            end (Any): Inclusive end of day, None for the last bar
+            columns (Optional[Sequence[str]]): Columns to read, defaults to all
+
+        Returns:
+            Dict[str, np.ndarray]: Column name -> array ('time' as datetime64[ns])
+        """
+        wanted = list(columns) if columns is not None else list(COLUMNS)
+        empty = {
+            name: np.empty(0, dtype='datetime64[ns]' if name == 'time' else COLUMNS[name])
+            for name in wanted
+        }
+        path = self._file(symbol)
+        if not path.exists():
+            return empty
+
+        # Header and data come from the same open file, so a concurrent
+        # atomic replace cannot mix two versions
+        with open(path, 'rb') as f:
+            header = self._read_header_from(f, path)
+            rows = header['rows']
+            if rows == 0:
+                return empty
+            layout = {column['name']: column for column in header['columns']}
+
+            def column_map(name: str) -> np.memmap:
+                column = layout[name]
+                return np.memmap(f, dtype=column['dtype'], mode='r', offset=column['offset'], shape=(rows,))
+
+            times = column_map('time')
+            lo = 0 if start is None else int(np.searchsorted(
+                times, _to_ns(pd.Timestamp(start).normalize()), 'left'
+            ))
+            hi = rows if end is None else int(np.searchsorted(
+                times, _to_ns(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)), 'left'
+            ))
+
+            # Copy only the selected rows, so no mapping outlives the call
+            result = {}
+            for name in wanted:
+                values = times if name == 'time' else column_map(name)
+                sliced = np.array(values[lo:hi])
+                result[name] = sliced.view('datetime64[ns]') if name == 'time' else sliced
+                del values
+            del times
+        return result
+
+    def read(self, symbol: str, start: Any = None, end: Any = None) -> pd.DataFrame:
+        """Read a time range of bars as a DataFrame
+
+        Args:
+            symbol (str): Stock symbol
+            start (Any): Inclusive start, None for the first bar
+            end (Any): Inclusive end of day, None for the last bar
+
+        Returns:
+            pd.DataFrame: Bars with time, open, high, low, close and volume columns
+        """
+        if not self.exists(symbol):
+            return pd.DataFrame()
+        return pd.DataFrame(self.read_columns(symbol, start, end))
+
+    def last_time(self, symbol: str) -> Optional[pd.Timestamp]:
+        """Get the timestamp of the last archived bar
+
+        Args:
+            symbol (str): Stock symbol
+
+        Returns:
+            Optional[pd.Timestamp]: Time of the last bar, None if nothing is archived
+        """
+        header = self.read_header(symbol)
+        if header is None or header['rows'] == 0:
+            return None
+        times = self.read_columns(symbol, start=None, end=None, columns=['time'])['time']
+        return pd.Timestamp(times[-1]) if len(times) else None
@@ -0,0 +1,321 @@
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .price_archive import COLUMNS, PriceArchive
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = '%Y-%m-%d'
+
+# fetch(symbol, start_date, end_date) -> DataFrame with a 'time' column
+Fetcher = Callable[[str, str, str], Optional[pd.DataFrame]]
+
+
+def _parse(value: str) -> date:
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def _format(value: date) -> str:
+    return value.strftime(DATE_FORMAT)
+
+
+class PriceHistoryStore:
+    """Local per-symbol store of daily OHLCV bars
+
+    Past daily bars never change, so each symbol keeps the date range that
+    has already been fetched ("coverage"). A read only asks the vendor for
+    the parts of the requested window outside that range: the missing head,
+    the missing tail and any gap in between.
+    
+    Final bars and coverage are kept together in a columnar PriceArchive
+    file, so reads of an already covered window are served by memory-mapped
+    range slicing. Today's bar is not final: it is kept in memory for
+    live_ttl seconds and merged on read, so the archive file is only
+    rewritten when final bars are added.
+    """
+
+    def __init__(self, store_dir: str = "data/prices", live_ttl: float = 60.0):
+        """Initialize the store
+
+        Args:
+            store_dir (str): Directory holding one archive file per symbol
+            live_ttl (float): Seconds today's bar is served before it is fetched again
+        """
+        self.store_dir = Path(store_dir)
+        self.archive = PriceArchive(store_dir)
+        self.live_ttl = live_ttl
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Symbol -> (day, fetched at, bars of that day onwards)
+        self._live: Dict[str, Tuple[date, float, pd.DataFrame]] = {}
+        self._live_lock = threading.Lock()
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def coverage(self, symbol: str) -> Optional[Tuple[date, date]]:
+        """Get the date range already held for a symbol
+
+        Args:
+            symbol (str): Stock symbol
+
+        Returns:
+            Optional[Tuple[date, date]]: (start, end) of stored final bars
+        """
+        try:
+            meta = self.archive.read_meta(symbol)
+            if not meta or 'start' not in meta:
+                return None
+            return _parse(meta['start']), _parse(meta['end'])
+        except Exception as e:
+            logger.error(f"Error reading price store metadata for {symbol}: {str(e)}")
+            return None
+
+    def version(self, symbol: str) -> Optional[str]:
+        """Get the content version of a symbol's stored bars (None if nothing is stored)"""
+        return self.archive.version(symbol.upper())
+
+    def read(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Read stored bars of a symbol without calling the vendor
+
+        Args:
+            symbol (str): Stock symbol
+            start_date (Optional[str]): Start date in YYYY-MM-DD format, None for the first bar
+            end_date (Optional[str]): End date in YYYY-MM-DD format, None for the last bar
+
+        Returns:
+            pd.DataFrame: Stored bars sorted by time (empty if none)
+        """
+        return self.archive.read(symbol, start_date, end_date)
+
+    def _live_bars(self, symbol: str, today: date) -> Optional[pd.DataFrame]:
+        """Today's bars if they were fetched less than live_ttl seconds ago"""
+        with self._live_lock:
+            entry = self._live.get(symbol)
+            if entry is None or entry[0] != today:
+                self._live.pop(symbol, None)
+                return None
+            if time.monotonic() - entry[1] >= self.live_ttl:
+                return None
+            return entry[2]
+
+    def _set_live(self, symbol: str, today: date, bars: pd.DataFrame) -> None:
+        with self._live_lock:
+            self._live[symbol] = (today, time.monotonic(), bars)
+
+    @staticmethod
+    def _typed(bars: pd.DataFrame) -> pd.DataFrame:
+        """Bars with the archive's columns and dtypes"""
+        frame = {}
+        for name, dtype in COLUMNS.items():
+            if name == 'time':
+                frame[name] = pd.to_datetime(bars['time']).to_numpy(dtype='datetime64[ns]')
+            elif name in bars.columns:
+                values = pd.to_numeric(bars[name], errors='coerce').to_numpy(dtype='float64')
+                frame[name] = np.nan_to_num(values).astype(dtype) if dtype == '<i8' else values
+            else:
+                frame[name] = np.full(len(bars), np.nan if dtype == '<f8' else 0, dtype=dtype)
+        return pd.DataFrame(frame)
+
+    @staticmethod
+    def _window(bars: pd.DataFrame, start: date, end: date) -> pd.DataFrame:
+        if bars.empty:
+            return bars
+        times = bars['time']
+        mask = (times >= pd.Timestamp(start)) & (times < pd.Timestamp(end + timedelta(days=1)))
+        return bars.loc[mask].reset_index(drop=True)
+
+    def _write(self, symbol: str, bars: pd.DataFrame, start: date, end: date) -> None:
+        self.archive.write(symbol, bars, meta={
+            'start': _format(start),
+            'end': _format(end),
+            'updated_at': datetime.now().isoformat()
+        })
+
+    @staticmethod
+    def missing_ranges(
+        start: date,
+        end: date,
+        covered: Optional[Tuple[date, date]]
+    ) -> List[Tuple[date, date]]:
+        """Get the sub-ranges of [start, end] not covered by the store
+        
+        Ranges are extended up to the stored coverage, so a request that
+        does not overlap it also fills the gap in between and coverage
+        stays contiguous.
+
+        Args:
+            start (date): Requested start
+            end (date): Requested end
+            covered (Optional[Tuple[date, date]]): Stored coverage
+
+        Returns:
+            List[Tuple[date, date]]: Ranges to fetch from the vendor
+        """
+        if covered is None:
+            return [(start, end)]
+        cov_start, cov_end = covered
+        one_day = timedelta(days=1)
+        ranges = []
+        if start < cov_start:
+            ranges.append((start, cov_start - one_day))
+        if end > cov_end:
+            ranges.append((cov_end + one_day, end))
+        return ranges
+
+    def get(self, symbol: str, start_date: str, end_date: str, fetch: Fetcher) -> pd.DataFrame:
+        """Get bars for a window, fetching only what is not stored yet
+
+        Args:
+            symbol (str): Stock symbol
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            fetch (Fetcher): Vendor fetch used for missing ranges
+
+        Returns:
+            pd.DataFrame: Bars within [start_date, end_date]
+        """
+        symbol = symbol.upper()
+        start, end = _parse(start_date), _parse(end_date)
+        live = self._current(symbol, start, end)
+        if live is None:
+            with self._lock(symbol):
+                live, _ = self._update_locked(symbol, start, end, fetch)
+        # Fully covered final bars are sliced from the archive without the lock
+        final_end = min(end, date.today() - timedelta(days=1))
+        final = self.read(symbol, start_date, _format(final_end)) if final_end >= start else pd.DataFrame()
+        live = self._window(live, start, end)
+        if live.empty:
+            return final
+        if final.empty:
+            return live
+        return pd.concat([final, live], ignore_index=True)
+
+    def get_arrays(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        fetch: Fetcher,
+        columns: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Get typed column arrays for a window, fetching only what is missing
+
+        Args:
+            symbol (str): Stock symbol
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            fetch (Fetcher): Vendor fetch used for missing ranges
+            columns (Optional[Sequence[str]]): Columns to read, defaults to all
+
+        Returns:
+            Dict[str, np.ndarray]: Column name -> array
+        """
+        symbol = symbol.upper()
+        start, end = _parse(start_date), _parse(end_date)
+        live = self._current(symbol, start, end)
+        if live is None:
+            with self._lock(symbol):
+                live, _ = self._update_locked(symbol, start, end, fetch)
+        final_end = min(end, date.today() - timedelta(days=1))
+        arrays = self.archive.read_columns(symbol, start_date, _format(final_end), columns)
+        live = self._window(live, start, end)
+        if live.empty:
+            return arrays
+        return {
+            name: np.concatenate([values, live[name].to_numpy(dtype=values.dtype)])
+            for name, values in arrays.items()
+        }
+
+    def sync(self, symbol: str, start_date: str, end_date: str, fetch: Fetcher) -> int:
+        """Bring the stored history up to date for a window
+
+        Args:
+            symbol (str): Stock symbol
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            fetch (Fetcher): Vendor fetch used for missing ranges
+
+        Returns:
+            int: Number of bars fetched from the vendor
+        """
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            _, fetched = self._update_locked(
+                symbol, _parse(start_date), _parse(end_date), fetch, refresh_live=True
+            )
+        return fetched
+
+    def _current(self, symbol: str, start: date, end: date) -> Optional[pd.DataFrame]:
+        """Today's bars (empty if the window ends before today) when nothing needs fetching, else None"""
+        today = date.today()
+        final_end = min(end, today - timedelta(days=1))
+        if final_end >= start and self.missing_ranges(start, final_end, self.coverage(symbol)):
+            return None
+        if end < today:
+            return pd.DataFrame()
+        return self._live_bars(symbol, today)
+
+    def _update_locked(
+        self,
+        symbol: str,
+        start: date,
+        end: date,
+        fetch: Fetcher,
+        refresh_live: bool = False
+    ) -> Tuple[pd.DataFrame, int]:
+        """Fetch the missing final bars into the archive and today's bar into memory
+
+        Returns:
+            Tuple[pd.DataFrame, int]: Today's bars (empty if the window ends before
+                today) and the number of bars fetched from the vendor
+        """
+        today = date.today()
+        last_final = today - timedelta(days=1)
+        final_end = min(end, last_final)
+        covered = self.coverage(symbol)
+        ranges = self.missing_ranges(start, final_end, covered) if final_end >= start else []
+
+        live = None
+        if end >= today:
+            live = None if refresh_live else self._live_bars(symbol, today)
+            if live is None:
+                # Fetch today together with a missing tail, in one vendor call
+                if ranges and ranges[-1][1] == final_end:
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((max(start, today), end))
+
+        frames = []
+        for range_start, range_end in ranges:
+            logger.info(f"Fetching {symbol} bars {_format(range_start)}..{_format(range_end)}")
+            frame = fetch(symbol, _format(range_start), _format(range_end))
+            if frame is not None and len(frame) > 0:
+                frames.append(self._typed(frame))
+        fetched = pd.concat(frames, ignore_index=True) if frames else self._typed(pd.DataFrame({'time': []}))
+        is_final = (fetched['time'] < pd.Timestamp(today)).to_numpy()
+
+        if end >= today and live is None:
+            live = fetched.loc[~is_final].drop_duplicates(subset='time', keep='last')
+            live = live.sort_values('time').reset_index(drop=True)
+            self._set_live(symbol, today, live)
+
+        if final_end >= start and self.missing_ranges(start, final_end, covered):
+            stored = self.read(symbol)
+            bars = pd.concat([stored, fetched.loc[is_final]], ignore_index=True) if len(stored) else fetched.loc[is_final]
+            # Later fetches win, so a revised bar replaces the stored one;
+            # an unfinished bar written by an older version is dropped
+            bars = bars.loc[bars['time'] < pd.Timestamp(today)]
+            bars = bars.drop_duplicates(subset='time', keep='last').sort_values('time').reset_index(drop=True)
+            new_start = start if covered is None else min(start, covered[0])
+            new_end = final_end if covered is None else max(covered[1], final_end)
+            self._write(symbol, bars, new_start, new_end)
+        return (live if live is not None else pd.DataFrame()), len(fetched)
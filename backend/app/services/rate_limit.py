@@ -0,0 +1,158 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting calls to a fixed rate"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """Initialize the bucket
+
+        Args:
+            rate (float): Tokens added per second
+            burst (Optional[float]): Bucket capacity, defaults to max(rate, 1)
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, sleeping until one is available
+
+        Args:
+            timeout (Optional[float]): Give up after this many seconds (None waits forever)
+
+        Returns:
+            bool: True if a token was taken
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill_locked(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else 0.1
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate follows the health of the upstream
+
+    Additive increase, multiplicative decrease: every failed or slow call
+    cuts the rate, every fast successful call raises it a little, always
+    within [min_rate, max_rate].
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float = 0.5,
+        max_rate: Optional[float] = None,
+        target_latency: float = 2.0,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5
+    ):
+        """Initialize the bucket
+
+        Args:
+            rate (float): Starting rate (tokens per second)
+            min_rate (float): Lowest rate the bucket may fall to
+            max_rate (Optional[float]): Highest rate, defaults to the starting rate
+            target_latency (float): Calls slower than this (seconds) count as congestion
+            increase_step (float): Rate added after a healthy call
+            decrease_factor (float): Rate multiplier after a failed or slow call
+        """
+        super().__init__(rate)
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+
+    def record(self, success: bool, latency: float) -> None:
+        """Adjust the rate from the outcome of one upstream call
+
+        Args:
+            success (bool): Whether the call succeeded
+            latency (float): Call duration in seconds
+        """
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            if not success or latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+
+class SourceRateLimiter:
+    """One adaptive token bucket per vendor source ('VCI', 'TCBS', ...)"""
+
+    def __init__(
+        self,
+        rates: Dict[str, float],
+        default_rate: float = 5.0,
+        min_rate: float = 0.5,
+        target_latency: float = 2.0
+    ):
+        """Initialize the limiter
+
+        Args:
+            rates (Dict[str, float]): Maximum requests per second for each source
+            default_rate (float): Rate for sources missing from rates
+            min_rate (float): Lowest rate a source is throttled down to
+            target_latency (float): Latency (seconds) above which a source is slowed down
+        """
+        self.rates = dict(rates)
+        self.default_rate = default_rate
+        self.min_rate = min_rate
+        self.target_latency = target_latency
+        self._buckets: Dict[str, AdaptiveTokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, source: str) -> AdaptiveTokenBucket:
+        """Get the bucket of a source, creating it on first use"""
+        with self._lock:
+            bucket = self._buckets.get(source)
+            if bucket is None:
+                bucket = AdaptiveTokenBucket(
+                    self.rates.get(source, self.default_rate),
+                    min_rate=self.min_rate,
+                    target_latency=self.target_latency
+                )
+                self._buckets[source] = bucket
+            return bucket
+
+    def record(self, source: str, success: bool, latency: float) -> None:
+        """Feed the outcome of an upstream call back into the source's rate"""
+        self.bucket(source).record(success, latency)
+
+    def rates_snapshot(self) -> Dict[str, float]:
+        """Get the current rate of every source seen so far"""
+        with self._lock:
+            return {source: round(bucket.rate, 3) for source, bucket in self._buckets.items()}
+
+    def acquire(self, source: str, timeout: Optional[float] = None) -> bool:
+        """Wait for permission to call a source
+
+        Args:
+            source (str): Data source
+            timeout (Optional[float]): Give up after this many seconds
+
+        Returns:
+            bool: True if the call may proceed
+        """
+        return self.bucket(source).acquire(timeout)
@@ -0,0 +1,438 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rolls applied before the running sums are rebuilt from the window, so
+# float error from adding and removing days cannot accumulate
+REBUILD_EVERY = 245
+
+
+class RiskModelUnavailableError(RuntimeError):
+    """No risk model has been built yet"""
+
+
+class RiskModel:
+    """Rolling covariance of the daily returns of the whole universe
+
+    The model keeps the returns of the last `window` trading days plus
+    running sums over them (sum of returns, of return cross-products, of
+    squared-return cross-products and of cross-products with the
+    benchmark). Moving the window by k days adds and removes k rank-one
+    terms, O(k * symbols^2), instead of recomputing over the whole window.
+
+    The sample covariance is shrunk towards a scaled identity with the
+    Ledoit-Wolf intensity, which keeps it well conditioned when there are
+    more symbols than days. The intensity is estimated on raw daily
+    returns (their mean is negligible at daily frequency), so it also
+    comes from the running sums.
+    """
+
+    def __init__(
+        self,
+        symbols: np.ndarray,
+        dates: np.ndarray,
+        returns: np.ndarray,
+        benchmark: np.ndarray,
+        window: int,
+        sums: Optional[Dict[str, np.ndarray]] = None,
+        rolls: int = 0,
+        built_at: Optional[float] = None
+    ):
+        """Initialize the model
+
+        Args:
+            symbols (np.ndarray): Sorted symbols, one column each
+            dates (np.ndarray): Dates of the window's returns
+            returns (np.ndarray): dates x symbols daily returns
+            benchmark (np.ndarray): Benchmark daily returns on the same dates
+            window (int): Maximum number of days kept
+            sums (Optional[Dict[str, np.ndarray]]): Running sums, computed from returns when omitted
+            rolls (int): Incremental updates since the sums were last computed from scratch
+            built_at (Optional[float]): Unix time of the last update, defaults to now
+        """
+        self.symbols = symbols
+        self.dates = dates
+        self.returns = returns
+        self.benchmark = benchmark
+        self.window = window
+        self.sums = sums if sums is not None else _sums(returns, benchmark)
+        self.rolls = rolls
+        self.built_at = built_at if built_at is not None else time.time()
+        self._derive()
+
+    @classmethod
+    def build(
+        cls,
+        symbols: np.ndarray,
+        dates: np.ndarray,
+        returns: np.ndarray,
+        benchmark: np.ndarray,
+        window: int = 245
+    ) -> "RiskModel":
+        """Build a model from the last `window` days of returns
+
+        Args:
+            symbols (np.ndarray): Sorted symbols
+            dates (np.ndarray): Return dates, ascending
+            returns (np.ndarray): dates x symbols daily returns
+            benchmark (np.ndarray): Benchmark daily returns on the same dates
+            window (int): Number of days kept
+
+        Returns:
+            RiskModel: The model
+        """
+        return cls(
+            np.asarray(symbols, dtype=str), dates[-window:], returns[-window:], benchmark[-window:], window
+        )
+
+    def roll(self, dates: np.ndarray, returns: np.ndarray, benchmark: np.ndarray) -> "RiskModel":
+        """Move the window forward with the days after the model's last date
+
+        Args:
+            dates (np.ndarray): Return dates, ascending (may overlap the window)
+            returns (np.ndarray): dates x symbols daily returns, same symbols as the model
+            benchmark (np.ndarray): Benchmark daily returns on the same dates
+
+        Returns:
+            RiskModel: The moved model (self when there is no new day)
+        """
+        new = dates > self.dates[-1] if len(self.dates) else np.ones(len(dates), dtype=bool)
+        added = int(new.sum())
+        if added == 0:
+            return self
+        if added >= self.window or self.rolls + 1 >= REBUILD_EVERY:
+            window_dates = np.concatenate((self.dates, dates[new]))
+            return RiskModel.build(
+                self.symbols,
+                window_dates,
+                np.concatenate((self.returns, returns[new])),
+                np.concatenate((self.benchmark, benchmark[new])),
+                self.window
+            )
+
+        dropped = max(0, len(self.dates) + added - self.window)
+        new_rows, old_rows = returns[new], self.returns[:dropped]
+        new_bench, old_bench = benchmark[new], self.benchmark[:dropped]
+        added_sums, removed_sums = _sums(new_rows, new_bench), _sums(old_rows, old_bench)
+        sums = {name: self.sums[name] + added_sums[name] - removed_sums[name] for name in self.sums}
+        return RiskModel(
+            self.symbols,
+            np.concatenate((self.dates[dropped:], dates[new])),
+            np.concatenate((self.returns[dropped:], new_rows)),
+            np.concatenate((self.benchmark[dropped:], new_bench)),
+            self.window,
+            sums,
+            self.rolls + 1
+        )
+
+    def _derive(self) -> None:
+        days = len(self.dates)
+        size = len(self.symbols)
+        self.mean = self.sums['x'] / days if days else np.zeros(size)
+        if days < 2 or size == 0:
+            self.covariance = np.zeros((size, size))
+            self.shrinkage = 0.0
+            self.betas = np.full(size, np.nan)
+            return
+
+        second = self.sums['xx'] / days
+        sample = second - np.outer(self.mean, self.mean)
+        # Ledoit-Wolf intensity (as in scikit-learn, on raw returns)
+        mu = np.trace(second) / size
+        delta = (np.sum(second ** 2) - size * mu ** 2) / size
+        beta = (np.sum(self.sums['x2x2']) / days - np.sum(second ** 2)) / (size * days)
+        self.shrinkage = float(min(max(beta, 0.0), delta) / delta) if delta > 0 else 0.0
+        target = np.trace(sample) / size
+        self.covariance = (1.0 - self.shrinkage) * sample
+        self.covariance[np.diag_indices(size)] += self.shrinkage * target
+
+        bench_mean = self.sums['b'] / days
+        bench_var = self.sums['bb'] / days - bench_mean ** 2
+        covariance_b = self.sums['xb'] / days - self.mean * bench_mean
+        self.betas = covariance_b / bench_var if bench_var > 0 else np.full(size, np.nan)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def portfolio_risk(
+        self,
+        weights: Mapping[str, float],
+        confidence: float = 0.95,
+        horizon_days: int = 1,
+        value: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Risk of a portfolio from the held symbols' block of the covariance
+
+        Only the held symbols' rows and columns are touched, so a query
+        costs O(holdings^2) whatever the size of the universe.
+
+        Args:
+            weights (Mapping[str, float]): Symbol -> portfolio weight (fraction of value)
+            confidence (float): VaR/CVaR confidence level, e.g. 0.95
+            horizon_days (int): Horizon in trading days (square-root-of-time scaling)
+            value (Optional[float]): Portfolio value, to also report losses as amounts
+
+        Returns:
+            Dict[str, Any]: Volatility, parametric and historical VaR/CVaR (as positive
+                losses), beta against the benchmark and per-position risk contributions.
+                Symbols outside the model are listed in "missing".
+
+        Raises:
+            ValueError: Invalid confidence or horizon
+        """
+        if not 0.5 <= confidence < 1.0:
+            raise ValueError("confidence must be in [0.5, 1)")
+        if horizon_days < 1:
+            raise ValueError("horizon_days must be at least 1")
+
+        held: Dict[str, float] = {}
+        for symbol, weight in weights.items():
+            held[symbol.upper()] = held.get(symbol.upper(), 0.0) + float(weight)
+        names = np.array(sorted(held), dtype=str)
+        positions = np.searchsorted(self.symbols, names)
+        found = positions < len(self.symbols)
+        found[found] = self.symbols[positions[found]] == names[found]
+        index = positions[found]
+        symbols = names[found].tolist()
+        w = np.array([held[name] for name in symbols], dtype=np.float64)
+
+        scale = np.sqrt(horizon_days)
+        block = self.covariance[np.ix_(index, index)]
+        marginal = block @ w
+        variance = float(w @ marginal)
+        sigma = np.sqrt(max(variance, 0.0))
+        mean = float(w @ self.mean[index])
+
+        normal = NormalDist()
+        z = normal.inv_cdf(confidence)
+        parametric_var = z * sigma * scale - mean * horizon_days
+        parametric_cvar = sigma * scale * normal.pdf(z) / (1.0 - confidence) - mean * horizon_days
+
+        history = self.returns[:, index] @ w
+        if len(history):
+            cutoff = np.quantile(history, 1.0 - confidence)
+            historical_var = -float(cutoff) * scale
+            historical_cvar = -float(history[history <= cutoff].mean()) * scale
+        else:
+            historical_var = historical_cvar = 0.0
+
+        betas = self.betas[index]
+        contributions = w * marginal / sigma if sigma > 0 else np.zeros(len(w))
+        return {
+            "as_of": str(self.dates[-1]) if len(self.dates) else None,
+            "window": len(self.dates),
+            "confidence": confidence,
+            "horizon_days": horizon_days,
+            "volatility": sigma * scale,
+            "expected_return": mean * horizon_days,
+            "parametric": _losses(parametric_var, parametric_cvar, value),
+            "historical": _losses(historical_var, historical_cvar, value),
+            "beta": _finite(w @ betas),
+            "positions": [
+                {
+                    "symbol": symbol,
+                    "weight": float(weight),
+                    "beta": _finite(beta),
+                    "risk_contribution": float(contribution) * scale,
+                    "risk_share": float(contribution) / sigma if sigma > 0 else 0.0
+                }
+                for symbol, weight, beta, contribution in zip(symbols, w, betas, contributions)
+            ],
+            "missing": names[~found].tolist()
+        }
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Flatten the model into named arrays (for np.savez)"""
+        arrays = {
+            "symbols": self.symbols,
+            "dates": self.dates,
+            "returns": self.returns,
+            "benchmark": self.benchmark,
+            "meta": np.array([self.window, self.rolls, self.built_at], dtype=np.float64)
+        }
+        arrays.update({f"sum/{name}": values for name, values in self.sums.items()})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "RiskModel":
+        """Rebuild a model saved with to_arrays"""
+        window, rolls, built_at = arrays["meta"].tolist()
+        return cls(
+            arrays["symbols"],
+            arrays["dates"],
+            arrays["returns"],
+            arrays["benchmark"],
+            int(window),
+            {key[len("sum/"):]: values for key, values in arrays.items() if key.startswith("sum/")},
+            int(rolls),
+            built_at
+        )
+
+
+def _sums(returns: np.ndarray, benchmark: np.ndarray) -> Dict[str, np.ndarray]:
+    squared = returns ** 2
+    return {
+        'x': returns.sum(axis=0),
+        'xx': returns.T @ returns,
+        'x2x2': squared.T @ squared,
+        'xb': returns.T @ benchmark,
+        'b': np.array(benchmark.sum()),
+        'bb': np.array(benchmark @ benchmark)
+    }
+
+
+def _finite(value: Any) -> Optional[float]:
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _losses(var: float, cvar: float, value: Optional[float]) -> Dict[str, Any]:
+    losses: Dict[str, Any] = {"var": float(var), "cvar": float(cvar)}
+    if value is not None:
+        losses["var_amount"] = float(var) * value
+        losses["cvar_amount"] = float(cvar) * value
+    return losses
+
+
+class RiskModelStore:
+    """Latest risk model, persisted as one .npz file
+
+    The nightly job rolls the stored model forward with the new days (or
+    rebuilds it when the universe changed) and writes it atomically;
+    readers in any process reload it when the file's modification time
+    changes, so requests never compute a covariance.
+    """
+
+    def __init__(self, store_dir: str = "data/risk_model"):
+        """Initialize the store
+
+        Args:
+            store_dir (str): Directory holding the model file
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.store_dir / "risk_model.npz"
+        self._model: Optional[RiskModel] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        symbols: np.ndarray,
+        dates: np.ndarray,
+        returns: np.ndarray,
+        benchmark: np.ndarray,
+        window: int = 245
+    ) -> RiskModel:
+        """Roll the current model forward, or rebuild it if the universe or window changed
+
+        Args:
+            symbols (np.ndarray): Sorted symbols
+            dates (np.ndarray): Return dates, ascending
+            returns (np.ndarray): dates x symbols daily returns
+            benchmark (np.ndarray): Benchmark daily returns on the same dates
+            window (int): Number of days kept
+
+        Returns:
+            RiskModel: The saved model
+        """
+        symbols = np.asarray(symbols, dtype=str)
+        current = self.model()
+        if (
+            current is not None and current.window == window and len(current.dates)
+            and np.array_equal(current.symbols, symbols) and current.dates[-1] in dates
+        ):
+            model = current.roll(dates, returns, benchmark)
+            if model is current:
+                return current
+        else:
+            model = RiskModel.build(symbols, dates, returns, benchmark, window)
+        self.save(model)
+        return model
+
+    def save(self, model: RiskModel) -> None:
+        """Write a model and make it the current one"""
+        tmp_path = self.path.with_suffix('.npz.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **model.to_arrays())
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._model = model
+            self._mtime = self.path.stat().st_mtime
+
+    def model(self) -> Optional[RiskModel]:
+        """Get the current model, None if nothing has been built yet"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            return self._model
+        with self._lock:
+            if self._model is None or mtime != self._mtime:
+                try:
+                    with np.load(self.path, allow_pickle=False) as data:
+                        self._model = RiskModel.from_arrays({key: data[key] for key in data.files})
+                    self._mtime = mtime
+                except Exception as e:
+                    logger.error(f"Error loading risk model: {str(e)}")
+            return self._model
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the model size and age for health reporting"""
+        model = self._model
+        return {
+            "loaded": model is not None,
+            "symbols": len(model) if model is not None else 0,
+            "days": len(model.dates) if model is not None else 0,
+            "shrinkage": round(model.shrinkage, 4) if model is not None else None,
+            "age_seconds": round(time.time() - model.built_at, 1) if model is not None else None
+        }
+
+
+def load_portfolio_weights(session: Any, portfolio_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """Read a stored portfolio's positions as weights by market value
+
+    Positions are valued at their current price (average price when it is
+    missing); several positions in one symbol are added up.
+
+    Args:
+        session (Any): Database session
+        portfolio_id (str): Portfolio id
+        user_id (str): Id of the requesting user; only their own portfolios are read
+
+    Returns:
+        Optional[Dict[str, Any]]: {"name", "value", "weights": symbol -> weight},
+            None if the portfolio does not exist or belongs to another user
+    """
+    from app.models.models import Portfolio, Position, Stock
+
+    portfolio = (
+        session.query(Portfolio)
+        .filter(Portfolio.id == portfolio_id, Portfolio.user_id == user_id)
+        .first()
+    )
+    if portfolio is None:
+        return None
+    rows = (
+        session.query(Stock.symbol, Position.quantity, Position.current_price, Position.average_price)
+        .join(Stock, Position.stock_id == Stock.id)
+        .filter(Position.portfolio_id == portfolio_id)
+        .all()
+    )
+    values: Dict[str, float] = {}
+    for symbol, quantity, current_price, average_price in rows:
+        price = current_price if current_price is not None else average_price
+        values[symbol] = values.get(symbol, 0.0) + float(quantity) * float(price or 0.0)
+    total = sum(values.values())
+    return {
+        "name": portfolio.name,
+        "value": total,
+        "weights": {symbol: value / total for symbol, value in values.items()} if total > 0 else {}
+    }
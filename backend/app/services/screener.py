@@ -0,0 +1,334 @@
+import ast
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Listing columns copied into the table, renamed for the screener
+LISTING_COLUMNS = {
+    'symbol': 'symbol',
+    'organ_name': 'name',
+    'exchange': 'exchange'
+}
+
+# Vendor exchange codes -> names used in filters
+EXCHANGE_ALIASES = {'HSX': 'HOSE'}
+
+# Columns always returned with a screening result
+BASE_COLUMNS = ('symbol', 'name', 'exchange', 'close')
+
+_COMPARISONS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal
+}
+
+_ARITHMETIC: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power
+}
+
+
+def column_name(label: str) -> str:
+    """Turn an indicator or ratio label into a filter column name ("EMA(34)" -> "ema_34")"""
+    return re.sub(r'[^0-9a-z]+', '_', label.lower()).strip('_')
+
+
+class ScreenerTable:
+    """Latest prices, ratios and indicators of every listed symbol, one array per column
+
+    Filters and sorts are Python expressions over column names, e.g.
+    "pe < 12 and roe > 15 and close > ma50 and exchange == 'HOSE'".
+    They are parsed with ast, checked against a whitelist of nodes (column
+    names, constants, comparisons, and/or/not, arithmetic) and evaluated as
+    NumPy operations over whole columns, so a query costs a few vectorized
+    passes whatever the number of symbols. Comparisons with a missing
+    value (NaN) are false.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], version: str, built_at: Optional[float] = None):
+        """Initialize the table
+
+        Args:
+            columns (Dict[str, np.ndarray]): Column name -> values, one row per symbol
+            version (str): Version of the inputs the table was built from
+            built_at (Optional[float]): Unix time of the build, defaults to now
+        """
+        self.columns = columns
+        self.version = version
+        self.built_at = built_at if built_at is not None else time.time()
+        self.size = len(columns['symbol']) if 'symbol' in columns else 0
+
+    @classmethod
+    def build(
+        cls,
+        listing: Dict[str, np.ndarray],
+        latest: Optional[Dict[str, np.ndarray]] = None,
+        ratios: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> "ScreenerTable":
+        """Join the listing with the latest market values and ratios
+
+        Args:
+            listing (Dict[str, np.ndarray]): Universe columns, sorted by symbol
+            latest (Optional[Dict[str, np.ndarray]]): Latest market columns with a sorted 'symbol' column
+            ratios (Optional[Dict[str, Dict[str, float]]]): Symbol -> ratio name -> value
+
+        Returns:
+            ScreenerTable: One row per listed symbol, NaN where a value is missing
+        """
+        symbols = np.asarray(listing.get('symbol', np.empty(0, dtype=object)), dtype=object)
+        columns: Dict[str, np.ndarray] = {}
+        for source, name in LISTING_COLUMNS.items():
+            if source in listing:
+                values = np.asarray(listing[source], dtype=object)
+                if name == 'exchange':
+                    values = np.array([EXCHANGE_ALIASES.get(value, value) for value in values], dtype=object)
+                columns[name] = values
+
+        if latest is not None and len(latest.get('symbol', [])):
+            # Vectorized join on the sorted symbol columns
+            positions = np.searchsorted(latest['symbol'], symbols.astype(str))
+            positions = np.minimum(positions, len(latest['symbol']) - 1)
+            found = latest['symbol'][positions] == symbols.astype(str)
+            for name, values in latest.items():
+                if name == 'symbol':
+                    continue
+                if values.dtype.kind in 'OUS':
+                    column = np.full(len(symbols), None, dtype=object)
+                    column[found] = [value or None for value in values[positions[found]].tolist()]
+                else:
+                    column = np.full(len(symbols), np.nan)
+                    column[found] = values[positions[found]]
+                columns[name] = column
+
+        for name in sorted({name for values in (ratios or {}).values() for name in values}):
+            columns[name] = np.array(
+                [(ratios.get(symbol) or {}).get(name, np.nan) for symbol in symbols], dtype=float
+            )
+
+        digest = hashlib.sha1()
+        for name in sorted(columns):
+            digest.update(name.encode('utf-8'))
+            digest.update(repr(columns[name].tolist()).encode('utf-8'))
+        return cls(columns, digest.hexdigest()[:16])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def compile(self, expression: str) -> ast.AST:
+        """Parse an expression and check it only uses allowed nodes and known columns
+
+        Raises:
+            ValueError: Syntax error, disallowed construct or unknown column
+        """
+        try:
+            tree = ast.parse(expression, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {e.msg}")
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                if node.id not in self.columns:
+                    raise ValueError(f"Unknown column: {node.id}")
+            elif isinstance(node, ast.Constant):
+                if not isinstance(node.value, (int, float, str)) or isinstance(node.value, bool):
+                    raise ValueError(f"Unsupported constant: {node.value!r}")
+            elif not isinstance(node, (
+                ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+                ast.Compare, ast.In, ast.NotIn, ast.BinOp, ast.Load, ast.List, ast.Tuple,
+                *_COMPARISONS, *_ARITHMETIC
+            )):
+                raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+        return tree.body
+
+    def evaluate(self, node: ast.AST) -> Any:
+        """Evaluate a compiled expression to a column (or a constant)"""
+        if isinstance(node, ast.Name):
+            return self.columns[node.id]
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [self.evaluate(item) for item in node.elts]
+        if isinstance(node, ast.BoolOp):
+            masks = [self._mask(self.evaluate(value)) for value in node.values]
+            return np.logical_and.reduce(masks) if isinstance(node.op, ast.And) else np.logical_or.reduce(masks)
+        if isinstance(node, ast.UnaryOp):
+            operand = self.evaluate(node.operand)
+            if isinstance(node.op, ast.Not):
+                return ~self._mask(operand)
+            return -self._numeric(operand) if isinstance(node.op, ast.USub) else self._numeric(operand)
+        if isinstance(node, ast.BinOp):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return _ARITHMETIC[type(node.op)](
+                    self._numeric(self.evaluate(node.left)), self._numeric(self.evaluate(node.right))
+                )
+        if isinstance(node, ast.Compare):
+            mask = np.ones(self.size, dtype=bool)
+            left = self.evaluate(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self.evaluate(comparator)
+                mask &= self._compare(op, left, right)
+                left = right
+            return mask
+        raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+    def _compare(self, op: ast.AST, left: Any, right: Any) -> np.ndarray:
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(right, list):
+                raise ValueError("'in' needs a list of values")
+            mask = np.isin(np.asarray(left, dtype=object), np.asarray(right, dtype=object))
+            return ~mask if isinstance(op, ast.NotIn) else mask
+        if isinstance(left, str) or isinstance(right, str) or _is_text(left) or _is_text(right):
+            if not isinstance(op, (ast.Eq, ast.NotEq)):
+                raise ValueError("Text columns only support == and !=")
+            mask = np.asarray(np.equal(np.asarray(left, dtype=object), np.asarray(right, dtype=object)), dtype=bool)
+            return ~mask if isinstance(op, ast.NotEq) else mask
+        with np.errstate(invalid='ignore'):
+            return np.broadcast_to(_COMPARISONS[type(op)](left, right), (self.size,))
+
+    def _mask(self, value: Any) -> np.ndarray:
+        if isinstance(value, np.ndarray) and value.dtype == bool:
+            return value
+        raise ValueError("and/or/not need conditions on both sides")
+
+    def _numeric(self, value: Any) -> Any:
+        if isinstance(value, str) or _is_text(value):
+            raise ValueError("Arithmetic needs numeric columns")
+        return value
+
+    def query(
+        self,
+        filter_expr: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Filter, sort and project the table (first page of query_page)"""
+        return self.query_page(filter_expr, sort, limit, fields)[0]
+
+    def query_page(
+        self,
+        filter_expr: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        after: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+        """Filter, sort and project one page of the table
+
+        Pages are sought by keyset rather than offset: rows are ordered by
+        (sort key, symbol), and a page starts after the key of the previous
+        page's last row, so deep pages cost the same as the first one and
+        stay consistent when the table is rebuilt in between.
+
+        Args:
+            filter_expr (Optional[str]): Boolean expression rows must satisfy, None for all rows
+            sort (Optional[str]): Expression sorted ascending ("-roe" for descending), None for symbol order
+            limit (int): Maximum number of rows, 0 or less for all
+            fields (Optional[Sequence[str]]): Columns to return, defaults to the base columns
+                plus those used in the filter and sort
+            after (Optional[Sequence[Any]]): Keyset of the previous page's last row,
+                [sort key, symbol] with a sort and [symbol] without
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[List[Any]]]: Matching rows (NaN as None) and
+                the keyset to continue after, None on the last page
+
+        Raises:
+            ValueError: Invalid expression, unknown column or keyset not matching the sort
+        """
+        used: List[str] = []
+        rows = np.arange(self.size)
+        if filter_expr:
+            tree = self.compile(filter_expr)
+            mask = self.evaluate(tree)
+            if not isinstance(mask, np.ndarray) or mask.dtype != bool:
+                raise ValueError("Filter must be a condition")
+            rows = np.flatnonzero(mask)
+            used += [node.id for node in ast.walk(tree) if isinstance(node, ast.Name)]
+        keys = None
+        if sort:
+            tree = self.compile(sort)
+            keys = np.broadcast_to(np.asarray(self._numeric(self.evaluate(tree)), dtype=float), (self.size,))
+            # Missing values sort last
+            keys = np.where(np.isnan(keys), np.inf, keys)
+            used += [node.id for node in ast.walk(tree) if isinstance(node, ast.Name)]
+
+        symbols = self.columns['symbol'].astype(str) if self.size else np.empty(0, dtype=str)
+        if after is not None:
+            if len(after) != (2 if sort else 1):
+                raise ValueError("Cursor does not match the sort")
+            seek = symbols > str(after[-1])
+            if keys is not None:
+                key = float(after[0])
+                seek = (keys > key) | ((keys == key) & seek)
+            rows = rows[seek[rows]]
+        if keys is not None:
+            # Stable over symbol order, so ties are broken by symbol
+            rows = rows[np.argsort(keys[rows], kind='stable')]
+        more = 0 < limit < len(rows)
+        if limit > 0:
+            rows = rows[:limit]
+        last = None
+        if more:
+            last = [str(symbols[rows[-1]])] if keys is None else [float(keys[rows[-1]]), str(symbols[rows[-1]])]
+
+        if fields:
+            unknown = [name for name in fields if name not in self.columns]
+            if unknown:
+                raise ValueError(f"Unknown column: {unknown[0]}")
+            names = list(dict.fromkeys(fields))
+        else:
+            names = [name for name in dict.fromkeys([*BASE_COLUMNS, *used]) if name in self.columns]
+        selected = {name: _to_list(self.columns[name][rows]) for name in names}
+        return ([dict(zip(names, values)) for values in zip(*selected.values())] if names else []), last
+
+
+def _is_text(value: Any) -> bool:
+    return isinstance(value, np.ndarray) and value.dtype == object
+
+
+def _to_list(values: np.ndarray) -> List[Any]:
+    if values.dtype == object:
+        return values.tolist()
+    objects = values.astype(object)
+    objects[np.isnan(values)] = None
+    return objects.tolist()
+
+
+class ScreenerCache:
+    """Holds the table built from the latest inputs
+
+    The key identifies the inputs (universe version, market snapshot time,
+    ratio version); the table is rebuilt only when it changes.
+    """
+
+    def __init__(self):
+        self._key: Any = None
+        self._table: Optional[ScreenerTable] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, build: Callable[[], ScreenerTable]) -> ScreenerTable:
+        """Get the table for key, building it on a change"""
+        with self._lock:
+            if self._table is None or self._key != key:
+                started = time.perf_counter()
+                self._table = build()
+                self._key = key
+                logger.info(
+                    f"Screener table built: {len(self._table)} symbols, "
+                    f"{len(self._table.columns)} columns in {time.perf_counter() - started:.3f}s"
+                )
+            return self._table
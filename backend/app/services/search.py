@@ -0,0 +1,227 @@
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Score of each kind of match; a result's score is the sum over its matches
+SYMBOL_EXACT = 100.0
+SYMBOL_PREFIX = 60.0
+TOKEN_EXACT = 20.0
+TOKEN_PREFIX = 12.0
+NGRAM_WEIGHT = 10.0
+
+NGRAM = 3
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def fold(text: Any) -> str:
+    """Lower-case text without Vietnamese diacritics ("Đầu tư" -> "dau tu")
+
+    đ is not a combining mark, so it is mapped to d explicitly; everything
+    that is not a letter or digit becomes a single space.
+    """
+    if not text:
+        return ''
+    text = str(text).replace('đ', 'd').replace('Đ', 'D')
+    stripped = ''.join(
+        char for char in unicodedata.normalize('NFD', text) if unicodedata.category(char) != 'Mn'
+    )
+    return _NON_ALNUM.sub(' ', stripped.lower()).strip()
+
+
+def ngrams(text: str) -> Set[str]:
+    """Character n-grams of folded text, with word boundaries marked by spaces"""
+    padded = f" {text} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+class _TrieNode:
+    __slots__ = ('children', 'symbols')
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.symbols: Set[str] = set()
+
+
+class SymbolSearchIndex:
+    """In-memory search over symbols and company names
+
+    - Symbols live in a prefix trie whose nodes hold every symbol below
+      them, so a prefix lookup costs O(len(prefix)).
+    - Company names are folded (lower case, no diacritics) and indexed by
+      token (with a sorted token list for token-prefix matches) and by
+      character trigram for fuzzy, partial-word matches.
+
+    Results are ranked by the summed score of their matches. sync() applies
+    only the difference to a new listing, so a refresh touches just the
+    added, removed or renamed symbols.
+    """
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self._names: Dict[str, str] = {}
+        self._tokens: Dict[str, List[str]] = {}
+        self._trie = _TrieNode()
+        self._token_postings: Dict[str, Set[str]] = {}
+        self._sorted_tokens: List[str] = []
+        self._ngram_postings: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get index sizes for health reporting"""
+        with self._lock:
+            return {
+                "version": self.version,
+                "symbols": len(self._names),
+                "tokens": len(self._token_postings),
+                "ngrams": len(self._ngram_postings)
+            }
+
+    def sync(self, records: Iterable[Dict[str, Any]], version: Optional[str] = None) -> Tuple[int, int]:
+        """Bring the index in line with a listing
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Listing rows with 'symbol' and 'organ_name'
+            version (Optional[str]): Version of the listing, kept for change detection
+
+        Returns:
+            Tuple[int, int]: Number of symbols (added or changed, removed)
+        """
+        listing = {
+            str(record['symbol']).upper(): str(record.get('organ_name') or '')
+            for record in records if record.get('symbol')
+        }
+        with self._lock:
+            removed = [symbol for symbol in self._names if symbol not in listing]
+            changed = [symbol for symbol, name in listing.items() if self._names.get(symbol) != name]
+            for symbol in removed + changed:
+                if symbol in self._names:
+                    self._remove(symbol)
+            for symbol in changed:
+                self._add(symbol, listing[symbol])
+            if removed or changed:
+                self._sorted_tokens = sorted(self._token_postings)
+            self.version = version
+        if removed or changed:
+            logger.info(f"Search index synced: {len(changed)} added or changed, {len(removed)} removed")
+        return len(changed), len(removed)
+
+    def _add(self, symbol: str, name: str) -> None:
+        self._names[symbol] = name
+        node = self._trie
+        node.symbols.add(symbol)
+        for char in symbol:
+            node = node.children.setdefault(char, _TrieNode())
+            node.symbols.add(symbol)
+        folded = fold(name)
+        tokens = folded.split()
+        self._tokens[symbol] = tokens
+        for token in set(tokens):
+            self._token_postings.setdefault(token, set()).add(symbol)
+        for gram in ngrams(folded) if folded else ():
+            self._ngram_postings.setdefault(gram, set()).add(symbol)
+
+    def _remove(self, symbol: str) -> None:
+        name = self._names.pop(symbol)
+        node = self._trie
+        node.symbols.discard(symbol)
+        path = []
+        for char in symbol:
+            child = node.children.get(char)
+            if child is None:
+                break
+            child.symbols.discard(symbol)
+            path.append((node, char, child))
+            node = child
+        # Drop branches left empty
+        for parent, char, child in reversed(path):
+            if not child.symbols:
+                del parent.children[char]
+        for token in set(self._tokens.pop(symbol, [])):
+            postings = self._token_postings.get(token)
+            if postings is not None:
+                postings.discard(symbol)
+                if not postings:
+                    del self._token_postings[token]
+        folded = fold(name)
+        for gram in ngrams(folded) if folded else ():
+            postings = self._ngram_postings.get(gram)
+            if postings is not None:
+                postings.discard(symbol)
+                if not postings:
+                    del self._ngram_postings[gram]
+
+    def _symbol_prefix(self, prefix: str) -> Set[str]:
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.symbols
+
+    def _token_prefix(self, prefix: str) -> Iterable[str]:
+        start = bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Find the best matching symbols
+
+        Args:
+            query (str): Symbol prefix or words of the company name, with or without diacritics
+            limit (int): Maximum number of results
+
+        Returns:
+            List[Dict[str, Any]]: {"symbol", "name", "score"}, best first
+        """
+        folded = fold(query)
+        if not folded or limit <= 0:
+            return []
+        compact = folded.replace(' ', '').upper()
+        words = folded.split()
+        scores: Dict[str, float] = {}
+
+        def score(symbols: Iterable[str], points: float) -> None:
+            for symbol in symbols:
+                scores[symbol] = scores.get(symbol, 0.0) + points
+
+        with self._lock:
+            if compact in self._names:
+                score([compact], SYMBOL_EXACT)
+            prefixed = self._symbol_prefix(compact)
+            for symbol in prefixed:
+                # Shorter symbols are closer to the typed prefix
+                score([symbol], SYMBOL_PREFIX * len(compact) / len(symbol))
+
+            for word in words:
+                score(self._token_postings.get(word, ()), TOKEN_EXACT)
+                for token in self._token_prefix(word):
+                    if token != word:
+                        score(self._token_postings[token], TOKEN_PREFIX * len(word) / len(token))
+
+            grams = ngrams(folded)
+            if len(folded) >= NGRAM:
+                shared: Dict[str, int] = {}
+                for gram in grams:
+                    for symbol in self._ngram_postings.get(gram, ()):
+                        shared[symbol] = shared.get(symbol, 0) + 1
+                for symbol, count in shared.items():
+                    # Share of the query's n-grams found in the name
+                    score([symbol], NGRAM_WEIGHT * count / len(grams))
+
+            best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], len(item[0]), item[0]))
+            return [
+                {"symbol": symbol, "name": self._names[symbol], "score": round(points, 3)}
+                for symbol, points in best
+            ]
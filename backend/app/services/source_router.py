@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+
+# Sources able to serve each kind of data, in default preference order.
+# Only kinds whose output can be normalised to one schema list more than
+# one source; the others stay pinned to the source the service always used.
+SUPPORTED_SOURCES: Dict[str, Tuple[str, ...]] = {
+    'quote.history': ('VCI', 'TCBS'),
+    'company.overview': ('VCI',),
+    'company.officers': ('VCI',),
+    'company.shareholders': ('VCI',),
+    'company.dividends': ('TCBS',),
+    'company.events': ('TCBS',),
+    'company.info': ('TCBS',),
+    'finance.balance_sheet': ('VCI',),
+    'finance.income_statement': ('VCI',),
+    'finance.cash_flow': ('VCI',),
+    'finance.financial_ratio': ('VCI',),
+    'finance.ratios': ('TCBS',),
+    'finance.statements': ('TCBS',),
+    'finance.valuation': ('TCBS',)
+}
+
+
+def normalize_history(data: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Bring OHLCV history from any source to the same columns and dtypes"""
+    if data is None:
+        return None
+    frame = pd.DataFrame(data)
+    if frame.empty:
+        return pd.DataFrame({
+            column: pd.Series(dtype='datetime64[ns]' if column == 'time' else 'float64')
+            for column in OHLCV_COLUMNS
+        })
+    frame = frame.rename(columns={'tradingDate': 'time', 'date': 'time'})
+    normalized = pd.DataFrame({'time': pd.to_datetime(frame['time'])})
+    for column in ['open', 'high', 'low', 'close']:
+        normalized[column] = pd.to_numeric(frame[column], errors='coerce').astype('float64')
+    normalized['volume'] = pd.to_numeric(frame['volume'], errors='coerce').fillna(0).astype('int64')
+    return normalized
+
+
+NORMALIZERS: Dict[str, Callable[[Any], Any]] = {
+    'quote.history': normalize_history
+}
+
+
+class LatencyWindow:
+    """Rolling window of call outcomes for one (source, kind)
+
+    Keeps at most size calls, none older than max_age seconds, so an
+    outage stops weighing on the error rate once it is over.
+    """
+
+    def __init__(self, size: int = 200, max_age: float = 300.0):
+        self.max_age = max_age
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=size)
+
+    def _expire(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > self.max_age:
+            self._samples.popleft()
+
+    def add(self, latency: float, success: bool, now: float) -> None:
+        self._expire(now)
+        self._samples.append((now, latency, success))
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        """Get p50/p95 latency of successful calls and the error rate"""
+        self._expire(now)
+        if not self._samples:
+            return {"samples": 0, "p50": None, "p95": None, "error_rate": 0.0}
+        latencies = np.array([latency for _, latency, success in self._samples if success])
+        errors = sum(1 for _, _, success in self._samples if not success)
+        return {
+            "samples": len(self._samples),
+            "p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p95": float(np.percentile(latencies, 95)) if len(latencies) else None,
+            "error_rate": errors / len(self._samples)
+        }
+
+
+class SourceRouter:
+    """Pick the fastest healthy source for each kind of vendor data
+
+    Keeps rolling latency and error statistics per (source, kind). Sources
+    are ranked by health first (open circuit, then error rate above
+    max_error_rate) and by p50 latency second. Sources with no successful
+    samples yet rank first so each one gets tried; ties keep the default
+    preference order. Samples expire after max_age seconds, so a source
+    demoted by an outage is tried again once its errors have aged out.
+    """
+
+    def __init__(
+        self,
+        supported: Optional[Dict[str, Sequence[str]]] = None,
+        window: int = 200,
+        max_error_rate: float = 0.5,
+        is_open: Optional[Callable[[str], bool]] = None,
+        max_age: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initialize the router
+
+        Args:
+            supported (Optional[Dict[str, Sequence[str]]]): Kind -> sources able to serve it
+            window (int): Number of recent calls kept per (source, kind)
+            max_error_rate (float): Error rate above which a source is ranked as unhealthy
+            is_open (Optional[Callable[[str], bool]]): Whether a source's circuit is open
+            max_age (float): Seconds a call outcome counts in the statistics
+            clock (Callable[[], float]): Monotonic time source
+        """
+        self.supported = {kind: tuple(sources) for kind, sources in (supported or SUPPORTED_SOURCES).items()}
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self.is_open = is_open or (lambda source: False)
+        self.max_age = max_age
+        self.clock = clock
+        self._windows: Dict[Tuple[str, str], LatencyWindow] = {}
+        self._lock = threading.Lock()
+
+    def _window(self, source: str, kind: str) -> LatencyWindow:
+        key = (source, kind)
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows.setdefault(key, LatencyWindow(self.window, self.max_age))
+        return window
+
+    def record(self, source: str, kind: str, latency: float, success: bool) -> None:
+        """Record the outcome of one call"""
+        with self._lock:
+            self._window(source, kind).add(latency, success, self.clock())
+
+    def candidates(self, kind: str) -> List[str]:
+        """Get the sources able to serve a kind, best first
+
+        Args:
+            kind (str): Data kind, e.g. 'quote.history'
+
+        Returns:
+            List[str]: Sources ordered by health and latency
+        """
+        sources = self.supported.get(kind)
+        if not sources:
+            raise ValueError(f"No source supports {kind}")
+        if len(sources) == 1:
+            return list(sources)
+
+        with self._lock:
+            now = self.clock()
+            stats = {source: self._window(source, kind).stats(now) for source in sources}
+
+        def rank(item: Tuple[int, str]) -> Tuple[bool, bool, float, int]:
+            preference, source = item
+            source_stats = stats[source]
+            p50 = source_stats["p50"]
+            return (
+                self.is_open(source),
+                source_stats["error_rate"] > self.max_error_rate,
+                # Untried sources rank as fastest so they get sampled
+                p50 if p50 is not None else 0.0,
+                preference
+            )
+
+        return [source for _, source in sorted(enumerate(sources), key=rank)]
+
+    def normalize(self, kind: str, data: Any) -> Any:
+        """Convert a source's output to the common schema of its kind"""
+        normalizer = NORMALIZERS.get(kind)
+        return normalizer(data) if normalizer is not None else data
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get latency and error statistics per source and kind"""
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            now = self.clock()
+            for (source, kind), window in self._windows.items():
+                result.setdefault(source, {})[kind] = window.stats(now)
+        return result
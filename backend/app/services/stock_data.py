@@ -1,11 +1,36 @@
 import logging
+import threading
+import time
+from concurrent.futures import wait
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from vnstock import Vnstock, Listing
 import pandas as pd
 import numpy as np
 
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from .client_registry import VendorClientRegistry
+from .coalescing import flights
+from .fanout import FanOutPool
+from .rate_limit import SourceRateLimiter
+from .circuit_breaker import OPEN, CircuitOpenError, SourceBreakers, is_source_failure
+from .source_router import SourceRouter
+from .price_store import PriceHistoryStore
+from .universe import SymbolUniverse, UniverseSnapshot
+from .company_profile import CompanyProfileCache
+from .financial_bundle import FinancialStatementStore, ReportUnavailableError, default_session_factory
+from .indicators import IndicatorEngine, lookback_days, to_columnar, to_response, trim
+from .indicator_cache import IndicatorSeriesCache
+from .indicator_state import IndicatorStateStore
+from .screener import ScreenerCache, ScreenerTable
+from .market_snapshot import MarketSnapshotStore, market_snapshot_columns
+from .search import SymbolSearchIndex
+from .portfolio import PriceMatrix, align_closes, daily_returns, portfolio_performance
+from .risk import RiskModel, RiskModelStore, RiskModelUnavailableError, load_portfolio_weights
+from .market_indicators import ALL_INDICATORS, MarketIndicatorSnapshot, MarketIndicatorStore, load_market_matrix
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -13,28 +38,374 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Process-wide vendor clients shared by every service instance
+client_registry = VendorClientRegistry(
+    idle_seconds=settings.VNSTOCK_CLIENT_IDLE_SECONDS,
+    max_entries=settings.VNSTOCK_CLIENT_MAX_ENTRIES
+)
+
+# Per-source request rate caps shared by every service instance
+source_limiter = SourceRateLimiter(
+    settings.SOURCE_RATE_LIMITS,
+    min_rate=settings.SOURCE_MIN_RATE,
+    target_latency=settings.SOURCE_TARGET_LATENCY_SECONDS
+)
+
+# Per-source circuit breakers shared by every service instance
+source_breakers = SourceBreakers(
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_RESET_SECONDS
+)
+
+# Latency-aware source selection shared by every service instance
+source_router = SourceRouter(
+    window=settings.SOURCE_ROUTER_WINDOW,
+    max_error_rate=settings.SOURCE_MAX_ERROR_RATE,
+    # Half-open sources keep their rank so they get their trial call
+    is_open=lambda source: source_breakers.state(source) == OPEN,
+    max_age=settings.SOURCE_ROUTER_MAX_AGE_SECONDS
+)
+
+# Bounded pool running every parallel fan-out of vendor calls
+fanout_pool = FanOutPool(settings.FANOUT_POOL_SIZE, thread_name_prefix="vendor-fanout")
+
+# Local daily OHLCV history shared by every service instance
+price_store = PriceHistoryStore(settings.PRICE_STORE_DIR, live_ttl=settings.PRICE_LIVE_TTL_SECONDS)
+
+# Company profile sections shared by every service instance
+company_profiles = CompanyProfileCache(
+    ttls=settings.PROFILE_TTL_SECONDS,
+    max_entries=settings.PROFILE_CACHE_MAX_ENTRIES,
+    pool=fanout_pool
+)
+
+# Financial statement bundles shared by every service instance
+financial_store = FinancialStatementStore(
+    session_factory=default_session_factory if settings.FINANCIAL_PERSIST else None,
+    recheck_seconds=settings.FINANCIAL_RECHECK_SECONDS,
+    quarter_lag_days=settings.FINANCIAL_QUARTER_LAG_DAYS,
+    year_lag_days=settings.FINANCIAL_YEAR_LAG_DAYS,
+    retry_seconds=settings.FINANCIAL_RETRY_SECONDS,
+    max_bundles=settings.FINANCIAL_CACHE_MAX_BUNDLES
+)
+
+# Full-history indicator series shared by every service instance
+indicator_cache = IndicatorSeriesCache(max_symbols=settings.INDICATOR_CACHE_MAX_SYMBOLS)
+
+# Streaming indicator state shared by every service instance
+indicator_states = IndicatorStateStore(
+    settings.INDICATOR_STATE_DIR,
+    max_symbols=settings.INDICATOR_STATE_MAX_SYMBOLS
+)
+
+# Nightly market-wide indicators shared by every service instance
+market_indicators = MarketIndicatorStore(settings.MARKET_INDICATOR_DIR)
+
+def _load_listing() -> Any:
+    """Listed symbols, with their exchange when the vendor provides it"""
+    listing = client_registry.get_listing()
+    symbols = listing.all_symbols()
+    try:
+        exchanges = listing.symbols_by_exchange()
+        if isinstance(symbols, pd.DataFrame) and isinstance(exchanges, pd.DataFrame) \
+                and 'exchange' in exchanges.columns and 'exchange' not in symbols.columns:
+            symbols = symbols.merge(
+                exchanges[['symbol', 'exchange']].drop_duplicates('symbol'), on='symbol', how='left'
+            )
+    except Exception as e:
+        logger.warning(f"Listing without exchanges: {str(e)}")
+    return symbols
+
+# Listed symbols, kept in memory and refreshed in the background
+symbol_universe = SymbolUniverse(
+    loader=_load_listing,
+    refresh_seconds=settings.UNIVERSE_REFRESH_SECONDS
+)
+
+# Symbol and company-name search, synced with every new listing
+search_index = SymbolSearchIndex()
+symbol_universe.subscribe(
+    lambda snapshot: search_index.sync(snapshot.iter_rows(['symbol', 'organ_name']), snapshot.version)
+)
+
+# Screener table over the latest universe, market indicators and ratios
+screener_tables = ScreenerCache()
+
+# Nightly materialized market snapshot shared by every service instance
+market_snapshots = MarketSnapshotStore(settings.MARKET_SNAPSHOT_DIR, keep=settings.MARKET_SNAPSHOT_KEEP)
+
+# Nightly covariance risk model shared by every service instance
+risk_models = RiskModelStore(settings.RISK_MODEL_DIR)
+
 class StockDataService:
     """Service for retrieving stock market data"""
     
-    def __init__(self):
-        """Initialize the service"""
-        self.listing = Listing()
+    def __init__(
+        self,
+        registry: Optional[VendorClientRegistry] = None,
+        limiter: Optional[SourceRateLimiter] = None,
+        store: Optional[PriceHistoryStore] = None,
+        breakers: Optional[SourceBreakers] = None,
+        router: Optional[SourceRouter] = None,
+        universe: Optional[SymbolUniverse] = None,
+        profiles: Optional[CompanyProfileCache] = None,
+        financials: Optional[FinancialStatementStore] = None,
+        states: Optional[IndicatorStateStore] = None,
+        market: Optional[MarketIndicatorStore] = None,
+        series_cache: Optional[IndicatorSeriesCache] = None,
+        snapshots: Optional[MarketSnapshotStore] = None,
+        risk: Optional[RiskModelStore] = None,
+        pool: Optional[FanOutPool] = None
+    ):
+        """Initialize the service
+        
+        Args:
+            registry (Optional[VendorClientRegistry]): Vendor client registry, defaults to the shared one
+            limiter (Optional[SourceRateLimiter]): Per-source rate limiter, defaults to the shared one
+            store (Optional[PriceHistoryStore]): Daily price store, defaults to the shared one
+            breakers (Optional[SourceBreakers]): Per-source circuit breakers, defaults to the shared ones
+            router (Optional[SourceRouter]): Source selection, defaults to the shared one
+            universe (Optional[SymbolUniverse]): Symbol universe, defaults to the shared one
+            profiles (Optional[CompanyProfileCache]): Company profile cache, defaults to the shared one
+            financials (Optional[FinancialStatementStore]): Financial statement store, defaults to the shared one
+            states (Optional[IndicatorStateStore]): Streaming indicator state, defaults to the shared one
+            market (Optional[MarketIndicatorStore]): Market-wide indicator store, defaults to the shared one
+            series_cache (Optional[IndicatorSeriesCache]): Indicator series cache, defaults to the shared one
+            snapshots (Optional[MarketSnapshotStore]): Nightly market snapshot, defaults to the shared one
+            risk (Optional[RiskModelStore]): Covariance risk model, defaults to the shared one
+            pool (Optional[FanOutPool]): Runs parallel vendor calls, defaults to the shared one
+        """
+        self.registry = registry or client_registry
+        self.limiter = limiter or source_limiter
+        self.price_store = store or price_store
+        self.breakers = breakers or source_breakers
+        self.router = router or source_router
+        self.universe = universe or symbol_universe
+        self.profiles = profiles or company_profiles
+        self.financials = financials or financial_store
+        self.indicator_states = states or indicator_states
+        self.market_indicators = market or market_indicators
+        self.indicator_cache = series_cache or indicator_cache
+        self.market_snapshots = snapshots or market_snapshots
+        self.risk_models = risk or risk_models
+        self.fanout = pool or fanout_pool
+        self.listing = self.registry.get_listing()
+        
+    def _get_stock(self, symbol: str, source: str = 'VCI') -> Any:
+        """Get a reusable vendor client for a symbol"""
+        return self.registry.get(symbol, source)
+        
+    def _vendor_call(self, source: str, func: Any, *args: Any, **kwargs: Any) -> Any:
+        """Call the vendor through the source's circuit breaker and rate limit
+        
+        Only transport, timeout, throttling and 5xx errors count against the
+        source; other errors (unknown symbol, empty data, client errors) are
+        re-raised without touching the breaker or the rate.
+        
+        Raises:
+            CircuitOpenError: If the source is currently considered unhealthy
+        """
+        breaker = self.breakers.get(source)
+        breaker.before_call()
+        self.limiter.acquire(source)
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_source_failure(e):
+                self.limiter.record(source, False, time.monotonic() - started)
+                breaker.record_failure()
+            else:
+                # The source answered: release a half-open trial without judging it
+                breaker.release_trial()
+            raise
+        self.limiter.record(source, True, time.monotonic() - started)
+        breaker.record_success()
+        return result
+        
+    def _routed_call(self, kind: str, symbol: str, call: Callable[[Any], Any]) -> Any:
+        """Run a vendor call on the best source for its kind, failing over in order
+        
+        Only source failures (and open circuits) move on to the next source;
+        any other error is about the request and is re-raised as is, since
+        every source would reject it too.
         
+        Args:
+            kind (str): Data kind, e.g. 'quote.history'
+            symbol (str): Stock symbol
+            call (Callable[[Any], Any]): Receives the source's stock client and performs the call
+            
+        Returns:
+            Any: Result normalised to the kind's common schema
+        """
+        last_error: Optional[Exception] = None
+        for source in self.router.candidates(kind):
+            started = time.monotonic()
+            try:
+                stock = self._get_stock(symbol, source)
+                result = self._vendor_call(source, call, stock)
+            except CircuitOpenError as e:
+                last_error = e
+                continue
+            except Exception as e:
+                if not is_source_failure(e):
+                    raise
+                self.router.record(source, kind, time.monotonic() - started, False)
+                logger.warning(f"{kind} for {symbol} failed on {source}: {str(e)}")
+                last_error = e
+                continue
+            self.router.record(source, kind, time.monotonic() - started, True)
+            return self.router.normalize(kind, result)
+        raise last_error
+        
+    def get_universe(self) -> UniverseSnapshot:
+        """Get the current in-memory snapshot of listed symbols
+        
+        Returns:
+            UniverseSnapshot: Listing snapshot with its version
+        """
+        try:
+            return self.universe.snapshot()
+        except Exception as e:
+            logger.error(f"Error loading symbol universe: {str(e)}")
+            raise
+    
+    def search_stocks(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Search symbols by prefix and companies by name (diacritics optional)
+        
+        Args:
+            query (str): Search text, e.g. "VN", "vinamilk", "ngan hang"
+            limit (int): Maximum number of results
+            
+        Returns:
+            List[Dict[str, Any]]: {"symbol", "name", "score"}, best first
+        """
+        snapshot = self.get_universe()
+        if search_index.version != snapshot.version:
+            # Only the difference to the indexed listing is applied
+            search_index.sync(snapshot.iter_rows(['symbol', 'organ_name']), snapshot.version)
+        return search_index.search(query, limit)
+    
     def get_stock_list(self) -> List[Dict[str, Any]]:
         """Get list of all available stocks
         
         Returns:
             List[Dict[str, Any]]: List of stocks with their basic information
         """
+        return self.get_universe().rows()
+    
+    def get_stock_list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of the stock list, sorted by symbol
+        
+        Args:
+            cursor (Optional[str]): Cursor returned with the previous page, None for the first page
+            limit (int): Maximum number of stocks, 0 or less for all remaining
+            fields (Optional[List[str]]): Listing columns to return, defaults to all
+            
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: Stocks and the cursor of the next page
+            
+        Raises:
+            ValueError: Invalid cursor or unknown field
+        """
+        after = decode_cursor(cursor, 1, (str,))
+        rows, last = self.get_universe().page(after[0] if after else None, limit, fields)
+        return rows, encode_cursor([last]) if last is not None else None
+    
+    def get_price_history(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        interval: str = '1D'
+    ) -> Optional[pd.DataFrame]:
+        """Get OHLCV history for a stock
+        
+        Daily bars are served from the local price store, which only asks the
+        vendor for bars it does not hold yet.
+        
+        Args:
+            symbol (str): Stock symbol
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            interval (str): Bar interval
+            
+        Returns:
+            Optional[pd.DataFrame]: Historical price bars
+        """
+        if interval != '1D':
+            return self._fetch_price_history(symbol, start_date, end_date, interval)
         try:
-            stocks = self.listing.all_symbols()
-            if stocks is not None:
-                stocks = pd.DataFrame(stocks)
-                return stocks.to_dict('records')
-            return []
+            return self.price_store.get(symbol, start_date, end_date, self._fetch_price_history)
         except Exception as e:
-            logger.error(f"Error getting stock list: {str(e)}")
-            raise
+            # Serve what we already hold while every source is unhealthy
+            stale = self.price_store.read(symbol, start_date, end_date)
+            if stale.empty:
+                raise
+            logger.warning(f"Serving stale price data for {symbol}: {str(e)}")
+            return stale
+    
+    def get_price_arrays(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Get daily bars as typed column arrays from the price archive
+        
+        Args:
+            symbol (str): Stock symbol
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            columns (Optional[List[str]]): Columns to read (time, open, high, low, close, volume)
+            
+        Returns:
+            Dict[str, np.ndarray]: Column name -> float64/int64/datetime64 array
+        """
+        try:
+            return self.price_store.get_arrays(
+                symbol, start_date, end_date, self._fetch_price_history, columns
+            )
+        except Exception as e:
+            stale = self.price_store.archive.read_columns(symbol, start_date, end_date, columns)
+            if not any(len(values) for values in stale.values()):
+                raise
+            logger.warning(f"Serving stale price arrays for {symbol}: {str(e)}")
+            return stale
+    
+    def sync_price_history(self, symbol: str, start_date: str, end_date: str) -> int:
+        """Fetch the daily bars of a window that are missing from the price store
+        
+        Args:
+            symbol (str): Stock symbol
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            
+        Returns:
+            int: Number of bars fetched from the vendor
+        """
+        return self.price_store.sync(symbol, start_date, end_date, self._fetch_price_history)
+    
+    @flights.coalesce()
+    def _fetch_price_history(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        interval: str = '1D'
+    ) -> Optional[pd.DataFrame]:
+        """Fetch raw OHLCV history for a stock from the fastest healthy source"""
+        return self._routed_call(
+            'quote.history',
+            symbol,
+            lambda stock: stock.quote.history(start=start_date, end=end_date, interval=interval)
+        )
     
     def get_stock_price(self, symbol: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get historical price data for a stock
@@ -48,15 +419,7 @@ class StockDataService:
             Dict[str, Any]: Historical price data
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get historical data
-            hist_data = stock.quote.history(
-                start=start_date,
-                end=end_date,
-                interval='1D'
-            )
+            hist_data = self.get_price_history(symbol, start_date, end_date)
             
             if hist_data is not None:
                 hist_data = hist_data.infer_objects(copy=False)
@@ -72,6 +435,61 @@ class StockDataService:
             logger.error(f"Error getting price data for {symbol}: {str(e)}")
             raise
     
+    def get_stock_prices(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Get historical price data for many stocks at once
+        
+        Symbols are fetched in parallel, bounded by max_concurrency and by the
+        per-source rate limit. A failing symbol is reported in "errors" and
+        does not fail the batch.
+        
+        Args:
+            symbols (List[str]): Stock symbols
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            max_concurrency (Optional[int]): Maximum parallel fetches
+            
+        Returns:
+            Dict[str, Any]: Price data and errors keyed by symbol
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        
+        if unique_symbols:
+            futures = self.fanout.submit_all(
+                {symbol: partial(self.get_stock_price, symbol, start_date, end_date) for symbol in unique_symbols},
+                limit=max_concurrency or settings.BATCH_MAX_CONCURRENCY
+            )
+            for symbol, future in futures.items():
+                try:
+                    results[symbol] = future.result()["data"]
+                except Exception as e:
+                    errors[symbol] = str(e)
+        
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "data": {symbol: results[symbol] for symbol in unique_symbols if symbol in results},
+            "errors": errors
+        }
+    
+    def _fetch_profile_section(self, symbol: str, section: str) -> List[Dict[str, Any]]:
+        """Fetch one company profile section from the vendor as rows"""
+        data = self._routed_call(
+            f'company.{section}',
+            symbol,
+            lambda stock: getattr(stock.company, section)()
+        )
+        if data is None or len(data) == 0:
+            return []
+        return data.infer_objects(copy=False).to_dict('records')
+    
     def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """Get company information for a stock
         
@@ -82,21 +500,10 @@ class StockDataService:
             Dict[str, Any]: Company information
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get company overview
-            overview = stock.company.overview()
-            
-            if overview is not None:
-                overview = overview.infer_objects(copy=False)
-                return {
-                    "symbol": symbol,
-                    "data": overview.to_dict('records')[0] if len(overview) > 0 else {}
-                }
+            overview = self.profiles.get(symbol, 'overview', self._fetch_profile_section)
             return {
                 "symbol": symbol,
-                "data": {}
+                "data": overview[0] if overview else {}
             }
         except Exception as e:
             logger.error(f"Error getting company info for {symbol}: {str(e)}")
@@ -112,21 +519,10 @@ class StockDataService:
             Dict[str, Any]: Basic company information
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get basic company info using overview()
-            basic_info = stock.company.overview()
-            
-            if basic_info is not None:
-                basic_info = basic_info.infer_objects(copy=False)
-                return {
-                    "symbol": symbol,
-                    "data": basic_info.to_dict('records')[0] if len(basic_info) > 0 else {}
-                }
+            overview = self.profiles.get(symbol, 'overview', self._fetch_profile_section)
             return {
                 "symbol": symbol,
-                "data": {}
+                "data": overview[0] if overview else {}
             }
         except Exception as e:
             logger.error(f"Error getting basic company info for {symbol}: {str(e)}")
@@ -142,21 +538,10 @@ class StockDataService:
             Dict[str, Any]: Management information
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get management info using officers()
-            management = stock.company.officers()
-            
-            if management is not None:
-                management = management.infer_objects(copy=False)
-                return {
-                    "symbol": symbol,
-                    "data": management.to_dict('records') if len(management) > 0 else []
-                }
+            officers = self.profiles.get(symbol, 'officers', self._fetch_profile_section)
             return {
                 "symbol": symbol,
-                "data": []
+                "data": officers
             }
         except Exception as e:
             logger.error(f"Error getting management info for {symbol}: {str(e)}")
@@ -172,26 +557,16 @@ class StockDataService:
             Dict[str, Any]: Major shareholders information
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get major shareholders info using shareholders()
-            major_shareholders = stock.company.shareholders()
-            
-            if major_shareholders is not None:
-                major_shareholders = major_shareholders.infer_objects(copy=False)
-                return {
-                    "symbol": symbol,
-                    "data": major_shareholders.to_dict('records') if len(major_shareholders) > 0 else []
-                }
+            shareholders = self.profiles.get(symbol, 'shareholders', self._fetch_profile_section)
             return {
                 "symbol": symbol,
-                "data": []
+                "data": shareholders
             }
         except Exception as e:
             logger.error(f"Error getting major shareholders info for {symbol}: {str(e)}")
             raise
     
+    @flights.coalesce()
     def get_stock_dividend_history(self, symbol: str) -> Dict[str, Any]:
         """Get dividend history for a stock
         
@@ -202,11 +577,12 @@ class StockDataService:
             Dict[str, Any]: Dividend history
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='TCBS')
-            
             # Get dividend history using dividends()
-            dividend_history = stock.company.dividends()
+            dividend_history = self._routed_call(
+                'company.dividends',
+                symbol,
+                lambda stock: stock.company.dividends()
+            )
             
             if dividend_history is not None:
                 dividend_history = dividend_history.infer_objects(copy=False)
@@ -232,29 +608,61 @@ class StockDataService:
             Dict[str, Any]: Events information
         """
         try:
-            # Initialize stock with TCBS source for better event data
-            stock = Vnstock().stock(symbol=symbol, source='TCBS')
-            
-            # Get events
-            events = stock.company.events()
-            
-            if events is not None:
-                events = events.infer_objects(copy=False)
-                return {
-                    "symbol": symbol,
-                    "data": events.to_dict('records') if len(events) > 0 else []
-                }
+            events = self.profiles.get(symbol, 'events', self._fetch_profile_section)
             return {
                 "symbol": symbol,
-                "data": []
+                "data": events
             }
         except Exception as e:
             logger.error(f"Error getting events for {symbol}: {str(e)}")
             raise
     
+    def _fetch_financial_bundle(self, symbol: str, period: str, lang: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch every financial report of a symbol from the vendor in one pass
+        
+        A report that fails is logged and left out, so the others are still
+        stored; only when every report fails is the error raised.
+        
+        Args:
+            symbol (str): Stock symbol
+            period (str): Period of the reports (year, quarter)
+            lang (str): Language of the reports (vi, en)
+            
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: Report type -> rows, for the reports that loaded
+        """
+        calls = {
+            'balance_sheet': lambda stock: stock.finance.balance_sheet(period=period, lang=lang),
+            'income_statement': lambda stock: stock.finance.income_statement(period=period, lang=lang),
+            'cash_flow': lambda stock: stock.finance.cash_flow(period=period, lang=lang),
+            'financial_ratio': lambda stock: stock.finance.financial_ratio(period=period)
+        }
+        
+        def fetch(report_type: str) -> List[Dict[str, Any]]:
+            data = self._routed_call(f'finance.{report_type}', symbol, calls[report_type])
+            if data is None:
+                return []
+            return data.infer_objects(copy=False).to_dict('records')
+        
+        futures = self.fanout.submit_all({report_type: partial(fetch, report_type) for report_type in calls})
+        reports: Dict[str, List[Dict[str, Any]]] = {}
+        error: Optional[Exception] = None
+        for report_type, future in futures.items():
+            try:
+                reports[report_type] = future.result()
+            except Exception as e:
+                logger.warning(f"{report_type} not available for {symbol}: {str(e)}")
+                error = error or e
+        if not reports and error is not None:
+            raise error
+        return reports
+    
     def get_stock_financials(self, symbol: str, report_type: str = 'balance_sheet', period: str = 'year', lang: str = 'vi') -> Dict[str, Any]:
         """Get financial statements for a stock
         
+        All statements of a (symbol, period, lang) are loaded and stored
+        together, so asking for the other report types is served locally.
+        
         Args:
             symbol (str): Stock symbol
             report_type (str): Type of financial statement (balance_sheet, income_statement, cash_flow)
@@ -265,32 +673,16 @@ class StockDataService:
             Dict[str, Any]: Financial statements data
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get financial data using the appropriate method
-            if report_type == 'balance_sheet':
-                data = stock.finance.balance_sheet(period=period, lang=lang)
-            elif report_type == 'income_statement':
-                data = stock.finance.income_statement(period=period, lang=lang)
-            elif report_type == 'cash_flow':
-                data = stock.finance.cash_flow(period=period, lang=lang)
-            else:
-                data = stock.finance.balance_sheet(period=period, lang=lang)
-            
-            if data is not None:
-                data = data.infer_objects(copy=False)
-                return {
-                    "symbol": symbol,
-                    "report_type": report_type,
-                    "period": period,
-                    "data": data.to_dict('records')
-                }
+            bundle = self.financials.get(symbol, period, lang, self._fetch_financial_bundle)
+            statement = report_type if report_type in ('income_statement', 'cash_flow') else 'balance_sheet'
+            if statement in bundle.get('missing', []):
+                raise ReportUnavailableError(symbol, statement)
             return {
                 "symbol": symbol,
                 "report_type": report_type,
                 "period": period,
-                "data": []
+                "data": bundle['reports'][statement],
+                "stale": statement in bundle.get('stale', [])
             }
         except Exception as e:
             logger.error(f"Error getting financial data for {symbol}: {str(e)}")
@@ -307,236 +699,565 @@ class StockDataService:
             Dict[str, Any]: Financial ratio data
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get financial ratios
-            data = stock.finance.financial_ratio(period=period)
-            
-            if data is not None:
-                data = data.infer_objects(copy=False)
-                return {
-                    "symbol": symbol,
-                    "period": period,
-                    "data": data.to_dict('records')
-                }
+            bundle = self.financials.get(symbol, period, 'vi', self._fetch_financial_bundle)
+            if 'financial_ratio' in bundle.get('missing', []):
+                raise ReportUnavailableError(symbol, 'financial_ratio')
             return {
                 "symbol": symbol,
                 "period": period,
-                "data": []
+                "data": bundle['reports']['financial_ratio'],
+                "stale": 'financial_ratio' in bundle.get('stale', [])
             }
         except Exception as e:
             logger.error(f"Error getting financial ratio for {symbol}: {str(e)}")
             raise
     
-    def screen_stocks(self, limit: int = 100) -> List[Dict[str, Any]]:
+    def screen_stocks(
+        self,
+        limit: int = 100,
+        filter_expr: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Screen stocks based on criteria
         
+        Without a filter or sort the listing is returned as before (symbol
+        and name, sorted by symbol). Otherwise the expressions are evaluated
+        over the screener table, e.g. filter_expr="pe < 12 and close > ma50
+        and exchange == 'HOSE'", sort="-roe".
+        
         Args:
             limit (int): Maximum number of stocks to return
+            filter_expr (Optional[str]): Boolean expression over the table columns
+            sort (Optional[str]): Expression to sort by, ascending ("-col" for descending)
+            fields (Optional[List[str]]): Columns to return
             
         Returns:
-            List[Dict[str, Any]]: List of screened stocks with basic information
+            List[Dict[str, Any]]: List of screened stocks
+            
+        Raises:
+            ValueError: Invalid expression or unknown column
         """
-        try:
-            # Get all stocks from listing
-            stocks = self.listing.all_symbols()
+        return self.screen_stocks_page(limit, filter_expr, sort, fields)[0]
+    
+    def screen_stocks_page(
+        self,
+        limit: int = 100,
+        filter_expr: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Screen stocks one page at a time
+        
+        Pages continue after the (sort key, symbol) of the previous page's
+        last row, so paging deep into a result does not re-scan the
+        skipped rows.
+        
+        Args:
+            limit (int): Maximum number of stocks per page
+            filter_expr (Optional[str]): Boolean expression over the table columns
+            sort (Optional[str]): Expression to sort by, ascending ("-col" for descending)
+            fields (Optional[List[str]]): Columns to return
+            cursor (Optional[str]): Cursor returned with the previous page, None for the first page
             
-            if stocks is not None:
-                stocks = pd.DataFrame(stocks)
-                
-                # Check if DataFrame is empty
-                if stocks.empty:
-                    return []
-                    
-                # Get available columns
-                available_columns = stocks.columns.tolist()
-                logger.info(f"Available columns: {available_columns}")
-                
-                # Select and rename columns
-                columns_map = {
-                    'symbol': 'symbol',
-                    'organ_name': 'name'
-                }
-                
-                # Filter columns that exist in the DataFrame
-                selected_columns = {k: v for k, v in columns_map.items() if k in available_columns}
-                
-                # Select and rename columns
-                screened_stocks = stocks[list(selected_columns.keys())].rename(columns=selected_columns)
-                
-                # Sort by symbol
-                screened_stocks = screened_stocks.sort_values('symbol')
-                
-                # Limit the number of results
-                if limit > 0:
-                    screened_stocks = screened_stocks.head(limit)
-                    
-                return screened_stocks.to_dict('records')
-            return []
-        except Exception as e:
-            logger.error(f"Error screening stocks: {str(e)}")
-            raise
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: Stocks and the cursor of the next page
+            
+        Raises:
+            ValueError: Invalid expression, unknown column or invalid cursor
+        """
+        if not filter_expr and not sort and not fields:
+            after = decode_cursor(cursor, 1, (str,))
+            rows, last = self.get_universe().page(after[0] if after else None, limit, screen=True)
+            return rows, encode_cursor([last]) if last is not None else None
+        after = decode_cursor(cursor, 2 if sort else 1, (float, str) if sort else (str,))
+        rows, last = self.get_screener_table().query_page(filter_expr, sort, limit, fields, after)
+        return rows, encode_cursor(last) if last is not None else None
+    
+    def get_screener_table(self) -> ScreenerTable:
+        """Get the screener table
+        
+        The nightly materialized snapshot is used when one has been
+        published; otherwise a table is built from the current universe,
+        market indicators and loaded ratios, and rebuilt when they change.
+        
+        Returns:
+            ScreenerTable: One row per listed symbol
+        """
+        nightly = self.market_snapshots.current()
+        if nightly is not None:
+            return nightly
+        universe = self.get_universe()
+        market = self.market_indicators.snapshot()
+        key = (universe.version, market.computed_at if market is not None else None, self.financials.version)
+        return screener_tables.get(key, lambda: ScreenerTable.build(
+            universe.columns,
+            market.latest_columns() if market is not None else None,
+            self.financials.latest_ratios()
+        ))
     
     def get_technical_analysis(
         self,
         symbol: str,
         start_date: str,
         end_date: str,
-        indicators: List[str] = ["MA", "RSI", "MACD", "BB"]
+        indicators: List[str] = ["MA", "RSI", "MACD", "BB"],
+        layout: str = "index"
     ) -> Dict[str, Any]:
         """Get technical analysis for a stock
         
+        Enough history before start_date is read for every requested
+        indicator to be valid from the first returned bar; the output is
+        trimmed back to [start_date, end_date]. Series are served from the
+        indicator cache when the stored bars cover the window.
+        
         Args:
             symbol (str): Stock symbol
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
-            indicators (List[str]): List of technical indicators to calculate
+            indicators (List[str]): Indicator specs (see indicators.INDICATORS), e.g. "MA", "EMA(34)"
+            layout (str): "index" ({row: value} per series) or "columnar" (shared dates, one array per series)
             
         Returns:
             Dict[str, Any]: Technical analysis data
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='VCI')
-            
-            # Get historical data
-            hist_data = stock.quote.history(
-                start=start_date,
-                end=end_date,
-                interval='1D'
-            )
+            hist_data = self.get_price_history(symbol, self.warmup_start(start_date, indicators), end_date)
             
-            if hist_data is None:
+            if hist_data is None or hist_data.empty:
                 return {
                     "symbol": symbol,
                     "data": {}
                 }
                 
-            # Calculate technical indicators
-            analysis = {}
-            
-            if "MA" in indicators:
-                # Calculate Moving Averages
-                ma5 = hist_data['close'].rolling(window=5).mean()
-                ma10 = hist_data['close'].rolling(window=10).mean()
-                ma20 = hist_data['close'].rolling(window=20).mean()
-                ma50 = hist_data['close'].rolling(window=50).mean()
-                ma200 = hist_data['close'].rolling(window=200).mean()
-                
-                # Replace NaN with None
-                analysis["MA"] = {
-                    "MA5": ma5.replace({pd.NA: None, np.nan: None}).to_dict(),
-                    "MA10": ma10.replace({pd.NA: None, np.nan: None}).to_dict(),
-                    "MA20": ma20.replace({pd.NA: None, np.nan: None}).to_dict(),
-                    "MA50": ma50.replace({pd.NA: None, np.nan: None}).to_dict(),
-                    "MA200": ma200.replace({pd.NA: None, np.nan: None}).to_dict()
-                }
-                
-            if "RSI" in indicators:
-                # Calculate RSI
-                delta = hist_data['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                # Replace NaN with None
-                analysis["RSI"] = rsi.replace({pd.NA: None, np.nan: None}).to_dict()
-                
-            if "MACD" in indicators:
-                # Calculate MACD
-                exp1 = hist_data['close'].ewm(span=12, adjust=False).mean()
-                exp2 = hist_data['close'].ewm(span=26, adjust=False).mean()
-                macd = exp1 - exp2
-                signal = macd.ewm(span=9, adjust=False).mean()
-                # Replace NaN with None
-                analysis["MACD"] = {
-                    "MACD": macd.replace({pd.NA: None, np.nan: None}).to_dict(),
-                    "Signal": signal.replace({pd.NA: None, np.nan: None}).to_dict()
-                }
-                
-            if "BB" in indicators:
-                # Calculate Bollinger Bands
-                sma = hist_data['close'].rolling(window=20).mean()
-                std = hist_data['close'].rolling(window=20).std()
-                # Replace NaN with None
-                analysis["BB"] = {
-                    "Upper": (sma + (std * 2)).replace({pd.NA: None, np.nan: None}).to_dict(),
-                    "Middle": sma.replace({pd.NA: None, np.nan: None}).to_dict(),
-                    "Lower": (sma - (std * 2)).replace({pd.NA: None, np.nan: None}).to_dict()
-                }
-            
             return {
                 "symbol": symbol,
-                "data": analysis
+                "data": self.cached_technical_indicators(
+                    symbol, hist_data, indicators, start_date, end_date, layout=layout
+                )
             }
         except Exception as e:
             logger.error(f"Error getting technical analysis for {symbol}: {str(e)}")
             raise
             
-    def get_fundamental_analysis(self, symbol: str) -> Dict[str, Any]:
+    def cached_technical_indicators(
+        self,
+        symbol: str,
+        hist_data: pd.DataFrame,
+        indicators: List[str],
+        start_date: str,
+        end_date: str,
+        layout: str = "index"
+    ) -> Dict[str, Any]:
+        """Slice indicators for [start_date, end_date] out of the cached full-history series
+        
+        The cache is keyed by the version of the stored bars, so it is only
+        used when the store holds every bar of hist_data; otherwise (e.g. a
+        live bar that is not stored) the indicators are computed from
+        hist_data, preceded by the stored bars before it. Both paths start
+        from the first stored bar, so recursive indicators (EMA, MACD, OBV)
+        return the same values whether the cache is used or not.
+        
+        Args:
+            symbol (str): Stock symbol
+            hist_data (pd.DataFrame): Price bars just read for the window (with warm-up)
+            indicators (List[str]): Indicator specs
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            layout (str): "index" or "columnar"
+            
+        Returns:
+            Dict[str, Any]: Same output as calculate_technical_indicators
+        """
+        version = self.price_store.version(symbol) if 'time' in hist_data.columns else None
+        if version is not None:
+            times, result = self.indicator_cache.get(
+                symbol, version, indicators, lambda: self._indicator_inputs(symbol)
+            )
+            window = pd.to_datetime(hist_data['time']).to_numpy(dtype='datetime64[ns]')
+            if len(times) and times[0] <= window[0] and times[-1] >= window[-1]:
+                first = int(np.searchsorted(times, np.datetime64(pd.Timestamp(start_date)), 'left'))
+                stop = int(np.searchsorted(
+                    times, np.datetime64(pd.Timestamp(end_date) + pd.Timedelta(days=1)), 'left'
+                ))
+                if first >= stop:
+                    return {}
+                result = trim(result, first, stop)
+                if layout == "columnar":
+                    return to_columnar(result, np.datetime_as_string(times[first:stop], unit='D').tolist())
+                return to_response(result, range(stop - first))
+            hist_data = self._with_stored_history(symbol, hist_data)
+        return self.calculate_technical_indicators(hist_data, indicators, output_start=start_date, layout=layout)
+    
+    def _with_stored_history(self, symbol: str, hist_data: pd.DataFrame) -> pd.DataFrame:
+        """Prepend the stored bars older than hist_data, the base the cached series use"""
+        hist_data = hist_data.assign(time=pd.to_datetime(hist_data['time']))
+        times, prices = self._indicator_inputs(symbol)
+        older = times < hist_data['time'].iloc[0].to_datetime64()
+        if not older.any():
+            return hist_data
+        prefix = pd.DataFrame({
+            'time': times[older],
+            **{name: values[older] for name, values in prices.items() if name in hist_data.columns}
+        })
+        return pd.concat([prefix, hist_data], ignore_index=True)
+    
+    def _indicator_inputs(self, symbol: str) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Whole stored history of a symbol as indicator engine inputs"""
+        bars = self.price_store.archive.read_columns(
+            symbol.upper(), columns=['time', 'close', 'high', 'low', 'volume']
+        )
+        times = bars.pop('time')
+        return times, bars
+            
+    def warmup_start(self, start_date: str, indicators: List[str]) -> str:
+        """Get the date history must start from for indicators to be valid at start_date
+        
+        Args:
+            start_date (str): First date of the requested output in YYYY-MM-DD format
+            indicators (List[str]): Requested indicators
+            
+        Returns:
+            str: Warm-up start date in YYYY-MM-DD format
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=lookback_days(indicators))
+        return start.strftime('%Y-%m-%d')
+            
+    def calculate_technical_indicators(
+        self,
+        hist_data: pd.DataFrame,
+        indicators: List[str] = ["MA", "RSI", "MACD", "BB"],
+        output_start: Optional[str] = None,
+        layout: str = "index"
+    ) -> Dict[str, Any]:
+        """Calculate technical indicators from price history
+        
+        Args:
+            hist_data (pd.DataFrame): Historical price bars with a 'close' column
+                (and 'high', 'low', 'volume' for the indicators that use them)
+            indicators (List[str]): Indicator specs, e.g. "MA", "EMA(34)", "ATR(14)", "Stoch(14,3)", "OBV"
+            output_start (Optional[str]): Drop bars before this date (YYYY-MM-DD) from the output;
+                earlier bars only warm up the indicators
+            layout (str): "index" ({row: value} per series) or "columnar" (shared dates, one array per series)
+            
+        Returns:
+            Dict[str, Any]: Indicator series keyed by indicator name
+        """
+        prices = {
+            name: pd.to_numeric(hist_data[name], errors='coerce').to_numpy(dtype='float64')
+            for name in ('close', 'high', 'low', 'volume') if name in hist_data.columns
+        }
+        close = prices['close']
+        result = IndicatorEngine(**prices).compute(indicators)
+        has_time = 'time' in hist_data.columns
+        times = pd.to_datetime(hist_data['time']).to_numpy(dtype='datetime64[ns]') if has_time else None
+        
+        first = 0
+        if output_start is not None and has_time:
+            first = int(np.searchsorted(times, np.datetime64(pd.Timestamp(output_start)), 'left'))
+            if first >= len(times):
+                return {}
+            result = trim(result, first)
+        
+        if layout == "columnar":
+            dates = (
+                np.datetime_as_string(times[first:], unit='D').tolist() if has_time
+                else [str(label) for label in hist_data.index]
+            )
+            return to_columnar(result, dates)
+        if output_start is not None and has_time:
+            # Output rows are numbered from the requested start, as before the warm-up
+            return to_response(result, range(len(close) - first))
+        return to_response(result, hist_data.index)
+            
+    def update_live_indicators(self, symbol: str, time: Any, close: float) -> Dict[str, Any]:
+        """Apply a live (new or revised) bar to the symbol's streaming indicators
+        
+        Each bar costs O(1) whatever the history length. A symbol seen for
+        the first time is bootstrapped from its stored price history.
+        
+        Args:
+            symbol (str): Stock symbol
+            time (Any): Bar time; the time of the last bar revises it
+            close (float): Close price
+            
+        Returns:
+            Dict[str, Any]: Latest MA, RSI, MACD and BB values
+        """
+        try:
+            return self.indicator_states.update(symbol, time, close, bootstrap=self._indicator_history)
+        except Exception as e:
+            logger.error(f"Error updating live indicators for {symbol}: {str(e)}")
+            raise
+    
+    def get_live_indicators(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the latest MA, RSI, MACD and BB values, up to the live bar
+        
+        The last days of bars are read through the price store, which always
+        refreshes the live bar, and only the bars the symbol's streaming state
+        has not seen (plus the last one, revised) are applied to it.
+        
+        Args:
+            symbol (str): Stock symbol
+            
+        Returns:
+            Optional[Dict[str, Any]]: Indicator values, None without price data
+        """
+        end = datetime.now()
+        start = end - timedelta(days=settings.LIVE_INDICATOR_LOOKBACK_DAYS)
+        bars = self.get_price_history(symbol, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        if bars is None or bars.empty:
+            return None
+        times = pd.to_datetime(bars['time'])
+        last = self.indicator_states.last_time(symbol)
+        if last is not None and last < times.iloc[0]:
+            # Bars between the state and the window were missed: rebuild it from history
+            self.indicator_states.reset(symbol)
+            last = None
+        pending = bars[(times >= last).to_numpy()] if last is not None else bars.tail(1)
+        values = None
+        for bar_time, close in zip(pending['time'], pending['close']):
+            values = self.update_live_indicators(symbol, bar_time, close)
+        return {
+            "symbol": symbol,
+            "data": values if values is not None else self.indicator_states.get(symbol)
+        }
+    
+    def _indicator_history(self, symbol: str, until: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """Price history long enough to warm up every streaming indicator"""
+        end_date = until.strftime('%Y-%m-%d')
+        return self.get_price_history(symbol, self.warmup_start(end_date, ["MA", "RSI", "MACD", "BB"]), end_date)
+    
+    def build_market_indicators(
+        self,
+        symbols: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        indicators: List[str] = list(ALL_INDICATORS)
+    ) -> MarketIndicatorSnapshot:
+        """Compute indicators for many symbols at once from the local price store
+        
+        Closes are read into one symbols x dates matrix and every indicator
+        is computed over it in a single vectorized pass; the result replaces
+        the stored market snapshot. Prices are not fetched here, so the
+        store should be synced first.
+        
+        Args:
+            symbols (List[str]): Stock symbols
+            start_date (Optional[str]): First date in YYYY-MM-DD format, None for all history
+            end_date (Optional[str]): Last date in YYYY-MM-DD format, None for the latest bar
+            indicators (List[str]): List of technical indicators to calculate
+            
+        Returns:
+            MarketIndicatorSnapshot: The new snapshot
+        """
+        started = time.perf_counter()
+        matrix = load_market_matrix(
+            self.price_store.archive, symbols, start_date, end_date, extra=('open', 'high', 'low')
+        )
+        snapshot = MarketIndicatorSnapshot.compute(matrix, indicators)
+        self.market_indicators.save(snapshot)
+        logger.info(
+            f"Market indicators computed for {len(snapshot)} symbols x {len(matrix.dates)} dates "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return snapshot
+    
+    def build_market_snapshot(self, market: Optional[MarketIndicatorSnapshot] = None) -> ScreenerTable:
+        """Materialize and publish the market snapshot used for screening and ranking
+        
+        Args:
+            market (Optional[MarketIndicatorSnapshot]): Fresh market indicators, defaults to the stored ones
+            
+        Returns:
+            ScreenerTable: The published snapshot table
+        """
+        market = market or self.market_indicators.snapshot()
+        if market is None:
+            raise ValueError("Market indicators have not been computed yet")
+        columns = market_snapshot_columns(
+            self.get_universe().columns, market, self.financials.latest_ratios()
+        )
+        return self.market_snapshots.save(columns)
+    
+    def build_risk_model(self, market: Optional[MarketIndicatorSnapshot] = None) -> RiskModel:
+        """Roll the covariance risk model forward with the latest market data
+        
+        Daily returns come from the market-wide close matrix and the
+        benchmark (settings.RISK_BENCHMARK) from the local price store, so
+        both should be synced first. Only the days after the stored model's
+        last date are added; the model is rebuilt when the universe changed.
+        
+        Args:
+            market (Optional[MarketIndicatorSnapshot]): Fresh market indicators, defaults to the stored ones
+            
+        Returns:
+            RiskModel: The saved model
+        """
+        started = time.perf_counter()
+        market = market or self.market_indicators.snapshot()
+        if market is None:
+            raise ValueError("Market indicators have not been computed yet")
+        matrix = market.matrix
+        benchmark_close = np.full(len(matrix.dates), np.nan)
+        if len(matrix.dates):
+            benchmark = load_market_matrix(
+                self.price_store.archive, [settings.RISK_BENCHMARK], str(matrix.dates[0]), str(matrix.dates[-1])
+            )
+            if len(benchmark.symbols):
+                positions = np.searchsorted(matrix.dates, benchmark.dates)
+                inside = positions < len(matrix.dates)
+                inside[inside] = matrix.dates[positions[inside]] == benchmark.dates[inside]
+                benchmark_close[positions[inside]] = benchmark.close[0, inside]
+            else:
+                logger.warning(f"No {settings.RISK_BENCHMARK} prices stored, betas are unavailable")
+        
+        model = self.risk_models.update(
+            matrix.symbols,
+            matrix.dates[1:],
+            daily_returns(matrix.close.T),
+            daily_returns(benchmark_close[:, None])[:, 0],
+            settings.RISK_WINDOW_DAYS
+        )
+        logger.info(
+            f"Risk model updated for {len(model)} symbols x {len(model.dates)} days "
+            f"(shrinkage {model.shrinkage:.3f}) in {time.perf_counter() - started:.2f}s"
+        )
+        return model
+    
+    def get_market_indicators(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get a symbol's indicators from the nightly market-wide snapshot
+        
+        Args:
+            symbol (str): Stock symbol
+            start_date (Optional[str]): Start date in YYYY-MM-DD format, None for the whole snapshot
+            end_date (Optional[str]): End date in YYYY-MM-DD format, None for the latest date
+            
+        Returns:
+            Optional[Dict[str, Any]]: {"symbol", "latest", "data" (columnar layout)},
+                None if the symbol is not in the snapshot
+        """
+        snapshot = self.market_indicators.snapshot()
+        if snapshot is None:
+            return None
+        latest = snapshot.latest(symbol)
+        if latest is None:
+            return None
+        return {
+            "symbol": symbol,
+            "latest": latest,
+            "data": snapshot.series(symbol, start_date, end_date)
+        }
+    
+    @flights.coalesce()
+    def get_fundamental_analysis(self, symbol: str, deadline: Optional[float] = None) -> Dict[str, Any]:
         """Get fundamental analysis for a stock
         
+        The sections are fetched concurrently under one deadline. Sections
+        that fail or miss the deadline are returned empty and marked in
+        "sections" ('ok', 'error' or 'timeout').
+        
         Args:
             symbol (str): Stock symbol
+            deadline (Optional[float]): Seconds to wait for all sections, defaults to FUNDAMENTAL_DEADLINE_SECONDS
             
         Returns:
             Dict[str, Any]: Fundamental analysis data
         """
         try:
-            # Initialize stock
-            stock = Vnstock().stock(symbol=symbol, source='TCBS')
+            deadline = deadline if deadline is not None else settings.FUNDAMENTAL_DEADLINE_SECONDS
             
-            # Get financial data
-            analysis = {}
-            
-            try:
+            def financial_ratios() -> Dict[str, Any]:
                 # Get financial ratios using finance.ratios()
-                ratios = stock.finance.ratios()
-                analysis["financial_ratios"] = ratios.to_dict('records') if ratios is not None else []
-            except Exception as e:
-                logger.warning(f"Financial ratios not available for {symbol}: {str(e)}")
-                analysis["financial_ratios"] = []
-                
-            try:
+                ratios = self._routed_call(
+                    'finance.ratios',
+                    symbol,
+                    lambda stock: stock.finance.ratios()
+                )
+                return {"financial_ratios": ratios.to_dict('records') if ratios is not None else []}
+            
+            def statements() -> Dict[str, Any]:
                 # Get financial statements using finance.statements()
-                statements = stock.finance.statements()
-                if statements is not None:
-                    analysis["balance_sheet"] = statements.get('balance_sheet', []).to_dict('records')
-                    analysis["income_statement"] = statements.get('income_statement', []).to_dict('records')
-                    analysis["cash_flow"] = statements.get('cash_flow', []).to_dict('records')
-                else:
-                    analysis["balance_sheet"] = []
-                    analysis["income_statement"] = []
-                    analysis["cash_flow"] = []
-            except Exception as e:
-                logger.warning(f"Financial statements not available for {symbol}: {str(e)}")
-                analysis["balance_sheet"] = []
-                analysis["income_statement"] = []
-                analysis["cash_flow"] = []
-                
-            try:
+                data = self._routed_call(
+                    'finance.statements',
+                    symbol,
+                    lambda stock: stock.finance.statements()
+                )
+                if data is None:
+                    return {"balance_sheet": [], "income_statement": [], "cash_flow": []}
+                return {
+                    "balance_sheet": data.get('balance_sheet', []).to_dict('records'),
+                    "income_statement": data.get('income_statement', []).to_dict('records'),
+                    "cash_flow": data.get('cash_flow', []).to_dict('records')
+                }
+            
+            def valuation() -> Dict[str, Any]:
                 # Get valuation metrics using finance.valuation()
-                valuation = stock.finance.valuation()
-                analysis["valuation"] = valuation.to_dict('records') if valuation is not None else []
-            except Exception as e:
-                logger.warning(f"Valuation metrics not available for {symbol}: {str(e)}")
-                analysis["valuation"] = []
-                
-            # Get additional company info
-            try:
-                company_info = stock.company.info()
-                if company_info is not None:
-                    analysis["company_info"] = company_info.to_dict('records')[0] if len(company_info) > 0 else {}
-                else:
-                    analysis["company_info"] = {}
-            except Exception as e:
-                logger.warning(f"Company info not available for {symbol}: {str(e)}")
-                analysis["company_info"] = {}
+                data = self._routed_call(
+                    'finance.valuation',
+                    symbol,
+                    lambda stock: stock.finance.valuation()
+                )
+                return {"valuation": data.to_dict('records') if data is not None else []}
+            
+            def company_info() -> Dict[str, Any]:
+                # Get additional company info
+                data = self._routed_call(
+                    'company.info',
+                    symbol,
+                    lambda stock: stock.company.info()
+                )
+                if data is None or len(data) == 0:
+                    return {"company_info": {}}
+                return {"company_info": data.to_dict('records')[0]}
+            
+            # Section name -> (fetch, value returned when the fetch fails or times out)
+            sections: Dict[str, Tuple[Callable[[], Dict[str, Any]], Dict[str, Any]]] = {
+                "financial_ratios": (financial_ratios, {"financial_ratios": []}),
+                "statements": (statements, {"balance_sheet": [], "income_statement": [], "cash_flow": []}),
+                "valuation": (valuation, {"valuation": []}),
+                "company_info": (company_info, {"company_info": {}})
+            }
+            
+            # Sections share one lane: calls that miss the deadline finish in the
+            # background but keep their slot, so they cannot take over the pool
+            started = time.monotonic()
+            futures = self.fanout.submit_all(
+                {name: fetch for name, (fetch, _) in sections.items()},
+                limit=settings.FUNDAMENTAL_MAX_IN_FLIGHT,
+                lane="fundamental",
+                timeout=deadline
+            )
+            done, _ = wait(futures.values(), timeout=max(0.0, deadline - (time.monotonic() - started)))
+            self.fanout.cancel(futures.values())
+            
+            analysis: Dict[str, Any] = {}
+            status: Dict[str, str] = {}
+            for name, future in futures.items():
+                empty = sections[name][1]
+                if future not in done or future.cancelled():
+                    logger.warning(f"{name} for {symbol} missed the {deadline}s deadline")
+                    analysis.update(empty)
+                    status[name] = "timeout"
+                    continue
+                try:
+                    analysis.update(future.result())
+                    status[name] = "ok"
+                except Exception as e:
+                    logger.warning(f"{name} not available for {symbol}: {str(e)}")
+                    analysis.update(empty)
+                    status[name] = "error"
             
             return {
                 "symbol": symbol,
-                "data": analysis
+                "data": analysis,
+                "sections": status
             }
         except Exception as e:
             logger.error(f"Error getting fundamental analysis for {symbol}: {str(e)}")
@@ -560,11 +1281,14 @@ class StockDataService:
             if weights is None:
                 weights = [1.0 / len(symbols)] * len(symbols)
                 
-            # Get basic info for all stocks
-            stocks_info = []
-            for symbol in symbols:
-                info = self.get_stock_basic_info(symbol)
-                stocks_info.append(info["data"])
+            # Get basic info for all stocks from the profile cache, fetching misses in parallel
+            overviews = self.profiles.get_many(
+                symbols,
+                'overview',
+                self._fetch_profile_section,
+                max_workers=settings.BATCH_MAX_CONCURRENCY
+            )
+            stocks_info = [overviews[symbol][0] if overviews[symbol] else {} for symbol in symbols]
                 
             # Calculate portfolio metrics
             total_market_cap = sum(
@@ -596,6 +1320,35 @@ class StockDataService:
             logger.error(f"Error analyzing portfolio: {str(e)}")
             raise
             
+    def get_price_matrix(self, symbols: List[str], start_date: str, end_date: str) -> PriceMatrix:
+        """Get closes of many stocks aligned into a dates x symbols matrix
+        
+        Histories are fetched in parallel, like get_stock_prices.
+        
+        Args:
+            symbols (List[str]): Stock symbols (matrix column order)
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            
+        Returns:
+            PriceMatrix: Aligned closes, NaN where a stock did not trade
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if unique_symbols:
+            futures = self.fanout.submit_all(
+                {symbol: partial(self.get_price_history, symbol, start_date, end_date) for symbol in unique_symbols},
+                limit=settings.BATCH_MAX_CONCURRENCY
+            )
+            for symbol, future in futures.items():
+                hist_data = future.result()
+                if hist_data is not None and len(hist_data):
+                    series[symbol] = (
+                        pd.to_datetime(hist_data['time']).to_numpy(dtype='datetime64[D]'),
+                        hist_data['close'].to_numpy(dtype=np.float64)
+                    )
+        return align_closes(series, symbols)
+    
     def get_portfolio_performance(
         self,
         symbols: List[str],
@@ -605,6 +1358,10 @@ class StockDataService:
     ) -> Dict[str, Any]:
         """Get performance metrics for a portfolio
         
+        The portfolio is rebalanced daily to the given weights; returns,
+        volatility (annualized), Sharpe ratio (annualized), max drawdown and
+        annualized return all come from its daily return series.
+        
         Args:
             symbols (List[str]): List of stock symbols
             start_date (str): Start date in YYYY-MM-DD format
@@ -613,52 +1370,117 @@ class StockDataService:
             
         Returns:
             Dict[str, Any]: Portfolio performance data
+            
+        Raises:
+            ValueError: Weights do not match the symbols
         """
         try:
             if weights is None:
                 weights = [1.0 / len(symbols)] * len(symbols)
+            if len(weights) != len(symbols):
+                raise ValueError("Number of weights must match number of symbols")
                 
-            # Get price data for all stocks
-            portfolio_data = []
-            for symbol in symbols:
-                price_data = self.get_stock_price(symbol, start_date, end_date)
-                portfolio_data.append(price_data["data"])
-                
-            # Calculate portfolio returns
-            returns = []
-            for data, weight in zip(portfolio_data, weights):
-                if len(data) > 0:
-                    start_price = float(data[0]["close"])
-                    end_price = float(data[-1]["close"])
-                    stock_return = (end_price - start_price) / start_price
-                    weighted_return = stock_return * weight
-                    returns.append(weighted_return)
-                    
-            total_return = sum(returns)
-            
-            # Calculate daily returns for volatility
-            daily_returns = []
-            for data, weight in zip(portfolio_data, weights):
-                if len(data) > 1:
-                    for i in range(1, len(data)):
-                        prev_price = float(data[i-1]["close"])
-                        curr_price = float(data[i]["close"])
-                        daily_return = (curr_price - prev_price) / prev_price
-                        daily_returns.append(daily_return * weight)
-                        
-            # Calculate volatility (standard deviation of daily returns)
-            volatility = pd.Series(daily_returns).std()
-            
+            matrix = self.get_price_matrix(symbols, start_date, end_date)
             return {
                 "symbols": symbols,
                 "weights": weights,
-                "performance": {
-                    "total_return": total_return,
-                    "volatility": volatility,
-                    "sharpe_ratio": total_return / volatility if volatility != 0 else 0,
-                    "daily_returns": daily_returns
-                }
+                "performance": portfolio_performance(matrix, weights, settings.RISK_FREE_RATE)
             }
         except Exception as e:
             logger.error(f"Error getting portfolio performance: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+            
+    def get_portfolio_risk(
+        self,
+        symbols: List[str],
+        weights: Optional[List[float]] = None,
+        confidence: float = 0.95,
+        horizon_days: int = 1,
+        value: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Get risk metrics for a portfolio from the nightly risk model
+        
+        Args:
+            symbols (List[str]): List of stock symbols
+            weights (Optional[List[float]]): Weight of each stock (fraction of value), equal by default
+            confidence (float): VaR/CVaR confidence level
+            horizon_days (int): Horizon in trading days
+            value (Optional[float]): Portfolio value, to report losses as amounts
+            
+        Returns:
+            Dict[str, Any]: VaR/CVaR (parametric and historical), beta and risk contributions
+            
+        Raises:
+            ValueError: Weights do not match the symbols, or invalid confidence/horizon
+            RiskModelUnavailableError: The risk model has not been built yet
+        """
+        if weights is None:
+            weights = [1.0 / len(symbols)] * len(symbols)
+        if len(weights) != len(symbols):
+            raise ValueError("Number of weights must match number of symbols")
+        model = self.risk_models.model()
+        if model is None:
+            raise RiskModelUnavailableError("Risk model has not been built yet")
+        held: Dict[str, float] = {}
+        for symbol, weight in zip(symbols, weights):
+            held[symbol.upper()] = held.get(symbol.upper(), 0.0) + weight
+        return {
+            "symbols": symbols,
+            "weights": weights,
+            "risk": model.portfolio_risk(held, confidence, horizon_days, value)
+        }
+    
+    def get_stored_portfolio_risk(
+        self,
+        portfolio_id: str,
+        user_id: str,
+        confidence: float = 0.95,
+        horizon_days: int = 1
+    ) -> Optional[Dict[str, Any]]:
+        """Get risk metrics for a portfolio stored in the database
+        
+        Positions are weighted by market value (quantity x current price).
+        
+        Args:
+            portfolio_id (str): Portfolio id
+            user_id (str): Id of the requesting user, who must own the portfolio
+            confidence (float): VaR/CVaR confidence level
+            horizon_days (int): Horizon in trading days
+            
+        Returns:
+            Optional[Dict[str, Any]]: Portfolio value, weights and risk metrics,
+                None if the portfolio does not exist or belongs to another user
+            
+        Raises:
+            RiskModelUnavailableError: The risk model has not been built yet
+        """
+        model = self.risk_models.model()
+        if model is None:
+            raise RiskModelUnavailableError("Risk model has not been built yet")
+        session = default_session_factory()
+        try:
+            portfolio = load_portfolio_weights(session, portfolio_id, user_id)
+        finally:
+            session.close()
+        if portfolio is None:
+            return None
+        return {
+            "portfolio_id": portfolio_id,
+            "name": portfolio["name"],
+            "value": portfolio["value"],
+            "weights": portfolio["weights"],
+            "risk": model.portfolio_risk(portfolio["weights"], confidence, horizon_days, portfolio["value"])
+        }
+
+
+_service_lock = threading.Lock()
+_service: Optional[StockDataService] = None
+
+def get_stock_service() -> StockDataService:
+    """FastAPI dependency returning the process-wide StockDataService"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = StockDataService()
+    return _service
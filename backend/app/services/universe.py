@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Listing columns exposed by the screener, renamed for the response
+SCREEN_COLUMNS = {
+    'symbol': 'symbol',
+    'organ_name': 'name'
+}
+
+
+class UniverseSnapshot:
+    """Immutable, columnar view of the listed symbols
+
+    Columns are kept as NumPy arrays sorted by symbol, so lookups are a
+    binary search. The columns are the only copy of the listing: row dicts
+    are built for the requested rows and fields only.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], loaded_at: float):
+        """Initialize the snapshot
+
+        Args:
+            columns (Dict[str, np.ndarray]): Column name -> values, sorted by symbol
+            loaded_at (float): Unix time the listing was loaded
+        """
+        self.columns = columns
+        self.loaded_at = loaded_at
+        self.symbols = columns.get('symbol', np.empty(0, dtype=object))
+        self._size = len(next(iter(columns.values()))) if columns else 0
+        self.version = hashlib.sha1(
+            json.dumps({name: values.tolist() for name, values in columns.items()}, sort_keys=True, default=str)
+            .encode('utf-8')
+        ).hexdigest()[:16]
+
+    @classmethod
+    def from_listing(cls, listing: Any, loaded_at: Optional[float] = None) -> "UniverseSnapshot":
+        """Build a snapshot from the vendor listing
+
+        Args:
+            listing (Any): Output of Listing.all_symbols() (DataFrame, records or None)
+            loaded_at (Optional[float]): Unix time of the load, defaults to now
+
+        Returns:
+            UniverseSnapshot: Snapshot sorted by symbol, missing values as None
+        """
+        frame = pd.DataFrame(listing) if listing is not None else pd.DataFrame()
+        if 'symbol' in frame.columns:
+            frame = frame.sort_values('symbol', kind='stable').reset_index(drop=True)
+        frame = frame.astype(object).where(frame.notna(), None)
+        columns = {str(name): frame[name].to_numpy(dtype=object) for name in frame.columns}
+        return cls(columns, loaded_at if loaded_at is not None else time.time())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _rows(self, start: int, stop: int, names: Dict[str, str]) -> List[Dict[str, Any]]:
+        # names: column -> key in the row dicts
+        values = [self.columns[name][start:stop] for name in names]
+        keys = list(names.values())
+        return [dict(zip(keys, row)) for row in zip(*values)] if keys else [{} for _ in range(start, stop)]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Get every listing row with all its columns, sorted by symbol"""
+        return self._rows(0, self._size, {name: name for name in self.columns})
+
+    def iter_rows(self, fields: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Iterate over the listing rows one at a time, with the given columns (missing ones as None)"""
+        present = [name for name in fields if name in self.columns]
+        for row in zip(*(self.columns[name] for name in present)):
+            yield {**dict.fromkeys(fields), **dict(zip(present, row))}
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Look up one symbol
+
+        Args:
+            symbol (str): Stock symbol
+
+        Returns:
+            Optional[Dict[str, Any]]: Listing row, None if the symbol is not listed
+        """
+        symbol = symbol.upper()
+        index = int(np.searchsorted(self.symbols, symbol))
+        if index < len(self.symbols) and self.symbols[index] == symbol:
+            return self._rows(index, index + 1, {name: name for name in self.columns})[0]
+        return None
+
+    def screen(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get the screening rows (symbol and name), sorted by symbol
+
+        Args:
+            limit (int): Maximum number of rows, 0 or less for all
+
+        Returns:
+            List[Dict[str, Any]]: Screening rows
+        """
+        return self.page(None, limit, screen=True)[0]
+
+    def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        screen: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get the rows following a symbol, sorted by symbol
+
+        Args:
+            after (Optional[str]): Last symbol of the previous page, None for the first page
+            limit (int): Maximum number of rows, 0 or less for all remaining
+            fields (Optional[Sequence[str]]): Columns to return, defaults to all of them
+            screen (bool): Page over the screening rows instead of the listing rows
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: Rows and the symbol to continue
+                after, None on the last page
+
+        Raises:
+            ValueError: Unknown field
+        """
+        # Column -> key in the rows
+        if screen:
+            available = {name: key for name, key in SCREEN_COLUMNS.items() if name in self.columns}
+        else:
+            available = {name: name for name in self.columns}
+        names = available
+        if fields:
+            keys = {key: name for name, key in available.items()}
+            known = set(SCREEN_COLUMNS.values()) if screen else set(self.columns)
+            unknown = [name for name in fields if name not in known]
+            if unknown:
+                raise ValueError(f"Unknown field: {unknown[0]}")
+            names = {keys[key]: key for key in dict.fromkeys(fields) if key in keys}
+        start = int(np.searchsorted(self.symbols, after.upper(), side='right')) if after else 0
+        stop = min(start + limit, self._size) if limit > 0 else self._size
+        selected = self._rows(start, stop, names)
+        last = str(self.symbols[stop - 1]) if stop < self._size and selected else None
+        return selected, last
+
+
+class SymbolUniverse:
+    """Process-wide symbol universe, refreshed in the background
+
+    The vendor listing is loaded once and swapped in as a new
+    UniverseSnapshot on every refresh; readers only take a reference to the
+    current snapshot, so they never wait on the network after the first
+    load. A failed refresh keeps serving the previous snapshot; so does a
+    refresh returning an empty listing or one without a symbol column,
+    which would otherwise wipe the universe and everything synced from it.
+    """
+
+    def __init__(self, loader: Callable[[], Any], refresh_seconds: float = 3600):
+        """Initialize the universe
+
+        Args:
+            loader (Callable[[], Any]): Loads the vendor listing
+            refresh_seconds (float): Interval between background refreshes
+        """
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[UniverseSnapshot] = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._refreshes = 0
+        self._failures = 0
+        self._listeners: List[Callable[[UniverseSnapshot], None]] = []
+
+    def subscribe(self, listener: Callable[[UniverseSnapshot], None]) -> None:
+        """Call listener with every new snapshot whose version differs from the previous one"""
+        self._listeners.append(listener)
+
+    def snapshot(self) -> UniverseSnapshot:
+        """Get the current snapshot, loading it on first use"""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._load_lock:
+            if self._snapshot is None:
+                self._load_locked()
+            return self._snapshot
+
+    def refresh(self) -> UniverseSnapshot:
+        """Reload the listing now and swap in the new snapshot"""
+        with self._load_lock:
+            return self._load_locked()
+
+    def _loaded(self) -> bool:
+        return self._snapshot is not None and len(self._snapshot) > 0
+
+    def _load_locked(self) -> UniverseSnapshot:
+        try:
+            snapshot = UniverseSnapshot.from_listing(self.loader())
+            if len(snapshot) and 'symbol' not in snapshot.columns:
+                raise ValueError("Listing has no symbol column")
+            if not len(snapshot) and self._loaded():
+                raise ValueError("Listing is empty")
+        except Exception:
+            self._failures += 1
+            raise
+        if not len(snapshot):
+            logger.warning("Symbol universe loaded an empty listing")
+        self._refreshes += 1
+        previous = self._snapshot
+        self._snapshot = snapshot
+        if previous is None or previous.version != snapshot.version:
+            logger.info(f"Symbol universe loaded: {len(snapshot)} symbols, version {snapshot.version}")
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    logger.error(f"Error in symbol universe listener: {str(e)}")
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds if self._loaded() else 0):
+            try:
+                self.refresh()
+            except Exception as e:
+                kept = f", keeping version {self._snapshot.version}" if self._snapshot is not None else ""
+                logger.error(f"Error refreshing symbol universe{kept}: {str(e)}")
+            # Retry sooner than the full interval while nothing is loaded
+            if not self._loaded() and self._stop.wait(min(60.0, self.refresh_seconds)):
+                break
+
+    def start(self) -> None:
+        """Start the background refresh thread (loads immediately)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="symbol-universe", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the snapshot version and age for health reporting"""
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "version": snapshot.version if snapshot is not None else None,
+            "symbols": len(snapshot) if snapshot is not None else 0,
+            "age_seconds": round(time.time() - snapshot.loaded_at, 1) if snapshot is not None else None,
+            "refreshes": self._refreshes,
+            "failures": self._failures
+        }
@@ -1,5 +1,5 @@
-from typing import Any, Dict, List, Optional, Union
-from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Sequence, Union
+from sqlalchemy.orm import Query, Session, load_only
 from sqlalchemy import and_, or_
 from datetime import datetime
 from uuid import UUID
@@ -7,9 +7,14 @@ from uuid import UUID
 from models import models
 from schemas import schemas
 from core.security import get_password_hash, verify_password
+from core.pagination import decode_cursor, encode_cursor
 
 # Base CRUD class
 class CRUDBase:
+    # Indexed, non-null columns list methods are ordered on; the last one is unique,
+    # so the keyset values of a page's last row are the cursor to the next
+    keyset = ("id",)
+
     def __init__(self, model):
         self.model = model
 
@@ -17,9 +22,59 @@ class CRUDBase:
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[models.Base]:
+        return self._paginate(
+            db.query(self.model), skip=skip, limit=limit, cursor=cursor, fields=fields
+        )
+
+    def _paginate(
+        self,
+        query: Query,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.Base]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        """Order on the keyset and seek past the cursor instead of scanning skipped rows
+
+        skip is still applied (after the cursor) for callers paging by offset.
+        fields loads only those columns (plus the keyset); others load on access.
+        """
+        columns = [getattr(self.model, name) for name in self.keyset]
+        if fields:
+            unknown = [name for name in fields if name not in self.model.__table__.c]
+            if unknown:
+                raise ValueError(f"Unknown field: {unknown[0]}")
+            names = dict.fromkeys([*fields, *self.keyset])
+            query = query.options(load_only(*[getattr(self.model, name) for name in names]))
+        after = decode_cursor(cursor, len(columns))
+        if after is not None:
+            query = query.filter(self._after(columns, after))
+        query = query.order_by(*columns)
+        if skip:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
+    @staticmethod
+    def _after(columns: List[Any], values: List[Any]) -> Any:
+        # (a, b) > (x, y)  <=>  a > x or (a = x and b > y)
+        return or_(*[
+            and_(*[columns[i] == values[i] for i in range(index)], column > values[index])
+            for index, column in enumerate(columns)
+        ])
+
+    def next_cursor(self, items: List[models.Base], limit: int) -> Optional[str]:
+        if not items or len(items) < limit:
+            return None
+        return encode_cursor([getattr(items[-1], name) for name in self.keyset])
 
     def create(self, db: Session, *, obj_in: schemas.BaseSchema) -> models.Base:
         obj_in_data = obj_in.model_dump()
@@ -109,6 +164,8 @@ class CRUDUser(CRUDBase):
 
 # Stock CRUD
 class CRUDStock(CRUDBase):
+    keyset = ("symbol",)
+
     def __init__(self):
         super().__init__(models.Stock)
 
@@ -116,18 +173,27 @@ class CRUDStock(CRUDBase):
         return db.query(models.Stock).filter(models.Stock.symbol == symbol).first()
 
     def get_multi_by_exchange(
-        self, db: Session, *, exchange: str, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        exchange: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.Stock]:
-        return (
-            db.query(models.Stock)
-            .filter(models.Stock.exchange == exchange)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self._paginate(
+            db.query(models.Stock).filter(models.Stock.exchange == exchange),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
         )
 
 # Price Data CRUD
 class CRUDPriceData(CRUDBase):
+    keyset = ("date", "id")
+
     def __init__(self):
         super().__init__(models.PriceData)
 
@@ -153,21 +219,22 @@ class CRUDPriceData(CRUDBase):
         start_date: datetime,
         end_date: datetime,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.PriceData]:
-        return (
-            db.query(models.PriceData)
-            .filter(
+        return self._paginate(
+            db.query(models.PriceData).filter(
                 and_(
                     models.PriceData.stock_id == stock_id,
                     models.PriceData.date >= start_date,
                     models.PriceData.date <= end_date,
                 )
-            )
-            .order_by(models.PriceData.date)
-            .offset(skip)
-            .limit(limit)
-            .all()
+            ),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
         )
 
 # Financial Data CRUD
@@ -197,6 +264,8 @@ class CRUDFinancialData(CRUDBase):
 
 # Strategy CRUD
 class CRUDStrategy(CRUDBase):
+    keyset = ("created_at", "id")
+
     def __init__(self):
         super().__init__(models.Strategy)
 
@@ -206,29 +275,39 @@ class CRUDStrategy(CRUDBase):
         *,
         user_id: UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.Strategy]:
-        return (
-            db.query(models.Strategy)
-            .filter(models.Strategy.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self._paginate(
+            db.query(models.Strategy).filter(models.Strategy.user_id == user_id),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
         )
 
     def get_public_strategies(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.Strategy]:
-        return (
-            db.query(models.Strategy)
-            .filter(models.Strategy.is_public == True)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self._paginate(
+            db.query(models.Strategy).filter(models.Strategy.is_public == True),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
         )
 
 # Backtest CRUD
 class CRUDBacktest(CRUDBase):
+    keyset = ("created_at", "id")
+
     def __init__(self):
         super().__init__(models.Backtest)
 
@@ -238,18 +317,22 @@ class CRUDBacktest(CRUDBase):
         *,
         strategy_id: UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.Backtest]:
-        return (
-            db.query(models.Backtest)
-            .filter(models.Backtest.strategy_id == strategy_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self._paginate(
+            db.query(models.Backtest).filter(models.Backtest.strategy_id == strategy_id),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
         )
 
 # Portfolio CRUD
 class CRUDPortfolio(CRUDBase):
+    keyset = ("created_at", "id")
+
     def __init__(self):
         super().__init__(models.Portfolio)
 
@@ -259,18 +342,22 @@ class CRUDPortfolio(CRUDBase):
         *,
         user_id: UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.Portfolio]:
-        return (
-            db.query(models.Portfolio)
-            .filter(models.Portfolio.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self._paginate(
+            db.query(models.Portfolio).filter(models.Portfolio.user_id == user_id),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
         )
 
 # Position CRUD
 class CRUDPosition(CRUDBase):
+    keyset = ("created_at", "id")
+
     def __init__(self):
         super().__init__(models.Position)
 
@@ -280,14 +367,16 @@ class CRUDPosition(CRUDBase):
         *,
         portfolio_id: UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[models.Position]:
-        return (
-            db.query(models.Position)
-            .filter(models.Position.portfolio_id == portfolio_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self._paginate(
+            db.query(models.Position).filter(models.Position.portfolio_id == portfolio_id),
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields
         )
 
 # Create instances
@@ -0,0 +1,59 @@
+"""
+Microbenchmark: thời gian khởi tạo client vnstock cho mỗi request
+
+So sánh cách cũ (tạo StockDataService + Vnstock().stock(...) cho mỗi request)
+với VendorClientRegistry dùng chung trong process.
+
+Chạy từ thư mục backend:
+    python scripts/bench_client_setup.py --requests 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vnstock import Vnstock, Listing
+
+from app.services.client_registry import VendorClientRegistry
+
+SYMBOLS = ["VNM", "FPT", "HPG", "VCB", "MWG", "VIC", "SSI", "TCB"]
+
+def per_request_setup(n: int) -> float:
+    """Cách cũ: mỗi request tạo Listing và client mới"""
+    start = time.perf_counter()
+    for i in range(n):
+        Listing()
+        Vnstock().stock(symbol=SYMBOLS[i % len(SYMBOLS)], source='VCI')
+    return (time.perf_counter() - start) / n
+
+def registry_setup(n: int) -> float:
+    """Cách mới: lấy client từ registry dùng chung"""
+    registry = VendorClientRegistry()
+    # Warm up: mỗi mã được tạo một lần như khi server đã chạy
+    for symbol in SYMBOLS:
+        registry.get(symbol, 'VCI')
+    registry.get_listing()
+
+    start = time.perf_counter()
+    for i in range(n):
+        registry.get_listing()
+        registry.get(SYMBOLS[i % len(SYMBOLS)], 'VCI')
+    return (time.perf_counter() - start) / n
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    before = per_request_setup(args.requests)
+    after = registry_setup(args.requests)
+
+    print(f"Per-request setup (before): {before * 1e6:10.1f} us")
+    print(f"Per-request setup (after):  {after * 1e6:10.1f} us")
+    if after > 0:
+        print(f"Speedup: {before / after:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: tính chỉ báo kỹ thuật bằng pandas (cách cũ) và IndicatorEngine (NumPy)
+
+Dữ liệu giả lập: random walk cho N mã x M phiên (mặc định 1.600 mã x 10 năm,
+khoảng 2.500 phiên). Đo riêng phần tính toán và phần tính toán + chuyển sang
+dạng JSON mà endpoint /technical-analysis trả về, và chế độ toàn thị trường
+(một lượt trên ma trận mã x phiên).
+
+Chạy từ thư mục backend:
+    python scripts/bench_indicators.py --symbols 1600 --years 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.indicators import IndicatorEngine, to_response
+from app.services.market_indicators import compute_market_indicators
+
+INDICATORS = ["MA", "RSI", "MACD", "BB"]
+BARS_PER_YEAR = 250
+
+def legacy_indicators(hist_data: pd.DataFrame, serialize: bool) -> dict:
+    """Cách cũ: các chuỗi rolling của pandas, replace + to_dict cho từng chuỗi"""
+    close = hist_data['close']
+    convert = (lambda s: s.replace({pd.NA: None, np.nan: None}).to_dict()) if serialize else (lambda s: s)
+    analysis = {}
+    analysis["MA"] = {
+        f"MA{w}": convert(close.rolling(window=w).mean()) for w in (5, 10, 20, 50, 200)
+    }
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    analysis["RSI"] = convert(100 - (100 / (1 + gain / loss)))
+    exp1 = close.ewm(span=12, adjust=False).mean()
+    exp2 = close.ewm(span=26, adjust=False).mean()
+    macd = exp1 - exp2
+    analysis["MACD"] = {"MACD": convert(macd), "Signal": convert(macd.ewm(span=9, adjust=False).mean())}
+    sma = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    analysis["BB"] = {"Upper": convert(sma + std * 2), "Middle": convert(sma), "Lower": convert(sma - std * 2)}
+    return analysis
+
+def engine_indicators(hist_data: pd.DataFrame, serialize: bool) -> dict:
+    """Cách mới: IndicatorEngine trên mảng float64 liên tục"""
+    close = hist_data['close'].to_numpy(dtype='float64')
+    result = IndicatorEngine(close).compute(INDICATORS)
+    return to_response(result, hist_data.index) if serialize else result
+
+def make_universe(symbols: int, bars: int, seed: int = 42) -> list:
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.02, size=(symbols, bars))
+    prices = 20000 * np.exp(np.cumsum(returns, axis=1))
+    return [pd.DataFrame({'close': row}) for row in prices]
+
+def run(func, frames: list, serialize: bool) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        func(frame, serialize)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=1600)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    bars = args.years * BARS_PER_YEAR
+    frames = make_universe(args.symbols, bars)
+    print(f"{args.symbols} symbols x {bars} bars")
+
+    # Kết quả hai cách phải khớp nhau
+    check = frames[0]
+    legacy, engine = legacy_indicators(check, False), engine_indicators(check, False)
+    np.testing.assert_allclose(engine["MA"]["MA200"], legacy["MA"]["MA200"].to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(engine["BB"]["Upper"], legacy["BB"]["Upper"].to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(engine["RSI"], legacy["RSI"].to_numpy(), rtol=1e-9)
+
+    for serialize in (False, True):
+        label = "compute + JSON layout" if serialize else "compute only"
+        before = run(legacy_indicators, frames, serialize)
+        after = run(engine_indicators, frames, serialize)
+        print(f"{label:22s} pandas: {before:8.2f} s  engine: {after:8.2f} s  speedup: {before / after:5.1f}x")
+
+    # Toàn thị trường: một lượt trên ma trận mã x phiên
+    matrix = np.vstack([frame['close'].to_numpy() for frame in frames])
+    start = time.perf_counter()
+    compute_market_indicators(matrix, INDICATORS)
+    print(f"{'market matrix':22s} engine: {time.perf_counter() - start:8.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Migration: chuẩn bị database đã có cho phân trang keyset
+
+init_db (Base.metadata.create_all) chỉ tạo bảng chưa có, không sửa bảng đã
+tồn tại. Script này đưa database cũ về đúng model:
+  1. điền created_at còn NULL (bằng updated_at, hoặc thời điểm chạy) rồi đặt NOT NULL
+     trên strategies, backtests, portfolios, positions;
+  2. tạo các index ghép khai báo trong __table_args__ của model;
+  3. xóa các index đơn trên created_at và price_data.date mà index ghép đã thay thế.
+
+Chạy lại nhiều lần không sao: bước nào đã làm thì bỏ qua.
+
+Chạy từ thư mục backend:
+    python scripts/migrate_keyset_pagination.py --dry-run
+    python scripts/migrate_keyset_pagination.py
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.core.database import engine
+from app.models.models import Backtest, Portfolio, Position, PriceData, Stock, FinancialData, Strategy
+
+# Bảng phân trang theo (created_at, id): created_at phải NOT NULL
+KEYSET_MODELS = [Strategy, Backtest, Portfolio, Position]
+
+# Bảng có index ghép mới
+INDEXED_MODELS = [Stock, PriceData, FinancialData, Strategy, Backtest, Portfolio, Position]
+
+# Index đơn do phiên bản model trước tạo, nay trùng với index ghép
+REDUNDANT_INDEXES = {
+    "strategies": "ix_strategies_created_at",
+    "backtests": "ix_backtests_created_at",
+    "portfolios": "ix_portfolios_created_at",
+    "positions": "ix_positions_created_at",
+    "price_data": "ix_price_data_date"
+}
+
+def set_not_null_sql(dialect: str, table: str) -> str:
+    """Câu lệnh đặt created_at NOT NULL theo từng loại database"""
+    if dialect == "mysql":
+        return f"ALTER TABLE {table} MODIFY created_at DATETIME NOT NULL"
+    if dialect == "postgresql":
+        return f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL"
+    return ""
+
+def migrate(dry_run: bool = False) -> None:
+    """Chạy migration (dry_run: chỉ in các câu lệnh sẽ chạy)"""
+    dialect = engine.dialect.name
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+
+        for model in KEYSET_MODELS:
+            table = model.__tablename__
+            missing = connection.execute(
+                text(f"SELECT COUNT(*) FROM {table} WHERE created_at IS NULL")
+            ).scalar()
+            print(f"{table}: {missing} rows without created_at")
+            if missing and not dry_run:
+                connection.execute(
+                    text(f"UPDATE {table} SET created_at = COALESCE(updated_at, :now) WHERE created_at IS NULL"),
+                    {"now": now}
+                )
+            nullable = next(
+                column["nullable"] for column in inspector.get_columns(table) if column["name"] == "created_at"
+            )
+            statement = set_not_null_sql(dialect, table)
+            if nullable and statement:
+                print(f"  {statement}")
+                if not dry_run:
+                    connection.execute(text(statement))
+            elif nullable:
+                # SQLite không đổi được ràng buộc cột tại chỗ; dữ liệu đã được điền
+                print(f"  {dialect}: created_at stays nullable in the schema, rows were backfilled")
+
+        for model in INDEXED_MODELS:
+            table = model.__tablename__
+            existing = {index["name"] for index in inspector.get_indexes(table)}
+            for index in model.__table__.indexes:
+                if index.name in existing:
+                    continue
+                print(f"  CREATE INDEX {index.name} ON {table} ({', '.join(c.name for c in index.columns)})")
+                if not dry_run:
+                    index.create(connection)
+            redundant = REDUNDANT_INDEXES.get(table)
+            if redundant in existing:
+                print(f"  DROP INDEX {redundant} ON {table}")
+                if not dry_run:
+                    connection.execute(text(
+                        f"DROP INDEX {redundant} ON {table}" if dialect == "mysql" else f"DROP INDEX {redundant}"
+                    ))
+
+        if dry_run:
+            print("Dry run: no changes written")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ in các thay đổi, không ghi")
+    args = parser.parse_args()
+    migrate(args.dry_run)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import pytest
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
+from app.core.auth import create_access_token
+
 def test_get_stock_list(client, mock_stock_data):
     """Test lấy danh sách cổ phiếu"""
     with patch('app.services.stock_data.StockDataService.get_stock_list') as mock_get:
@@ -103,4 +105,23 @@ def test_end_date_before_start_date(client):
         f"/api/v1/stocks/{symbol}/price",
         params={"start_date": start_date, "end_date": end_date}
     )
-    assert response.status_code == 400 
\ No newline at end of file
+    assert response.status_code == 400 
+
+def test_stored_portfolio_risk_requires_token(client):
+    """Test rủi ro danh mục đã lưu cần đăng nhập"""
+    response = client.get("/api/v1/stocks/portfolio/p1/risk")
+    assert response.status_code == 401
+
+def test_stored_portfolio_risk_is_scoped_to_user(client):
+    """Test rủi ro danh mục đã lưu chỉ đọc danh mục của người dùng trong token"""
+    token = create_access_token({"sub": "u2"})
+    with patch('app.services.stock_data.StockDataService.get_stored_portfolio_risk') as mock_get:
+        mock_get.return_value = None
+        response = client.get(
+            "/api/v1/stocks/portfolio/p1/risk",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == 404
+        assert "value" not in response.json()
+        assert mock_get.call_args.args[:2] == ("p1", "u2")
@@ -0,0 +1,131 @@
+"""
+Tests for keyset pagination in the CRUD layer
+"""
+import importlib
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.core
+import app.core.pagination
+import app.core.security
+import app.models
+import app.models.models as models
+import app.schemas
+import app.schemas.schemas
+from app.core.database import Base
+
+# crud imports its siblings as top-level packages (app/ on sys.path in production)
+ALIASES = {
+    "models": app.models,
+    "models.models": models,
+    "schemas": app.schemas,
+    "schemas.schemas": app.schemas.schemas,
+    "core": app.core,
+    "core.security": app.core.security,
+    "core.pagination": app.core.pagination,
+}
+
+@pytest.fixture
+def crud(monkeypatch):
+    for name, module in ALIASES.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    return importlib.import_module("crud.crud")
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _add_portfolios(db, user_id, count, created_at):
+    # Two rows per timestamp, so every page boundary can fall inside a tie
+    for index in range(count):
+        db.add(models.Portfolio(
+            id=f"{user_id}-{index:03d}",
+            user_id=user_id,
+            name=f"Danh mục {index}",
+            initial_capital=1000.0,
+            created_at=created_at + timedelta(minutes=index // 2)
+        ))
+    db.commit()
+
+def _pages(crud_portfolio, db, user_id, limit):
+    pages, cursor = [], None
+    while True:
+        items = crud_portfolio.get_multi_by_user(db, user_id=user_id, limit=limit, cursor=cursor)
+        pages.append([item.id for item in items])
+        cursor = crud_portfolio.next_cursor(items, limit)
+        if cursor is None:
+            return pages
+
+def test_pages_cover_ties_without_gaps_or_duplicates(crud, db):
+    """Các trang nối tiếp không trùng, không sót dòng khi created_at bằng nhau"""
+    start = datetime(2024, 1, 1)
+    _add_portfolios(db, "u1", 7, start)
+    _add_portfolios(db, "u2", 3, start)
+    crud_portfolio = crud.CRUDPortfolio()
+
+    pages = _pages(crud_portfolio, db, "u1", limit=3)
+
+    assert pages == [
+        ["u1-000", "u1-001", "u1-002"],
+        ["u1-003", "u1-004", "u1-005"],
+        ["u1-006"],
+    ]
+
+def test_full_last_page_is_followed_by_an_empty_page(crud, db):
+    """Trang cuối đầy đủ vẫn trả cursor; trang sau đó rỗng và không có cursor"""
+    _add_portfolios(db, "u1", 4, datetime(2024, 1, 1))
+    crud_portfolio = crud.CRUDPortfolio()
+
+    pages = _pages(crud_portfolio, db, "u1", limit=2)
+
+    assert pages == [["u1-000", "u1-001"], ["u1-002", "u1-003"], []]
+
+def test_fields_load_only_requested_columns(crud, db):
+    """fields chỉ nạp các cột yêu cầu cùng keyset, cột lạ bị từ chối"""
+    _add_portfolios(db, "u1", 2, datetime(2024, 1, 1))
+    crud_portfolio = crud.CRUDPortfolio()
+
+    items = crud_portfolio.get_multi_by_user(db, user_id="u1", fields=["name"])
+
+    assert [item.name for item in items] == ["Danh mục 0", "Danh mục 1"]
+    assert "description" not in items[0].__dict__
+    assert crud_portfolio.next_cursor(items, 2) is not None
+    with pytest.raises(ValueError):
+        crud_portfolio.get_multi_by_user(db, user_id="u1", fields=["password"])
+
+def test_single_column_keyset_seeks_past_cursor(crud, db):
+    """Keyset một cột (symbol) tiếp tục đúng sau cursor"""
+    for symbol in ["VNM", "ACB", "FPT", "HPG"]:
+        db.add(models.Stock(id=symbol, symbol=symbol, name=symbol, exchange="HOSE"))
+    db.add(models.Stock(id="SHB", symbol="SHB", name="SHB", exchange="HNX"))
+    db.commit()
+    crud_stock = crud.CRUDStock()
+
+    first = crud_stock.get_multi_by_exchange(db, exchange="HOSE", limit=3)
+    second = crud_stock.get_multi_by_exchange(
+        db, exchange="HOSE", limit=3, cursor=crud_stock.next_cursor(first, 3)
+    )
+
+    assert [item.symbol for item in first] == ["ACB", "FPT", "HPG"]
+    assert [item.symbol for item in second] == ["VNM"]
+    assert crud_stock.next_cursor(second, 3) is None
+
+def test_invalid_cursor_is_rejected(crud, db):
+    """Cursor sai định dạng hoặc sai số cột gây ValueError"""
+    crud_portfolio = crud.CRUDPortfolio()
+
+    with pytest.raises(ValueError):
+        crud_portfolio.get_multi_by_user(db, user_id="u1", cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        crud_portfolio.get_multi_by_user(
+            db, user_id="u1", cursor=crud.CRUDStock().next_cursor([models.Stock(symbol="VNM")], 1)
+        )
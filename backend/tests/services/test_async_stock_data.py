@@ -0,0 +1,59 @@
+"""
+Tests for AsyncStockDataService
+"""
+import asyncio
+import time
+
+from app.services.async_stock_data import AsyncStockDataService
+
+VENDOR_DELAY = 0.02
+CONCURRENT_REQUESTS = 50
+
+class SlowVendorService:
+    """Stand-in for StockDataService with a blocking, slow vendor call"""
+
+    def get_stock_price(self, symbol, start_date, end_date):
+        time.sleep(VENDOR_DELAY)
+        return {"symbol": symbol, "data": []}
+
+def run_burst(io_workers):
+    facade = AsyncStockDataService(service=SlowVendorService(), io_workers=io_workers, cpu_workers=1)
+
+    async def burst():
+        return await asyncio.gather(*[
+            facade.get_stock_price("VNM", "2024-01-01", "2024-01-31")
+            for _ in range(CONCURRENT_REQUESTS)
+        ])
+
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(burst())
+        return time.perf_counter() - start, results
+    finally:
+        facade.shutdown()
+
+def test_throughput_grows_with_pool_size():
+    """50 request đồng thời: pool lớn hơn cho throughput cao hơn"""
+    serial_elapsed, results = run_burst(io_workers=1)
+    parallel_elapsed, _ = run_burst(io_workers=10)
+
+    assert len(results) == CONCURRENT_REQUESTS
+    assert serial_elapsed >= CONCURRENT_REQUESTS * VENDOR_DELAY
+    assert parallel_elapsed < serial_elapsed / 4
+
+def test_event_loop_stays_responsive():
+    """Vendor chậm không chặn event loop"""
+    facade = AsyncStockDataService(service=SlowVendorService(), io_workers=2, cpu_workers=1)
+
+    async def scenario():
+        slow = asyncio.ensure_future(facade.get_stock_price("VNM", "2024-01-01", "2024-01-31"))
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        loop_latency = time.perf_counter() - start
+        await slow
+        return loop_latency
+
+    try:
+        assert asyncio.run(scenario()) < VENDOR_DELAY
+    finally:
+        facade.shutdown()
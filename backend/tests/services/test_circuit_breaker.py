@@ -0,0 +1,130 @@
+"""
+Tests for source circuit breakers and adaptive rate limiting
+"""
+import time
+
+import pytest
+
+from app.services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitOpenError, SourceBreakers, is_source_failure
+)
+from app.services.rate_limit import AdaptiveTokenBucket, SourceRateLimiter
+from app.services.stock_data import StockDataService
+
+class FakeSource:
+    """Local stand-in for a vendor source that injects latency and errors"""
+
+    def __init__(self, latency=0.0, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def history(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("429 Too Many Requests")
+        return "bars"
+
+class FakeRegistry:
+    def get_listing(self):
+        return None
+
+@pytest.fixture
+def service():
+    return StockDataService(
+        registry=FakeRegistry(),
+        limiter=SourceRateLimiter({"VCI": 1000}, target_latency=0.05),
+        breakers=SourceBreakers(failure_threshold=3, reset_timeout=0.1)
+    )
+
+def test_breaker_opens_and_fails_fast(service):
+    """Nguồn lỗi liên tục thì ngắt mạch và không gọi nguồn nữa"""
+    source = FakeSource(fail=True)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            service._vendor_call('VCI', source.history)
+
+    with pytest.raises(CircuitOpenError):
+        service._vendor_call('VCI', source.history)
+    assert source.calls == 3
+    assert service.breakers.get('VCI').state == OPEN
+
+def test_breaker_recovers_after_trial_call(service):
+    """Sau reset_timeout, một lời gọi thử thành công sẽ đóng mạch"""
+    source = FakeSource(fail=True)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            service._vendor_call('VCI', source.history)
+
+    time.sleep(0.11)
+    assert service.breakers.get('VCI').state == HALF_OPEN
+    source.fail = False
+    assert service._vendor_call('VCI', source.history) == "bars"
+    assert service.breakers.get('VCI').state == CLOSED
+
+class HTTPError(Exception):
+    """Stand-in for an HTTP client error carrying its response"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+def test_only_source_errors_count():
+    """Chỉ lỗi kết nối, timeout, bị giới hạn và 5xx mới tính là nguồn lỗi"""
+    assert is_source_failure(ConnectionError("reset"))
+    assert is_source_failure(TimeoutError())
+    assert is_source_failure(HTTPError(503))
+    assert is_source_failure(HTTPError(429))
+    assert not is_source_failure(HTTPError(404))
+    assert not is_source_failure(ValueError("Symbol XYZ not found"))
+    assert not is_source_failure(KeyError("close"))
+
+def test_request_errors_do_not_open_the_breaker(service):
+    """Lỗi do request (mã không tồn tại, dữ liệu rỗng) không ngắt mạch nguồn"""
+    def unknown_symbol():
+        raise ValueError("Symbol XYZ not found")
+
+    bucket = service.limiter.bucket('VCI')
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            service._vendor_call('VCI', unknown_symbol)
+
+    assert service.breakers.get('VCI').state == CLOSED
+    assert service.breakers.get('VCI').snapshot()["total_failures"] == 0
+    assert bucket.rate == pytest.approx(1000)
+
+def test_request_error_on_trial_call_keeps_probing(service):
+    """Lời gọi thử gặp lỗi request không làm kẹt mạch ở trạng thái half-open"""
+    source = FakeSource(fail=True)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            service._vendor_call('VCI', source.history)
+    time.sleep(0.11)
+
+    with pytest.raises(KeyError):
+        service._vendor_call('VCI', lambda: {}["close"])
+    source.fail = False
+    assert service._vendor_call('VCI', source.history) == "bars"
+    assert service.breakers.get('VCI').state == CLOSED
+
+def test_errors_and_latency_lower_the_rate(service):
+    """Lỗi hoặc độ trễ cao làm giảm tốc độ gọi nguồn"""
+    bucket = service.limiter.bucket('VCI')
+    slow = FakeSource(latency=0.06)
+    service._vendor_call('VCI', slow.history)
+    assert bucket.rate == pytest.approx(500)
+
+    with pytest.raises(ConnectionError):
+        service._vendor_call('VCI', FakeSource(fail=True).history)
+    assert bucket.rate == pytest.approx(250)
+
+def test_rate_recovers_additively():
+    """Lời gọi nhanh và thành công tăng dần tốc độ, không vượt max_rate"""
+    bucket = AdaptiveTokenBucket(rate=10, min_rate=1, increase_step=1)
+    for _ in range(5):
+        bucket.record(False, 0.1)
+    assert bucket.rate == 1
+    for _ in range(20):
+        bucket.record(True, 0.1)
+    assert bucket.rate == 10
@@ -0,0 +1,66 @@
+"""
+Tests for VendorClientRegistry
+"""
+import time
+import threading
+
+from app.services.client_registry import VendorClientRegistry
+
+def make_registry(**kwargs):
+    calls = []
+
+    def factory(symbol, source):
+        calls.append((symbol, source))
+        return object()
+
+    return VendorClientRegistry(factory=factory, **kwargs), calls
+
+def test_reuses_client_per_source_and_symbol():
+    """Cùng (source, symbol) dùng lại một client"""
+    registry, calls = make_registry()
+    first = registry.get("vnm", "VCI")
+    second = registry.get("VNM", "VCI")
+    other_source = registry.get("VNM", "TCBS")
+
+    assert first is second
+    assert other_source is not first
+    assert calls == [("VNM", "VCI"), ("VNM", "TCBS")]
+    assert registry.stats()["hits"] == 1
+
+def test_evicts_idle_clients():
+    """Client không dùng quá idle_seconds bị loại bỏ"""
+    registry, calls = make_registry(idle_seconds=0.01)
+    registry.get("VNM", "VCI")
+    time.sleep(0.02)
+
+    assert registry.evict_idle() == 1
+    assert len(registry) == 0
+    registry.get("VNM", "VCI")
+    assert len(calls) == 2
+
+def test_max_entries_evicts_least_recently_used():
+    """Vượt max_entries thì loại client ít dùng nhất"""
+    registry, _ = make_registry(max_entries=2)
+    vnm = registry.get("VNM", "VCI")
+    registry.get("FPT", "VCI")
+    registry.get("VNM", "VCI")
+    registry.get("HPG", "VCI")
+
+    assert len(registry) == 2
+    assert registry.get("VNM", "VCI") is vnm
+
+def test_concurrent_get_returns_single_client():
+    """Nhiều luồng cùng lấy một mã chỉ giữ lại một client"""
+    registry, _ = make_registry()
+    results = []
+
+    def worker():
+        results.append(registry.get("VNM", "VCI"))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in results}) == 1
@@ -0,0 +1,134 @@
+"""
+Tests for SingleFlight request coalescing
+"""
+import threading
+import time
+
+import pandas as pd
+
+from app.services.coalescing import SingleFlight
+
+def run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    """Các request giống nhau cùng lúc chỉ gọi upstream một lần"""
+    flight = SingleFlight()
+    upstream_calls = []
+    results = []
+
+    def fetch():
+        upstream_calls.append(1)
+        time.sleep(0.05)
+        return {"symbol": "VNM"}
+
+    run_concurrently(10, lambda: results.append(flight.do(("VNM", "VCI"), fetch)))
+
+    assert len(upstream_calls) == 1
+    assert len(results) == 10
+    assert all(result is results[0] for result in results)
+    stats = flight.stats()
+    assert stats["executed"] == 1
+    assert stats["coalesced"] == 9
+    assert stats["in_flight"] == 0
+
+def test_different_keys_are_not_coalesced():
+    """Khác tham số thì gọi riêng"""
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats()["executed"] == 2
+
+def test_error_is_shared_and_not_cached():
+    """Lỗi được trả cho mọi waiter và không bị cache"""
+    flight = SingleFlight()
+    errors = []
+
+    def failing():
+        time.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flight.do("VNM", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    run_concurrently(5, call)
+    assert len(errors) == 5
+    assert flight.do("VNM", lambda: "ok") == "ok"
+
+def test_coalesce_decorator_ignores_instance():
+    """Decorator gộp các lời gọi từ nhiều instance"""
+    flight = SingleFlight()
+    calls = []
+
+    class Service:
+        @flight.coalesce()
+        def fetch(self, symbol, start_date):
+            calls.append(symbol)
+            time.sleep(0.05)
+            return symbol
+
+    run_concurrently(2, lambda: Service().fetch("VNM", "2024-01-01"))
+
+    assert calls == ["VNM"]
+
+def test_coalesce_key_uses_bound_arguments():
+    """Vị trí, từ khóa, mặc định và mã viết thường đều cho cùng một khóa"""
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    class Service:
+        @flight.coalesce()
+        def fetch(self, symbol, interval='1D'):
+            calls.append(symbol)
+            release.wait(1)
+            return symbol
+
+    results = []
+    spellings = [
+        lambda service: service.fetch("VCB"),
+        lambda service: service.fetch(symbol="VCB"),
+        lambda service: service.fetch("vcb", "1D"),
+        lambda service: service.fetch("VCB", interval="1D")
+    ]
+    threads = [threading.Thread(target=lambda f=f: results.append(f(Service()))) for f in spellings]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["calls"] < len(spellings):
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["VCB"]
+    assert results == ["VCB"] * 4
+
+def test_waiters_get_their_own_dataframe():
+    """Mỗi người chờ nhận bản sao DataFrame, sửa tại chỗ không ảnh hưởng người khác"""
+    flight = SingleFlight()
+    release = threading.Event()
+    results = []
+
+    def fetch():
+        release.wait(1)
+        return pd.DataFrame({'close': [1.0, 2.0]})
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("VNM", fetch))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["calls"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    results[0]['close'] *= 10
+    assert len({id(frame) for frame in results}) == 3
+    assert sorted(frame['close'].iloc[0] for frame in results) == [1.0, 1.0, 10.0]
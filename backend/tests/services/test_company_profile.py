@@ -0,0 +1,77 @@
+"""
+Tests for the company profile cache
+"""
+import threading
+import time
+
+import pytest
+
+from app.services.coalescing import SingleFlight
+from app.services.company_profile import CompanyProfileCache
+from app.services.stock_data import StockDataService
+
+class FakeFetcher:
+    """Đếm số lần gọi nhà cung cấp theo (mã, mục)"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol, section):
+        with self._lock:
+            self.calls.append((symbol, section))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("vendor down")
+        return [{"symbol": symbol, "section": section}]
+
+def test_overview_shared_between_endpoints():
+    """/info và /basic-info dùng chung một lần gọi overview"""
+    fetch = FakeFetcher()
+    service = StockDataService(profiles=CompanyProfileCache(single_flight=SingleFlight()))
+    service._fetch_profile_section = fetch
+
+    info = service.get_stock_info("VNM")
+    basic = service.get_stock_basic_info("vnm")
+
+    assert info["data"] == basic["data"] == {"symbol": "VNM", "section": "overview"}
+    assert fetch.calls == [("VNM", "overview")]
+
+def test_section_ttl_and_stale_fallback():
+    """Mỗi mục có TTL riêng; hết hạn mà lỗi thì trả dữ liệu cũ"""
+    fetch = FakeFetcher()
+    cache = CompanyProfileCache(ttls={"events": 0.0}, single_flight=SingleFlight())
+
+    cache.get("FPT", "officers", fetch)
+    cache.get("FPT", "officers", fetch)
+    cache.get("FPT", "events", fetch)
+    fetch.fail = True
+    stale = cache.get("FPT", "events", fetch)
+
+    assert fetch.calls.count(("FPT", "officers")) == 1
+    assert fetch.calls.count(("FPT", "events")) == 2
+    assert stale == [{"symbol": "FPT", "section": "events"}]
+    assert cache.stats()["stale"] == 1
+
+    with pytest.raises(ConnectionError):
+        cache.get("HPG", "events", fetch)
+
+def test_get_many_fetches_in_parallel():
+    """Danh mục nhiều mã lấy overview song song"""
+    fetch = FakeFetcher(delay=0.1)
+    cache = CompanyProfileCache(single_flight=SingleFlight())
+
+    started = time.monotonic()
+    result = cache.get_many(["VNM", "FPT", "HPG", "VNM"], "overview", fetch, max_workers=4)
+
+    assert list(result) == ["VNM", "FPT", "HPG"]
+    assert len(fetch.calls) == 3
+    assert time.monotonic() - started < 0.25
+
+def test_unknown_section():
+    """Mục không hỗ trợ thì báo lỗi"""
+    with pytest.raises(ValueError):
+        CompanyProfileCache().get("VNM", "dividends", FakeFetcher())
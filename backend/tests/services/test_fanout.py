@@ -0,0 +1,99 @@
+"""
+Tests for the shared fan-out pool
+"""
+import threading
+import time
+
+import pytest
+
+from app.services.fanout import FanOutPool
+
+def test_batch_limit_caps_concurrent_calls():
+    """Một batch không chạy quá limit lời gọi cùng lúc"""
+    pool = FanOutPool(max_workers=8)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return 1
+
+    futures = pool.submit_all({i: call for i in range(10)}, limit=2)
+
+    assert [future.result() for future in futures.values()] == [1] * 10
+    assert peak[0] <= 2
+    assert pool.stats()["submitted"] == 10
+    pool.shutdown()
+
+def test_failures_stay_in_their_future():
+    """Lời gọi lỗi chỉ làm hỏng future của nó"""
+    pool = FanOutPool(max_workers=2)
+
+    def fail():
+        raise ValueError("boom")
+
+    futures = pool.submit_all({"ok": lambda: "VNM", "bad": fail})
+
+    assert futures["ok"].result() == "VNM"
+    with pytest.raises(ValueError):
+        futures["bad"].result()
+    pool.shutdown()
+
+def test_nested_fan_out_runs_inline():
+    """Fan-out lồng nhau chạy ngay trên worker, không làm kẹt pool"""
+    pool = FanOutPool(max_workers=1)
+
+    def outer():
+        inner = pool.submit_all({"a": lambda: 1, "b": lambda: 2})
+        return sum(future.result() for future in inner.values())
+
+    futures = pool.submit_all({"outer": outer})
+
+    assert futures["outer"].result(timeout=5) == 3
+    assert pool.stats()["inline"] == 2
+    pool.shutdown()
+
+def test_abandoned_calls_hold_only_their_lane():
+    """Lời gọi quá hạn chỉ giữ slot của lane, lời gọi chưa chạy bị hủy và trả slot"""
+    pool = FanOutPool(max_workers=2)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "late"
+
+    # Lane 1 slot: lời gọi thứ hai không lấy được slot trước hạn nên bị hủy ngay
+    futures = pool.submit_all({"a": slow, "b": slow}, limit=1, lane="fundamental", timeout=0.05)
+    assert futures["b"].cancelled()
+    assert pool.stats()["lanes"]["fundamental"] == {"limit": 1, "busy": 1}
+
+    # Lane đầy không chặn các batch khác: worker còn lại vẫn phục vụ
+    assert pool.submit_all({"x": lambda: 1})["x"].result(timeout=1) == 1
+    assert pool.submit_all({"c": slow}, lane="fundamental", timeout=0.05)["c"].cancelled()
+
+    # Lời gọi chậm kết thúc thì trả slot cho lane
+    release.set()
+    assert futures["a"].result(timeout=1) == "late"
+    assert pool.submit_all({"d": lambda: 2}, lane="fundamental", timeout=1)["d"].result(timeout=1) == 2
+    assert pool.stats()["lanes"]["fundamental"]["busy"] == 0
+    pool.shutdown()
+
+def test_cancel_withdraws_calls_not_started():
+    """cancel() rút các lời gọi còn trong hàng đợi và trả slot của chúng"""
+    pool = FanOutPool(max_workers=1)
+    release = threading.Event()
+    blocker = pool.submit_all({"blocker": lambda: release.wait(5)})
+    futures = pool.submit_all({"queued": lambda: "never"}, lane="slow")
+    assert pool.stats()["lanes"]["slow"]["busy"] == 1
+
+    assert pool.cancel([*futures.values(), *blocker.values()]) == 1
+    assert futures["queued"].cancelled() and not blocker["blocker"].cancelled()
+    assert pool.stats()["lanes"]["slow"]["busy"] == 0
+    release.set()
+    pool.shutdown()
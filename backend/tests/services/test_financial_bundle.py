@@ -0,0 +1,153 @@
+"""
+Tests for the financial statement bundle store
+"""
+from datetime import date
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from app.services.coalescing import SingleFlight
+from app.services.financial_bundle import (
+    FinancialStatementStore, ReportUnavailableError, expected_latest_period, latest_period, ratio_metrics
+)
+from app.services.stock_data import StockDataService
+
+def make_reports(year, quarter):
+    rows = [{"yearReport": year, "lengthReport": quarter, "value": 1.0}]
+    return {
+        "balance_sheet": rows,
+        "income_statement": rows,
+        "cash_flow": rows,
+        "financial_ratio": [{"pe": 10.0}]
+    }
+
+class FakeFetcher:
+    def __init__(self, reports):
+        self.reports = reports
+        self.calls = 0
+
+    def __call__(self, symbol, period, lang):
+        self.calls += 1
+        return self.reports
+
+def test_expected_latest_period():
+    """Kỳ báo cáo mới nhất phải có tính đến độ trễ công bố"""
+    assert expected_latest_period('quarter', date(2024, 10, 15), 30, 90) == (2024, 2)
+    assert expected_latest_period('quarter', date(2024, 11, 1), 30, 90) == (2024, 3)
+    assert expected_latest_period('quarter', date(2024, 1, 15), 30, 90) == (2023, 3)
+    assert expected_latest_period('year', date(2024, 3, 1), 30, 90) == (2022, 0)
+    assert expected_latest_period('year', date(2024, 4, 1), 30, 90) == (2023, 0)
+
+def test_latest_period_from_rows():
+    """Đọc kỳ mới nhất từ cột năm/kỳ của các nguồn và ngôn ngữ khác nhau"""
+    reports = {"balance_sheet": [{"Năm": 2023, "Kỳ": 4}, {"Năm": 2024, "Kỳ": 1}]}
+    assert latest_period(reports, 'quarter') == (2024, 1)
+    assert latest_period(reports, 'year') == (2024, 0)
+    assert latest_period({"balance_sheet": [{"value": 1}]}, 'year') is None
+
+def test_ratio_metrics_from_latest_period():
+    """Lấy P/E, ROE... của kỳ mới nhất, kể cả cột nhiều tầng đã lưu dạng chuỗi"""
+    rows = [
+        {('Meta', 'Năm'): 2023, ('Meta', 'Kỳ'): 4, ('Chỉ tiêu định giá', 'P/E'): 9.5},
+        {"('Meta', 'Năm')": 2024, "('Meta', 'Kỳ')": 1, "('Chỉ tiêu định giá', 'P/E')": 11.0,
+         "('Chỉ tiêu khả năng sinh lợi', 'ROE (%)')": 0.18, "('Chỉ tiêu định giá', 'P/B')": None}
+    ]
+    assert ratio_metrics(rows) == {'pe': 11.0, 'roe': 0.18}
+    assert ratio_metrics([]) == {}
+
+def test_bundle_served_until_new_period_due():
+    """Báo cáo đã có kỳ mới nhất thì không gọi lại nhà cung cấp"""
+    expected = expected_latest_period('quarter', date.today(), 30, 90)
+    fetch = FakeFetcher(make_reports(*expected))
+    store = FinancialStatementStore(recheck_seconds=0, single_flight=SingleFlight())
+
+    store.get("VNM", "quarter", "vi", fetch)
+    store.get("vnm", "quarter", "vi", fetch)
+    assert fetch.calls == 1
+
+    # Thiếu kỳ mới nhất: kiểm tra lại sau recheck_seconds
+    outdated = FakeFetcher(make_reports(expected[0] - 1, 4))
+    store.get("FPT", "quarter", "vi", outdated)
+    store.get("FPT", "quarter", "vi", outdated)
+    assert outdated.calls == 2
+
+def test_all_statements_share_one_fetch():
+    """Ba loại báo cáo và chỉ số tài chính dùng chung một lần tải"""
+    expected = expected_latest_period('year', date.today(), 30, 90)
+    service = StockDataService(financials=FinancialStatementStore(single_flight=SingleFlight()))
+
+    with patch.object(StockDataService, '_fetch_financial_bundle', return_value=make_reports(expected[0], 5)) as fetch:
+        for report_type in ['balance_sheet', 'income_statement', 'cash_flow']:
+            result = service.get_stock_financials("VNM", report_type=report_type, period='year')
+            assert result["data"][0]["value"] == 1.0
+        ratio = service.get_financial_ratio("VNM", period='year')
+
+    assert fetch.call_count == 1
+    assert ratio["data"] == [{"pe": 10.0}]
+
+def test_stale_bundle_on_vendor_error():
+    """Nhà cung cấp lỗi thì vẫn trả báo cáo đã lưu"""
+    store = FinancialStatementStore(recheck_seconds=0, single_flight=SingleFlight())
+    store.get("HPG", "year", "vi", FakeFetcher(make_reports(2000, 0)))
+
+    def failing(symbol, period, lang):
+        raise ConnectionError("vendor down")
+
+    bundle = store.get("HPG", "year", "vi", failing)
+    assert bundle["latest_period"] == [2000, 0]
+    with pytest.raises(ConnectionError):
+        store.get("MWG", "year", "vi", failing)
+
+def test_failed_report_does_not_fail_the_others():
+    """Một báo cáo lỗi không làm hỏng các báo cáo còn lại trong bundle"""
+    service = StockDataService(
+        financials=FinancialStatementStore(retry_seconds=3600, single_flight=SingleFlight())
+    )
+
+    def routed_call(kind, symbol, call):
+        if kind == 'finance.cash_flow':
+            raise ConnectionError("cash flow down")
+        return pd.DataFrame([{"yearReport": 2024, "value": 1.0}])
+
+    with patch.object(StockDataService, '_routed_call', side_effect=routed_call) as fetch:
+        balance = service.get_stock_financials("VNM", report_type='balance_sheet', period='year')
+        income = service.get_stock_financials("VNM", report_type='income_statement', period='year')
+        with pytest.raises(ReportUnavailableError):
+            service.get_stock_financials("VNM", report_type='cash_flow', period='year')
+
+    assert fetch.call_count == 4
+    assert balance["data"] == [{"yearReport": 2024, "value": 1.0}]
+    assert income["stale"] is False
+
+def test_failed_report_keeps_previous_rows():
+    """Báo cáo lỗi khi tải lại thì giữ dữ liệu cũ, đánh dấu stale và thử lại sau"""
+    store = FinancialStatementStore(recheck_seconds=0, retry_seconds=0, single_flight=SingleFlight())
+    store.get("HPG", "year", "vi", FakeFetcher(make_reports(2000, 0)))
+
+    partial = {key: rows for key, rows in make_reports(2001, 0).items() if key != 'income_statement'}
+    bundle = store.get("HPG", "year", "vi", FakeFetcher(partial))
+
+    assert bundle["stale"] == ['income_statement']
+    assert bundle["missing"] == []
+    assert bundle["reports"]["income_statement"][0]["yearReport"] == 2000
+    assert bundle["reports"]["balance_sheet"][0]["yearReport"] == 2001
+
+    recovered = store.get("HPG", "year", "vi", FakeFetcher(make_reports(2001, 0)))
+    assert recovered["stale"] == []
+
+def test_bundles_bounded_lru():
+    """Giữ tối đa max_bundles bundle, bỏ bundle ít dùng nhất"""
+    expected = expected_latest_period('year', date.today(), 30, 90)
+    fetch = FakeFetcher(make_reports(*expected))
+    store = FinancialStatementStore(max_bundles=2, single_flight=SingleFlight())
+
+    store.get("VNM", "year", "vi", fetch)
+    store.get("FPT", "year", "vi", fetch)
+    store.get("VNM", "year", "vi", fetch)
+    store.get("HPG", "year", "vi", fetch)
+
+    assert store.stats()["bundles"] == 2
+    assert store.stats()["evictions"] == 1
+    store.get("VNM", "year", "vi", fetch)
+    assert fetch.calls == 3
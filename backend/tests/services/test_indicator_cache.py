@@ -0,0 +1,97 @@
+"""
+Tests for the indicator series cache
+"""
+import numpy as np
+import pandas as pd
+
+from app.services.indicator_cache import IndicatorSeriesCache
+from app.services.price_archive import PriceArchive
+
+def make_loader(close, calls):
+    times = pd.bdate_range("2024-01-01", periods=len(close)).to_numpy(dtype='datetime64[ns]')
+
+    def load():
+        calls.append(1)
+        return times, {'close': np.asarray(close, dtype=float)}
+    return load
+
+def test_series_are_computed_once_per_version():
+    """Cùng phiên bản dữ liệu thì dùng lại chuỗi đã tính; phiên bản mới thì tính lại"""
+    cache = IndicatorSeriesCache(max_symbols=2)
+    calls = []
+    close = np.linspace(10, 60, 300)
+
+    times, first = cache.get("vnm", "v1", ["MA", "EMA(34)"], make_loader(close, calls))
+    _, again = cache.get("VNM", "v1", ["EMA(34)"], make_loader(close, calls))
+    assert len(calls) == 1
+    assert again["EMA(34)"] is first["EMA(34)"]
+    assert len(times) == 300
+
+    _, updated = cache.get("VNM", "v2", ["EMA(34)"], make_loader(np.append(close, 61.0), calls))
+    assert len(calls) == 2
+    assert len(updated["EMA(34)"]) == 301
+    assert cache.stats() == {"symbols": 1, "hits": 1, "misses": 2, "invalidations": 1}
+
+    cache.get("AAA", "v1", ["RSI"], make_loader(close, calls))
+    cache.get("BBB", "v1", ["RSI"], make_loader(close, calls))
+    assert cache.stats()["symbols"] == 2
+
+def test_archive_version_follows_content(tmp_path):
+    """Phiên bản của archive chỉ đổi khi dữ liệu nến thay đổi"""
+    archive = PriceArchive(str(tmp_path))
+    days = pd.bdate_range("2024-01-01", periods=10)
+    bars = pd.DataFrame({'time': days, 'close': np.arange(10.0), 'volume': np.arange(10)})
+
+    assert archive.version("VNM") is None
+    archive.write("VNM", bars, meta={"end": "2024-01-12"})
+    version = archive.version("VNM")
+    archive.write("VNM", bars, meta={"end": "2024-01-13"})
+    assert archive.version("VNM") == version
+
+    bars.loc[9, 'close'] = 9.5
+    archive.write("VNM", bars)
+    assert archive.version("VNM") != version
+
+def test_cache_hit_matches_miss(tmp_path):
+    """Dùng cache hay tính trực tiếp (có phiên live chưa lưu) đều cho cùng kết quả EMA, MACD, OBV"""
+    from app.services.price_store import PriceHistoryStore
+    from app.services.stock_data import StockDataService
+
+    class FakeRegistry:
+        def get_listing(self):
+            return None
+
+    rng = np.random.default_rng(5)
+    days = pd.bdate_range("2023-01-02", periods=400)
+    bars = pd.DataFrame({
+        'time': days,
+        'open': 1.0,
+        'high': 1.0,
+        'low': 1.0,
+        'close': 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days)))),
+        'volume': rng.integers(1000, 5000, len(days))
+    })
+    store = PriceHistoryStore(str(tmp_path))
+    store.get("VNM", "2023-01-02", days[-1].strftime('%Y-%m-%d'), lambda symbol, start, end: bars)
+    service = StockDataService(
+        registry=FakeRegistry(), store=store, series_cache=IndicatorSeriesCache()
+    )
+    indicators = ["EMA(34)", "MACD", "OBV"]
+    start, end = "2024-03-01", days[-1].strftime('%Y-%m-%d')
+    window = store.read("VNM", service.warmup_start(start, indicators), end)
+    live_day = days[-1] + pd.Timedelta(days=3)
+    live = pd.DataFrame({'time': [live_day], 'close': [60.0], 'volume': [1000]})
+
+    hit = service.cached_technical_indicators("VNM", window, indicators, start, end, layout="columnar")
+    miss = service.cached_technical_indicators(
+        "VNM", pd.concat([window, live], ignore_index=True), indicators, start,
+        live_day.strftime('%Y-%m-%d'), layout="columnar"
+    )
+
+    assert service.indicator_cache.stats()["misses"] == 1
+    # Same values on every stored bar; the miss only adds the live bar
+    assert miss["dates"][:-1] == hit["dates"]
+    for name in ("EMA(34)", "OBV"):
+        assert miss[name]["values"][:-1] == hit[name]["values"]
+    for part, series in hit["MACD"].items():
+        assert miss["MACD"][part]["values"][:-1] == series["values"]
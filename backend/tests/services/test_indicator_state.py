@@ -0,0 +1,120 @@
+"""
+Tests for streaming indicator state
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.indicators import IndicatorEngine
+from app.services.indicator_state import IndicatorStateStore, SymbolIndicatorState
+
+@pytest.fixture
+def history():
+    """Lịch sử giá giả lập 300 phiên, có phiên thiếu giá"""
+    rng = np.random.default_rng(11)
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.015, 300)))
+    close[[40, 180]] = np.nan
+    return pd.DataFrame({'time': pd.bdate_range("2023-01-02", periods=300), 'close': close})
+
+def assert_matches_engine(values, close):
+    """So sánh giá trị cuối với tính lại toàn bộ bằng IndicatorEngine"""
+    engine = IndicatorEngine(close)
+    expected = engine.compute(["MA", "RSI", "MACD", "BB"])
+    for name, series in expected["MA"].items():
+        assert values["MA"][name] == pytest.approx(series[-1], rel=1e-9, nan_ok=True)
+    for name, series in expected["BB"].items():
+        assert values["BB"][name] == pytest.approx(series[-1], rel=1e-9, nan_ok=True)
+    for name, series in expected["MACD"].items():
+        assert values["MACD"][name] == pytest.approx(series[-1], rel=1e-9, abs=1e-9)
+    assert values["RSI"] == pytest.approx(expected["RSI"][-1], rel=1e-9, nan_ok=True)
+    assert values["RSI_Wilder"] == pytest.approx(engine.rsi(14, wilder=True)[-1], rel=1e-9, nan_ok=True)
+
+def test_streaming_matches_full_recompute(history):
+    """Cập nhật từng phiên cho kết quả giống tính lại toàn bộ"""
+    state = SymbolIndicatorState()
+    close = history['close'].to_numpy()
+    for i, (time, price) in enumerate(zip(history['time'], close)):
+        state.update(time, price)
+        if i in (10, 150, 210, 299):
+            assert_matches_engine(state.values(), close[:i + 1])
+
+def test_revised_last_bar(history):
+    """Sửa giá phiên cuối nhiều lần vẫn khớp với tính lại"""
+    close = history['close'].to_numpy().copy()
+    state = SymbolIndicatorState.from_history(history['time'], close)
+    last_time = history['time'].iloc[-1]
+
+    for revised in (close[-1] * 1.03, close[-1] * 0.97):
+        assert state.update(last_time, revised) is False
+        close[-1] = revised
+        assert_matches_engine(state.values(), close)
+    assert state.bars == len(close)
+
+    with pytest.raises(ValueError):
+        state.update(history['time'].iloc[-2], 1.0)
+
+def test_store_persists_state(history, tmp_path):
+    """Trạng thái được lưu và nạp lại sau khi khởi động lại"""
+    calls = []
+
+    def bootstrap(symbol, until):
+        calls.append((symbol, until))
+        return history.iloc[:-1]
+
+    store = IndicatorStateStore(str(tmp_path))
+    last = history.iloc[-1]
+    values = store.update("vnm", last['time'], last['close'], bootstrap=bootstrap)
+    assert calls and calls[0][0] == "VNM"
+
+    reloaded = IndicatorStateStore(str(tmp_path)).get("VNM")
+    assert reloaded["time"] == values["time"]
+    assert values["MA"]["MA20"] is not None
+    assert reloaded["MA"]["MA20"] == pytest.approx(values["MA"]["MA20"], rel=1e-12)
+    assert reloaded["RSI"] == pytest.approx(values["RSI"], rel=1e-12)
+    assert reloaded["MACD"] == values["MACD"]
+
+def test_store_keeps_recent_symbols_in_memory(history, tmp_path):
+    """Chỉ giữ max_symbols trạng thái trong bộ nhớ, mã bị loại được đọc lại từ file"""
+    store = IndicatorStateStore(str(tmp_path), max_symbols=1)
+    bootstrap = lambda symbol, until: history.iloc[:-1]
+    last = history.iloc[-1]
+    vnm = store.update("VNM", last['time'], last['close'], bootstrap=bootstrap)
+    store.update("FPT", last['time'], last['close'], bootstrap=bootstrap)
+
+    assert store.stats() == {"symbols": 1, "evictions": 1}
+    assert store.get("VNM")["RSI"] == pytest.approx(vnm["RSI"], rel=1e-12)
+    assert store.last_time("VNM") == last['time']
+
+def test_live_indicators_follow_new_bars(history, tmp_path):
+    """Chỉ báo live chỉ áp dụng các phiên mới và khớp với tính lại toàn bộ"""
+    from unittest.mock import patch
+    from app.services.stock_data import StockDataService
+
+    bars = history.assign(time=pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=len(history)))
+    available = [len(bars) - 2]
+    starts = []
+
+    def price_history(symbol, start_date, end_date, interval='1D'):
+        starts.append(start_date)
+        shown = bars.iloc[:available[0]]
+        return shown[(shown['time'] >= start_date) & (shown['time'] <= end_date)].reset_index(drop=True)
+
+    class FakeRegistry:
+        def get_listing(self):
+            return None
+
+    service = StockDataService(registry=FakeRegistry(), states=IndicatorStateStore(str(tmp_path)))
+    with patch.object(StockDataService, 'get_price_history', side_effect=price_history):
+        service.get_live_indicators("VNM")
+        available[0] = len(bars)
+        result = service.get_live_indicators("VNM")
+
+    # The store reports NaN as None
+    values = {
+        name: {key: np.nan if item is None else item for key, item in value.items()}
+        if isinstance(value, dict) else np.nan if value is None else value
+        for name, value in result["data"].items()
+    }
+    assert result["symbol"] == "VNM"
+    # The state was bootstrapped from the warm-up window, the earliest read
+    assert_matches_engine(values, bars[bars['time'] >= min(starts)]['close'].to_numpy())
@@ -0,0 +1,168 @@
+"""
+Tests for the NumPy indicator engine
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.indicators import IndicatorEngine, to_response
+
+@pytest.fixture
+def close():
+    """Giá đóng cửa giả lập, có vài phiên thiếu dữ liệu"""
+    rng = np.random.default_rng(7)
+    values = 50000 * np.exp(np.cumsum(rng.normal(0, 0.02, 400)))
+    values[[30, 31, 250]] = np.nan
+    return pd.Series(values)
+
+def assert_series(actual, expected):
+    np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-6, equal_nan=True)
+
+def test_moving_averages_match_pandas(close):
+    """SMA và Bollinger Bands khớp với rolling của pandas, kể cả khi thiếu dữ liệu"""
+    engine = IndicatorEngine(close.to_numpy())
+    for window in (5, 10, 20, 50, 200):
+        assert_series(engine.sma(window), close.rolling(window=window).mean())
+
+    bands = engine.bollinger()
+    std = close.rolling(window=20).std()
+    assert_series(bands["Upper"], close.rolling(window=20).mean() + 2 * std)
+    assert bands["Middle"] is engine.sma(20)
+
+def test_rsi_and_macd_match_pandas(close):
+    """RSI và MACD khớp với cách tính bằng pandas"""
+    engine = IndicatorEngine(close.to_numpy())
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    assert_series(engine.rsi(14), 100 - 100 / (1 + gain / loss))
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    result = engine.macd()
+    assert_series(result["MACD"], macd)
+    assert_series(result["Signal"], macd.ewm(span=9, adjust=False).mean())
+
+def test_wilder_rsi():
+    """RSI Wilder: khởi tạo bằng trung bình 14 phiên đầu rồi làm mượt"""
+    close = np.array([44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42, 45.84, 46.08,
+                      45.89, 46.03, 45.61, 46.28, 46.28, 46.00, 46.03, 46.41, 46.22, 45.64])
+    rsi = IndicatorEngine(close).rsi(14, wilder=True)
+    assert np.isnan(rsi[:14]).all()
+    assert rsi[14] == pytest.approx(70.46, abs=0.01)
+    assert rsi[15] == pytest.approx(66.25, abs=0.01)
+
+def test_short_history_and_response_layout():
+    """Lịch sử ngắn hơn cửa sổ thì trả về None, giữ định dạng JSON cũ"""
+    data = pd.DataFrame({'close': [10.0, 11.0, 12.0]})
+    result = IndicatorEngine(data['close'].to_numpy()).compute(["MA", "RSI"])
+    response = to_response(result, data.index)
+
+    assert response["MA"]["MA5"] == {0: None, 1: None, 2: None}
+    assert set(response["MA"]) == {"MA5", "MA10", "MA20", "MA50", "MA200"}
+    assert response["RSI"] == {0: None, 1: None, 2: None}
+
+def test_lookback_covers_requested_indicators():
+    """Số phiên khởi động đủ cho chỉ báo dài nhất được yêu cầu"""
+    from app.services.indicators import lookback_bars, lookback_days
+
+    assert lookback_bars(["RSI"]) == 14
+    assert lookback_bars(["MA", "RSI"]) == 199
+    assert lookback_bars([]) == 0
+    assert lookback_days([]) == 0
+    # 199 phiên giao dịch cần nhiều hơn 199 ngày lịch
+    assert lookback_days(["MA"]) > 199 * 7 / 5
+
+def test_warmup_history_is_trimmed():
+    """Dữ liệu khởi động chỉ dùng để tính, đầu ra cắt về khoảng yêu cầu"""
+    from unittest.mock import patch
+    from app.services.stock_data import StockDataService
+
+    times = pd.bdate_range("2023-01-02", periods=320)
+    rng = np.random.default_rng(3)
+    hist = pd.DataFrame({
+        'time': times,
+        'close': 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, len(times))))
+    })
+    start_date = times[300].strftime('%Y-%m-%d')
+    end_date = times[-1].strftime('%Y-%m-%d')
+
+    with patch.object(StockDataService, 'get_price_history', return_value=hist) as history:
+        service = StockDataService()
+        result = service.get_technical_analysis("VNM", start_date, end_date, ["MA"])
+
+    requested_start = history.call_args[0][1]
+    assert requested_start <= times[101].strftime('%Y-%m-%d')
+
+    ma200 = result["data"]["MA"]["MA200"]
+    assert list(ma200) == list(range(20))
+    assert None not in ma200.values()
+    expected = hist['close'].rolling(window=200).mean().iloc[300:].to_numpy()
+    np.testing.assert_allclose(list(ma200.values()), expected, rtol=1e-9)
+
+def test_columnar_layout():
+    """Định dạng cột: mảng ngày dùng chung, bỏ phần khởi động bằng offset, null ở giữa"""
+    import json
+    from app.services.stock_data import StockDataService
+
+    times = pd.bdate_range("2024-01-01", periods=40)
+    close = np.linspace(100.0, 139.0, 40)
+    close[30] = np.nan
+    hist = pd.DataFrame({'time': times, 'close': close})
+
+    result = StockDataService().calculate_technical_indicators(hist, ["MA", "BB"], layout="columnar")
+
+    assert result["dates"][0] == "2024-01-01"
+    assert len(result["dates"]) == 40
+    ma5 = result["MA"]["MA5"]
+    assert ma5["offset"] == 4
+    assert ma5["values"][0] == pytest.approx(102.0)
+    assert ma5["offset"] + len(ma5["values"]) == 40
+    assert ma5["values"][30 - 4] is None
+    assert result["MA"]["MA200"] == {"offset": 40, "values": []}
+
+    index_layout = StockDataService().calculate_technical_indicators(hist, ["MA", "BB"])
+    assert len(json.dumps(result)) * 2 < len(json.dumps(index_layout))
+
+def test_parameterized_specs():
+    """Chỉ báo có tham số: EMA(34), ATR(14), Stoch(14,3), OBV khớp với cách tính bằng pandas"""
+    from app.services.indicators import parse_indicator
+
+    rng = np.random.default_rng(11)
+    close = pd.Series(20000 * np.exp(np.cumsum(rng.normal(0, 0.02, 300))))
+    high = close * (1 + rng.uniform(0, 0.02, 300))
+    low = close * (1 - rng.uniform(0, 0.02, 300))
+    volume = pd.Series(rng.integers(1000, 50000, 300).astype(float))
+
+    engine = IndicatorEngine(close.to_numpy(), high=high.to_numpy(), low=low.to_numpy(), volume=volume.to_numpy())
+    result = engine.compute(["ema(34)", "ATR(14)", "Stoch(14,3)", "OBV", "RSI"])
+    assert list(result) == ["EMA(34)", "ATR(14)", "Stoch(14,3)", "OBV", "RSI"]
+
+    assert_series(result["EMA(34)"], close.ewm(span=34, adjust=False).mean())
+
+    true_range = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    atr = true_range.copy()
+    atr[:13] = np.nan
+    atr[13] = true_range[:14].mean()
+    for i in range(14, len(atr)):
+        atr[i] = (atr[i - 1] * 13 + true_range[i]) / 14
+    assert_series(result["ATR(14)"], atr)
+
+    lowest, highest = low.rolling(14).min(), high.rolling(14).max()
+    k = 100 * (close - lowest) / (highest - lowest)
+    assert_series(result["Stoch(14,3)"]["K"], k)
+    assert_series(result["Stoch(14,3)"]["D"], k.rolling(3).mean())
+
+    assert_series(result["OBV"], (np.sign(close.diff()).fillna(0) * volume).cumsum())
+
+    # Chuỗi trung gian dùng chung được tính một lần
+    assert engine.ema(34) is result["EMA(34)"]
+    assert engine.compute(["MACD(34,50,9)"])["MACD(34,50,9)"]["MACD"] is not None
+    assert sum(1 for key in engine._memo if key[:2] == ('ema', 'close') and key[2] == 34) == 1
+
+    assert parse_indicator("BB(20, 2.5)").label == "BB(20,2.5)"
+    assert parse_indicator("stoch").params == (14, 3)
+    for bad in ("XYZ", "EMA(0)", "EMA(a)", "RSI(14,2)"):
+        with pytest.raises(ValueError):
+            parse_indicator(bad)
+    with pytest.raises(ValueError):
+        IndicatorEngine(close.to_numpy()).compute(["ATR(14)"])
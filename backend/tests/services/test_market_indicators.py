@@ -0,0 +1,74 @@
+"""
+Tests for market-wide indicator computation
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.indicators import IndicatorEngine
+from app.services.market_indicators import (
+    MarketIndicatorSnapshot, MarketIndicatorStore, compute_market_indicators, load_market_matrix
+)
+from app.services.price_archive import PriceArchive
+
+def make_bars(days, seed):
+    rng = np.random.default_rng(seed)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days))))
+    return pd.DataFrame({
+        'time': days,
+        'open': close,
+        'high': close,
+        'low': close,
+        'close': close,
+        'volume': rng.integers(1000, 100000, len(days))
+    })
+
+@pytest.fixture
+def archive(tmp_path):
+    """Ba mã với lịch giao dịch khác nhau: đầy đủ, tạm ngừng giao dịch, niêm yết muộn"""
+    archive = PriceArchive(str(tmp_path / "prices"))
+    days = pd.bdate_range("2023-01-02", periods=300)
+    archive.write("AAA", make_bars(days, 1))
+    archive.write("BBB", make_bars(days.delete(range(100, 130)), 2))
+    archive.write("CCC", make_bars(days[150:], 3))
+    return archive
+
+def test_matrix_result_matches_single_symbol(archive):
+    """Mỗi mã trong ma trận cho kết quả giống tính riêng trên các phiên của chính mã đó"""
+    matrix = load_market_matrix(archive, ["ccc", "AAA", "BBB", "ZZZ"])
+    assert matrix.symbols.tolist() == ["AAA", "BBB", "CCC"]
+    assert matrix.close.shape == (3, 300)
+
+    result = compute_market_indicators(matrix.close)
+    for row, symbol in enumerate(matrix.symbols):
+        traded = ~np.isnan(matrix.close[row])
+        single = IndicatorEngine(archive.read(symbol)['close'].to_numpy()).compute(["MA", "RSI", "MACD", "BB"])
+        np.testing.assert_allclose(result["MA"]["MA20"][row, traded], single["MA"]["MA20"], rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(result["RSI"][row, traded], single["RSI"], rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(
+            result["MACD"]["Signal"][row, traded], single["MACD"]["Signal"], rtol=1e-9, equal_nan=True
+        )
+        assert np.isnan(result["MA"]["MA5"][row, ~traded]).all()
+
+def test_store_roundtrip_and_reads(archive, tmp_path):
+    """Lưu snapshot ra file rồi đọc lại giá trị mới nhất và chuỗi theo ngày"""
+    snapshot = MarketIndicatorSnapshot.compute(load_market_matrix(archive, ["AAA", "BBB", "CCC"]))
+    MarketIndicatorStore(str(tmp_path / "market")).save(snapshot)
+
+    reloaded = MarketIndicatorStore(str(tmp_path / "market")).snapshot()
+    assert reloaded.latest("bbb") == snapshot.latest("BBB")
+    assert reloaded.latest("ZZZ") is None
+
+    series = reloaded.series("CCC", start="2023-01-01")
+    assert len(series["dates"]) == 150
+    assert series["MA"]["MA20"]["offset"] == 19
+    assert series["RSI"]["values"][-1] == pytest.approx(snapshot.latest("CCC")["RSI"], abs=1e-4)
+
+def test_latest_columns(archive):
+    """Giá trị mới nhất của mọi mã, mỗi cột là một mảng (dùng cho bộ lọc)"""
+    snapshot = MarketIndicatorSnapshot.compute(load_market_matrix(archive, ["AAA", "BBB", "CCC"]))
+    columns = snapshot.latest_columns()
+
+    assert {"close", "ma50", "rsi", "macd", "macd_signal", "bb_upper"} <= set(columns)
+    assert columns["symbol"].tolist() == ["AAA", "BBB", "CCC"]
+    assert columns["ma50"][1] == pytest.approx(snapshot.latest("BBB")["MA"]["MA50"])
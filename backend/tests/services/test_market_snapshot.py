@@ -0,0 +1,64 @@
+"""
+Tests for the nightly market snapshot
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.market_indicators import MarketIndicatorSnapshot, load_market_matrix
+from app.services.market_snapshot import MarketSnapshotStore, market_snapshot_columns
+from app.services.price_archive import PriceArchive
+
+@pytest.fixture
+def market(tmp_path):
+    """Hai mã: AAA giao dịch đủ, BBB tạm ngừng giao dịch 10 phiên cuối"""
+    archive = PriceArchive(str(tmp_path / "prices"))
+    days = pd.bdate_range("2023-01-02", periods=300)
+    for symbol, bars in (("AAA", 300), ("BBB", 290)):
+        close = np.linspace(10.0, 40.0, 300)[:bars]
+        archive.write(symbol, pd.DataFrame({
+            'time': days[:bars], 'open': close - 1, 'high': close + 1, 'low': close - 2,
+            'close': close, 'volume': np.full(bars, 1000)
+        }))
+    matrix = load_market_matrix(archive, ["AAA", "BBB"], extra=('open', 'high', 'low'))
+    return MarketIndicatorSnapshot.compute(matrix)
+
+def test_snapshot_columns(market):
+    """Mỗi mã một dòng: nến cuối, lợi suất theo số phiên của chính mã, thanh khoản, chỉ số"""
+    listing = {
+        'symbol': np.array(['AAA', 'BBB', 'CCC'], dtype=object),
+        'organ_name': np.array(['A', 'B', 'C'], dtype=object)
+    }
+    columns = market_snapshot_columns(listing, market, {'AAA': {'pe': 9.0}})
+    close = np.linspace(10.0, 40.0, 300)
+
+    assert columns['symbol'].tolist() == ['AAA', 'BBB', 'CCC']
+    assert columns['close'][1] == pytest.approx(close[289])
+    assert columns['high'][1] == pytest.approx(close[289] + 1)
+    assert columns['date'].tolist() == ['2024-02-23', '2024-02-09', None]
+    assert columns['return_1w'][1] == pytest.approx(close[289] / close[284] - 1)
+    assert columns['avg_value'][0] == pytest.approx(close[280:].mean() * 1000)
+    assert columns['volume_ratio'][0] == pytest.approx(1.0)
+    assert columns['pe'][0] == 9.0 and np.isnan(columns['pe'][1])
+    assert np.isnan(columns['ma50'][2])
+
+def test_store_publishes_builds_atomically(market, tmp_path):
+    """Snapshot được ghi theo phiên bản thời gian tạo; bên đọc chỉ thấy bản đã công bố"""
+    listing = {'symbol': np.array(['AAA', 'BBB'], dtype=object)}
+    columns = market_snapshot_columns(listing, market)
+    writer = MarketSnapshotStore(str(tmp_path / "snapshot"), keep=2)
+    reader = MarketSnapshotStore(str(tmp_path / "snapshot"))
+    assert reader.current() is None
+
+    first = writer.save(columns, built_at=1_700_000_000.0)
+    table = reader.current()
+    assert table.version == first.version
+    assert table.columns['date'].tolist() == columns['date'].tolist()
+    np.testing.assert_allclose(table.columns['rsi'], columns['rsi'], equal_nan=True)
+    assert reader.current() is table
+
+    writer.save(columns, built_at=1_700_086_400.0)
+    writer.save(columns, built_at=1_700_172_800.0)
+    assert reader.current().version != first.version
+    assert len(list((tmp_path / "snapshot").glob("snapshot-*.npz"))) == 2
+    assert [row['symbol'] for row in reader.current().query(sort="-return_1m")] == ['BBB', 'AAA']
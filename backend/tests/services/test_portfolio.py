@@ -0,0 +1,44 @@
+"""
+Tests for the vectorized portfolio performance engine
+"""
+import numpy as np
+import pytest
+
+from app.services.portfolio import align_closes, daily_returns, portfolio_performance
+
+def days(*values):
+    return np.array(values, dtype='datetime64[D]')
+
+def test_align_and_forward_fill():
+    """Ghép giá theo ngày chung; ngày tạm ngừng giao dịch có lợi nhuận 0%"""
+    matrix = align_closes({
+        "AAA": (days("2024-01-02", "2024-01-03", "2024-01-04"), np.array([10.0, 11.0, 12.1])),
+        "BBB": (days("2024-01-02", "2024-01-04"), np.array([20.0, 22.0]))
+    }, ["AAA", "BBB", "CCC"])
+
+    assert matrix.close.shape == (3, 3)
+    assert np.isnan(matrix.close[1, 1]) and np.isnan(matrix.close[:, 2]).all()
+    np.testing.assert_allclose(daily_returns(matrix.close), [[0.1, 0.0, 0.0], [0.1, 0.1, 0.0]])
+
+def test_performance_from_portfolio_returns():
+    """Các chỉ số được tính từ chuỗi lợi nhuận của cả danh mục"""
+    matrix = align_closes({
+        "AAA": (days("2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"), np.array([100.0, 110.0, 99.0, 108.9])),
+        "BBB": (days("2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"), np.array([50.0, 50.0, 50.0, 50.0]))
+    })
+    performance = portfolio_performance(matrix, [0.5, 0.5])
+
+    returns = np.array([0.05, -0.05, 0.05])
+    np.testing.assert_allclose(performance["daily_returns"], returns)
+    assert performance["dates"] == ["2024-01-03", "2024-01-04", "2024-01-05"]
+    assert performance["total_return"] == pytest.approx(np.prod(1 + returns) - 1)
+    assert performance["volatility"] == pytest.approx(returns.std(ddof=1) * np.sqrt(245))
+    assert performance["max_drawdown"] == pytest.approx(-0.05)
+    assert performance["sharpe_ratio"] > 0
+
+def test_empty_and_mismatched():
+    """Không có dữ liệu thì trả về 0; số tỷ trọng phải khớp số mã"""
+    matrix = align_closes({}, ["AAA"])
+    assert portfolio_performance(matrix, [1.0])["daily_returns"] == []
+    with pytest.raises(ValueError):
+        portfolio_performance(matrix, [0.5, 0.5])
@@ -0,0 +1,57 @@
+"""
+Tests for the columnar PriceArchive
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.price_archive import PriceArchive
+
+@pytest.fixture
+def archive(tmp_path):
+    return PriceArchive(str(tmp_path / "archive"))
+
+@pytest.fixture
+def bars():
+    days = pd.bdate_range("2020-01-01", "2024-12-31")
+    close = np.linspace(10, 50, len(days))
+    return pd.DataFrame({
+        'time': days,
+        'open': close - 0.5,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': np.arange(len(days), dtype=np.int64) * 100
+    })
+
+def test_roundtrip_keeps_types(archive, bars):
+    """Ghi rồi đọc lại giữ nguyên dữ liệu và kiểu cột"""
+    archive.write("VNM", bars, meta={"start": "2020-01-01"})
+    result = archive.read("VNM")
+
+    assert len(result) == len(bars)
+    assert result['close'].dtype == np.float64
+    assert result['volume'].dtype == np.int64
+    assert (result['time'].to_numpy() == bars['time'].to_numpy()).all()
+    np.testing.assert_array_equal(result['close'], bars['close'])
+    assert archive.read_meta("VNM") == {"start": "2020-01-01"}
+
+def test_range_slice_selected_columns(archive, bars):
+    """Đọc theo khoảng ngày và chỉ các cột cần dùng"""
+    archive.write("VNM", bars)
+    columns = archive.read_columns("VNM", "2023-03-01", "2023-03-31", columns=['time', 'close'])
+
+    expected = bars[(bars['time'] >= "2023-03-01") & (bars['time'] <= "2023-03-31")]
+    assert set(columns) == {'time', 'close'}
+    assert len(columns['close']) == len(expected)
+    np.testing.assert_array_equal(columns['close'], expected['close'].to_numpy())
+
+def test_overwrite_and_missing_symbol(archive, bars):
+    """Ghi đè thay toàn bộ file; mã chưa có trả về rỗng"""
+    archive.write("VNM", bars)
+    archive.write("VNM", bars.tail(5))
+
+    assert len(archive.read("VNM")) == 5
+    assert archive.last_time("VNM") == bars['time'].iloc[-1]
+    assert archive.read("FPT").empty
+    assert archive.symbols() == ["VNM"]
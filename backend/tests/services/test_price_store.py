@@ -0,0 +1,108 @@
+"""
+Tests for PriceHistoryStore
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app.services.price_store import PriceHistoryStore
+
+class FakeVendor:
+    """Daily bars for every calendar day, recording requested ranges"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, symbol, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        days = pd.date_range(start_date, end_date, freq='D')
+        return pd.DataFrame({
+            'time': days,
+            'open': 1.0,
+            'high': 1.0,
+            'low': 1.0,
+            'close': [float(d.day) for d in days],
+            'volume': 100
+        })
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceHistoryStore(str(tmp_path / "prices"))
+
+def test_second_read_does_not_refetch(store):
+    """Lần đọc thứ hai trong vùng đã lưu không gọi vendor"""
+    vendor = FakeVendor()
+    first = store.get("VNM", "2024-01-01", "2024-01-31", vendor)
+    second = store.get("VNM", "2024-01-10", "2024-01-20", vendor)
+
+    assert len(first) == 31
+    assert len(second) == 11
+    assert vendor.calls == [("2024-01-01", "2024-01-31")]
+
+def test_only_missing_head_and_tail_are_fetched(store):
+    """Chỉ tải phần đầu và phần đuôi còn thiếu"""
+    vendor = FakeVendor()
+    store.get("VNM", "2024-01-10", "2024-01-20", vendor)
+    bars = store.get("VNM", "2024-01-01", "2024-01-31", vendor)
+
+    assert vendor.calls[1:] == [("2024-01-01", "2024-01-09"), ("2024-01-21", "2024-01-31")]
+    assert len(bars) == 31
+    assert bars['time'].is_monotonic_increasing
+
+def test_gap_between_windows_is_filled(store):
+    """Cửa sổ không giao nhau thì tải cả khoảng trống ở giữa"""
+    vendor = FakeVendor()
+    store.get("VNM", "2024-01-01", "2024-01-05", vendor)
+    store.get("VNM", "2024-02-01", "2024-02-05", vendor)
+
+    assert vendor.calls[-1] == ("2024-01-06", "2024-02-05")
+    assert store.coverage("VNM") == (date(2024, 1, 1), date(2024, 2, 5))
+
+def test_today_is_always_refreshed(store):
+    """Phiên hôm nay chưa chốt nên luôn được tải lại"""
+    vendor = FakeVendor()
+    today = date.today()
+    start = (today - timedelta(days=5)).strftime('%Y-%m-%d')
+    end = today.strftime('%Y-%m-%d')
+    store.get("VNM", start, end, vendor)
+    fetched = store.sync("VNM", start, end, vendor)
+
+    assert vendor.calls[-1] == (end, end)
+    assert fetched == 1
+    assert store.coverage("VNM")[1] == today - timedelta(days=1)
+
+def _archive_mtimes(store):
+    return {path.name: path.stat().st_mtime_ns for path in store.store_dir.iterdir()}
+
+def test_live_bar_is_kept_out_of_the_archive(store):
+    """Phiên hôm nay chỉ giữ trong bộ nhớ; đọc lại trong TTL không gọi vendor, không ghi lại file"""
+    vendor = FakeVendor()
+    today = date.today()
+    start = (today - timedelta(days=5)).strftime('%Y-%m-%d')
+    end = today.strftime('%Y-%m-%d')
+    first = store.get("VNM", start, end, vendor)
+    written = _archive_mtimes(store)
+    second = store.get("VNM", start, end, vendor)
+    arrays = store.get_arrays("VNM", start, end, vendor, columns=['time', 'close'])
+
+    assert vendor.calls == [(start, end)]
+    assert len(first) == len(second) == len(arrays['time']) == 6
+    assert arrays['close'][-1] == float(today.day)
+    assert _archive_mtimes(store) == written
+    assert store.read("VNM")['time'].iloc[-1] == pd.Timestamp(today - timedelta(days=1))
+
+def test_expired_live_bar_is_refetched_without_rewrite(tmp_path):
+    """Hết TTL chỉ tải lại phiên hôm nay, file lưu trữ giữ nguyên"""
+    store = PriceHistoryStore(str(tmp_path / "prices"), live_ttl=0)
+    vendor = FakeVendor()
+    today = date.today()
+    start = (today - timedelta(days=5)).strftime('%Y-%m-%d')
+    end = today.strftime('%Y-%m-%d')
+    store.get("VNM", start, end, vendor)
+    written = _archive_mtimes(store)
+    bars = store.get("VNM", start, end, vendor)
+
+    assert vendor.calls == [(start, end), (end, end)]
+    assert len(bars) == 6
+    assert _archive_mtimes(store) == written
@@ -0,0 +1,31 @@
+"""
+Tests for per-source rate limiting
+"""
+import time
+
+from app.services.rate_limit import SourceRateLimiter, TokenBucket
+
+def test_token_bucket_caps_rate():
+    """Token bucket giới hạn số request mỗi giây"""
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.perf_counter()
+    for _ in range(11):
+        bucket.acquire()
+    elapsed = time.perf_counter() - start
+
+    # 1 token ban đầu + 10 token nạp lại ở 50/s
+    assert elapsed >= 0.18
+
+def test_token_bucket_timeout():
+    """Hết thời gian chờ thì trả về False"""
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0.01)
+
+def test_sources_have_independent_buckets():
+    """Mỗi nguồn dữ liệu có bucket riêng"""
+    limiter = SourceRateLimiter({"VCI": 1, "TCBS": 1})
+    assert limiter.acquire("VCI", timeout=0)
+    assert limiter.acquire("TCBS", timeout=0)
+    assert not limiter.acquire("VCI", timeout=0)
+    assert limiter.bucket("OTHER").rate == limiter.default_rate
@@ -0,0 +1,110 @@
+"""
+Tests for the covariance risk model
+"""
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.models import Portfolio, Position, Stock
+from app.services.risk import RiskModel, RiskModelStore, load_portfolio_weights
+
+SYMBOLS = np.array(["AAA", "BBB", "CCC", "DDD"])
+
+@pytest.fixture
+def market():
+    """300 phiên lợi nhuận ngày; AAA đi đúng theo chỉ số, các mã khác có nhiễu riêng"""
+    rng = np.random.default_rng(7)
+    dates = np.datetime64("2023-01-02") + np.arange(300).astype("timedelta64[D]")
+    benchmark = rng.normal(0.0005, 0.01, 300)
+    returns = np.column_stack([
+        benchmark,
+        1.5 * benchmark + rng.normal(0, 0.01, 300),
+        rng.normal(0, 0.02, 300),
+        rng.normal(0.001, 0.015, 300)
+    ])
+    return dates, returns, benchmark
+
+def test_roll_matches_full_build(market):
+    """Cập nhật tăng dần (thêm phiên mới, bỏ phiên cũ) cho kết quả như tính lại toàn bộ"""
+    dates, returns, benchmark = market
+    rolled = RiskModel.build(SYMBOLS, dates[:250], returns[:250], benchmark[:250], window=100)
+    for day in range(250, 300, 10):
+        rolled = rolled.roll(dates[:day + 10], returns[:day + 10], benchmark[:day + 10])
+    full = RiskModel.build(SYMBOLS, dates, returns, benchmark, window=100)
+
+    assert rolled.rolls == 5
+    assert rolled.dates.tolist() == full.dates.tolist()
+    np.testing.assert_allclose(rolled.covariance, full.covariance, rtol=1e-9, atol=1e-15)
+    np.testing.assert_allclose(rolled.betas, full.betas, rtol=1e-9)
+    assert rolled.shrinkage == pytest.approx(full.shrinkage)
+    assert rolled.roll(dates, returns, benchmark) is rolled
+
+def test_shrinkage_keeps_covariance_invertible():
+    """Nhiều mã hơn số phiên thì ma trận mẫu suy biến, ma trận co rút vẫn xác định dương"""
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 0.02, (20, 50))
+    dates = np.datetime64("2024-01-01") + np.arange(20).astype("timedelta64[D]")
+    model = RiskModel.build(np.array([f"S{i:02d}" for i in range(50)]), dates, returns, returns[:, 0])
+
+    assert 0 < model.shrinkage <= 1
+    assert np.linalg.eigvalsh(model.covariance).min() > 0
+
+def test_portfolio_risk(market):
+    """VaR/CVaR, beta và đóng góp rủi ro tính trên khối hiệp phương sai của các mã nắm giữ"""
+    dates, returns, benchmark = market
+    model = RiskModel.build(SYMBOLS, dates, returns, benchmark, window=245)
+
+    single = model.portfolio_risk({"aaa": 1.0, "ZZZ": 0.0})
+    sigma = np.sqrt(model.covariance[0, 0])
+    assert single["missing"] == ["ZZZ"]
+    assert single["volatility"] == pytest.approx(sigma)
+    assert single["beta"] == pytest.approx(1.0)
+    assert single["parametric"]["var"] == pytest.approx(1.6448536 * sigma - model.mean[0], rel=1e-6)
+    assert single["parametric"]["cvar"] > single["parametric"]["var"]
+    assert single["historical"]["cvar"] >= single["historical"]["var"]
+
+    risk = model.portfolio_risk({"AAA": 0.25, "BBB": 0.25, "CCC": 0.5}, confidence=0.99, horizon_days=10, value=1e9)
+    assert sum(position["risk_share"] for position in risk["positions"]) == pytest.approx(1.0)
+    assert sum(position["risk_contribution"] for position in risk["positions"]) == pytest.approx(risk["volatility"])
+    assert risk["parametric"]["var_amount"] == pytest.approx(risk["parametric"]["var"] * 1e9)
+    with pytest.raises(ValueError):
+        model.portfolio_risk({"AAA": 1.0}, confidence=1.0)
+
+def test_store_rolls_saved_model(market, tmp_path):
+    """Store lưu mô hình ra file, lần cập nhật sau chỉ thêm các phiên mới"""
+    dates, returns, benchmark = market
+    store = RiskModelStore(str(tmp_path / "risk"))
+    store.update(SYMBOLS, dates[:299], returns[:299], benchmark[:299], window=100)
+
+    reloaded = RiskModelStore(str(tmp_path / "risk"))
+    model = reloaded.update(SYMBOLS, dates, returns, benchmark, window=100)
+    assert model.rolls == 1
+    assert model.dates[-1] == dates[-1]
+    assert reloaded.stats()["days"] == 100
+
+    rebuilt = reloaded.update(SYMBOLS[:3], dates, returns[:, :3], benchmark, window=100)
+    assert rebuilt.rolls == 0 and len(rebuilt) == 3
+
+def test_portfolio_weights_are_scoped_to_owner():
+    """Chỉ chủ sở hữu đọc được tỷ trọng danh mục; người khác nhận None như danh mục không tồn tại"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Stock(id="s1", symbol="VNM", name="VNM"),
+        Stock(id="s2", symbol="FPT", name="FPT"),
+        Portfolio(id="p1", user_id="u1", name="Danh mục", initial_capital=1000.0),
+        Position(id="x1", portfolio_id="p1", stock_id="s1", quantity=10, average_price=50.0, current_price=60.0),
+        Position(id="x2", portfolio_id="p1", stock_id="s2", quantity=20, average_price=20.0)
+    ])
+    session.commit()
+
+    portfolio = load_portfolio_weights(session, "p1", "u1")
+
+    assert portfolio["value"] == pytest.approx(1000.0)
+    assert portfolio["weights"] == pytest.approx({"VNM": 0.6, "FPT": 0.4})
+    assert load_portfolio_weights(session, "p1", "u2") is None
+    assert load_portfolio_weights(session, "p2", "u1") is None
+    session.close()
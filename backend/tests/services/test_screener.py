@@ -0,0 +1,63 @@
+"""
+Tests for the vectorized stock screener
+"""
+import numpy as np
+import pytest
+
+from app.services.screener import ScreenerTable
+
+@pytest.fixture
+def table():
+    listing = {
+        'symbol': np.array(['AAA', 'BBB', 'CCC', 'DDD'], dtype=object),
+        'organ_name': np.array(['A Corp', 'B Corp', 'C Corp', 'D Corp'], dtype=object),
+        'exchange': np.array(['HSX', 'HNX', 'HSX', 'UPCOM'], dtype=object)
+    }
+    latest = {
+        'symbol': np.array(['AAA', 'BBB', 'CCC']),
+        'close': np.array([25.0, 12.0, 40.0]),
+        'ma50': np.array([20.0, 15.0, 35.0])
+    }
+    ratios = {
+        'AAA': {'pe': 8.0, 'roe': 18.0},
+        'BBB': {'pe': 10.0, 'roe': 20.0},
+        'CCC': {'pe': 15.0, 'roe': 25.0},
+        'DDD': {'pe': 5.0}
+    }
+    return ScreenerTable.build(listing, latest, ratios)
+
+def test_filter_and_sort(table):
+    """Biểu thức lọc được tính bằng mặt nạ boolean trên toàn bộ cột"""
+    rows = table.query("pe < 12 and roe > 15 and close > ma50 and exchange == 'HOSE'")
+    assert [row['symbol'] for row in rows] == ['AAA']
+    assert rows[0] == {'symbol': 'AAA', 'name': 'A Corp', 'exchange': 'HOSE', 'close': 25.0,
+                       'pe': 8.0, 'roe': 18.0, 'ma50': 20.0}
+
+    # Giá trị thiếu (NaN) không thỏa phép so sánh nào, và xếp cuối khi sắp xếp
+    assert [row['symbol'] for row in table.query("roe > 0 or roe <= 0")] == ['AAA', 'BBB', 'CCC']
+    assert [row['symbol'] for row in table.query(sort="-roe")] == ['CCC', 'BBB', 'AAA', 'DDD']
+    assert [row['symbol'] for row in table.query("exchange in ['HOSE', 'HNX'] and 1 <= close / pe < 3", limit=1)] == ['BBB']
+    assert table.query("pe < 6", fields=["symbol", "pe"]) == [{'symbol': 'DDD', 'pe': 5.0}]
+
+def test_rejects_unsafe_or_invalid_expressions(table):
+    """Chỉ cho phép tên cột, hằng số, phép so sánh và số học"""
+    for expression in ("__import__('os')", "close.real > 1", "price > 1", "pe <", "name > 5", "pe + 1"):
+        with pytest.raises(ValueError):
+            table.query(expression)
+
+def test_keyset_pages(table):
+    """Trang sau bắt đầu sau khóa (giá trị sắp xếp, mã) của dòng cuối trang trước"""
+    pages, after = [], None
+    while True:
+        rows, after = table.query_page(sort="-roe", limit=1, after=after)
+        pages += [row['symbol'] for row in rows]
+        if after is None:
+            break
+    assert pages == [row['symbol'] for row in table.query(sort="-roe", limit=0)]
+
+    rows, after = table.query_page("close > 0", limit=2)
+    assert [row['symbol'] for row in rows] == ['AAA', 'BBB'] and after == ['BBB']
+    assert table.query_page("close > 0", limit=2, after=after) == ([{'symbol': 'CCC', 'name': 'C Corp',
+                                                                      'exchange': 'HOSE', 'close': 40.0}], None)
+    with pytest.raises(ValueError):
+        table.query_page(sort="pe", after=['AAA'])
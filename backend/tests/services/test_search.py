@@ -0,0 +1,59 @@
+"""
+Tests for the symbol and company-name search index
+"""
+from app.services.search import SymbolSearchIndex, fold
+
+LISTING = [
+    {"symbol": "VNM", "organ_name": "Công ty Cổ phần Sữa Việt Nam"},
+    {"symbol": "VND", "organ_name": "Công ty Cổ phần Chứng khoán VNDIRECT"},
+    {"symbol": "VNINDEX", "organ_name": None},
+    {"symbol": "BID", "organ_name": "Ngân hàng TMCP Đầu tư và Phát triển Việt Nam"},
+    {"symbol": "VCB", "organ_name": "Ngân hàng TMCP Ngoại thương Việt Nam"},
+    {"symbol": "HPG", "organ_name": "Công ty Cổ phần Tập đoàn Hòa Phát"}
+]
+
+def symbols(results):
+    return [result["symbol"] for result in results]
+
+def test_fold_removes_diacritics():
+    """Bỏ dấu tiếng Việt, kể cả chữ đ"""
+    assert fold("Đầu tư  & Phát triển") == "dau tu phat trien"
+    assert fold(None) == ""
+
+def test_symbol_prefix_ranks_exact_and_short_first():
+    """Mã trùng khớp đứng đầu, sau đó đến mã ngắn hơn có cùng tiền tố"""
+    index = SymbolSearchIndex()
+    index.sync(LISTING, "v1")
+
+    assert symbols(index.search("vnm"))[0] == "VNM"
+    assert set(symbols(index.search("VN"))[:2]) == {"VNM", "VND"}
+    assert symbols(index.search("VN"))[2] == "VNINDEX"
+    assert len(index.search("VN", limit=1)) == 1
+
+def test_name_search_without_diacritics():
+    """Tìm theo tên công ty không dấu, cả từ đầy đủ và tiền tố của từ"""
+    index = SymbolSearchIndex()
+    index.sync(LISTING, "v1")
+
+    assert set(symbols(index.search("ngan hang"))[:2]) == {"BID", "VCB"}
+    assert symbols(index.search("ngân hàng đầu tư"))[0] == "BID"
+    assert symbols(index.search("hoa pha"))[0] == "HPG"
+    assert index.search("   ") == []
+
+def test_incremental_sync():
+    """Chỉ cập nhật mã được thêm, đổi tên hoặc bị hủy niêm yết"""
+    index = SymbolSearchIndex()
+    assert index.sync(LISTING, "v1") == (6, 0)
+    assert index.sync(LISTING, "v1") == (0, 0)
+
+    listing = [dict(record) for record in LISTING if record["symbol"] != "VND"]
+    listing[0]["organ_name"] = "Vinamilk"
+    listing.append({"symbol": "FPT", "organ_name": "Công ty Cổ phần FPT"})
+    assert index.sync(listing, "v2") == (2, 1)
+
+    assert index.version == "v2"
+    assert "VND" not in symbols(index.search("VN"))
+    assert symbols(index.search("vinamilk"))[0] == "VNM"
+    assert "VNM" not in symbols(index.search("sua viet nam"))[:1]
+    assert symbols(index.search("fpt"))[0] == "FPT"
+    assert index.stats()["symbols"] == 6
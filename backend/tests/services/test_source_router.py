@@ -0,0 +1,138 @@
+"""
+Tests for latency-aware source selection and failover
+"""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, SourceBreakers
+from app.services.rate_limit import SourceRateLimiter
+from app.services.source_router import SourceRouter
+from app.services.stock_data import StockDataService
+
+VCI_BARS = pd.DataFrame({
+    'time': ['2024-01-02', '2024-01-03'],
+    'open': [10, 11], 'high': [11, 12], 'low': [9, 10], 'close': [10.5, 11.5], 'volume': [100, 200]
+})
+TCBS_BARS = pd.DataFrame({
+    'tradingDate': ['2024-01-02', '2024-01-03'],
+    'open': ['10', '11'], 'high': ['11', '12'], 'low': ['9', '10'], 'close': ['10.5', '11.5'],
+    'volume': [100.0, 200.0]
+})
+
+class FakeRegistry:
+    """Returns a fake stock client per source"""
+
+    def __init__(self, failing=(), error=ConnectionError):
+        self.failing = set(failing)
+        self.error = error
+        self.calls = []
+
+    def get_listing(self):
+        return None
+
+    def get(self, symbol, source):
+        def history(**kwargs):
+            self.calls.append(source)
+            if source in self.failing:
+                raise self.error(f"{source} down")
+            return VCI_BARS if source == 'VCI' else TCBS_BARS
+        return SimpleNamespace(quote=SimpleNamespace(history=history))
+
+def make_service(registry):
+    breakers = SourceBreakers()
+    return StockDataService(
+        registry=registry,
+        limiter=SourceRateLimiter({}, default_rate=1000),
+        breakers=breakers,
+        router=SourceRouter(is_open=lambda source: breakers.state(source) == OPEN)
+    )
+
+def test_fastest_healthy_source_first():
+    """Nguồn nhanh hơn được ưu tiên, nguồn lỗi nhiều bị xếp sau"""
+    router = SourceRouter()
+    for _ in range(10):
+        router.record('VCI', 'quote.history', 0.8, True)
+        router.record('TCBS', 'quote.history', 0.2, True)
+    assert router.candidates('quote.history') == ['TCBS', 'VCI']
+
+    for _ in range(30):
+        router.record('TCBS', 'quote.history', 0.1, False)
+    assert router.candidates('quote.history') == ['VCI', 'TCBS']
+
+def test_demoted_source_recovers_once_errors_age_out():
+    """Lỗi cũ hết hạn thì nguồn bị hạ hạng được thử lại"""
+    now = [0.0]
+    router = SourceRouter(max_age=60, clock=lambda: now[0])
+    for _ in range(10):
+        router.record('VCI', 'quote.history', 0.2, True)
+        router.record('TCBS', 'quote.history', 0.8, True)
+    for _ in range(30):
+        router.record('VCI', 'quote.history', 0.1, False)
+    assert router.candidates('quote.history') == ['TCBS', 'VCI']
+
+    now[0] = 30.0
+    router.record('TCBS', 'quote.history', 0.8, True)
+    now[0] = 61.0
+    # Only TCBS has recent samples: VCI counts as untried and is probed first
+    assert router.candidates('quote.history') == ['VCI', 'TCBS']
+    assert router.snapshot()['VCI']['quote.history']['samples'] == 0
+    assert router.snapshot()['TCBS']['quote.history']['samples'] == 1
+
+def test_single_source_kinds_are_pinned():
+    """Loại dữ liệu chỉ có một nguồn thì không chuyển nguồn"""
+    assert SourceRouter().candidates('company.dividends') == ['TCBS']
+    with pytest.raises(ValueError):
+        SourceRouter().candidates('unknown.kind')
+
+def test_failover_keeps_output_schema():
+    """Nguồn chính lỗi thì chuyển sang nguồn khác với cùng schema"""
+    healthy = make_service(FakeRegistry())
+    failover = make_service(FakeRegistry(failing={'VCI'}))
+
+    primary = healthy._fetch_price_history("VNM", "2024-01-01", "2024-01-31")
+    fallback = failover._fetch_price_history("VNM", "2024-01-01", "2024-01-31")
+
+    assert failover.registry.calls == ['VCI', 'TCBS']
+    pd.testing.assert_frame_equal(primary, fallback)
+    assert failover.router.snapshot()['VCI']['quote.history']['error_rate'] == 1.0
+
+def test_all_sources_failing_raises():
+    """Tất cả nguồn đều lỗi thì trả về lỗi cuối cùng"""
+    service = make_service(FakeRegistry(failing={'VCI', 'TCBS'}))
+    with pytest.raises(ConnectionError):
+        service._fetch_price_history("VNM", "2024-01-01", "2024-01-31")
+
+def test_request_errors_do_not_fail_over():
+    """Lỗi do yêu cầu (mã không tồn tại...) trả về ngay, không thử nguồn khác"""
+    service = make_service(FakeRegistry(failing={'VCI', 'TCBS'}, error=ValueError))
+    with pytest.raises(ValueError, match="VCI"):
+        service._fetch_price_history("XXX", "2024-01-01", "2024-01-31")
+    assert service.registry.calls == ['VCI']
+    assert service.router.snapshot()['VCI']['quote.history']['samples'] == 0
+
+def test_open_circuit_fails_over():
+    """Nguồn đang ngắt mạch thì chuyển sang nguồn kế tiếp mà không gọi nguồn đó"""
+    service = make_service(FakeRegistry())
+    for _ in range(service.breakers.failure_threshold):
+        service.breakers.get('VCI').record_failure()
+    service.router.is_open = lambda source: False
+
+    service._fetch_price_history("VNM", "2024-01-01", "2024-01-31")
+    assert service.registry.calls == ['TCBS']
+
+def test_half_open_source_gets_its_trial_call():
+    """Nguồn nửa mở không bị xếp như nguồn ngắt mạch, nên được gọi thử dù nguồn kia vẫn tốt"""
+    breakers = SourceBreakers(failure_threshold=1, reset_timeout=60)
+    service = make_service(FakeRegistry())
+    service.breakers = breakers
+    service.router.is_open = lambda source: breakers.state(source) == OPEN
+    breakers.get('VCI').record_failure()
+    assert service.router.candidates('quote.history') == ['TCBS', 'VCI']
+
+    breakers.get('VCI').reset_timeout = 0
+    assert breakers.state('VCI') == HALF_OPEN
+    service._fetch_price_history("VNM", "2024-01-01", "2024-01-31")
+    assert service.registry.calls == ['VCI']
+    assert breakers.state('VCI') == CLOSED
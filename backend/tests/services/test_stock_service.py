@@ -5,12 +5,17 @@ import pytest
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
-from app.services.stock_data import StockDataService
+from app.services.stock_data import StockDataService, client_registry
+from app.services.universe import SymbolUniverse
+from app.services.financial_bundle import FinancialStatementStore
 
 @pytest.fixture
 def stock_service():
-    """Stock service fixture"""
-    return StockDataService()
+    """Stock service fixture (danh sách mã và báo cáo tài chính riêng cho mỗi test)"""
+    return StockDataService(
+        universe=SymbolUniverse(lambda: client_registry.get_listing().all_symbols()),
+        financials=FinancialStatementStore()
+    )
 
 def test_get_stock_list(stock_service, mock_stock_data):
     """Test lấy danh sách cổ phiếu"""
@@ -98,4 +103,61 @@ def test_cache_stock_list(stock_service, mock_stock_data):
         result2 = stock_service.get_stock_list()
         
         assert mock_get.call_count == 1  # Should only call API once
-        assert result1 == result2 
\ No newline at end of file
+        assert result1 == result2
+
+def test_get_stock_prices_isolates_failures(stock_service, mock_stock_price_data):
+    """Test lấy giá nhiều mã: một mã lỗi không làm hỏng cả batch"""
+    def fake_price(symbol, start_date, end_date):
+        if symbol == "BAD":
+            raise Exception("Stock not found")
+        return {"symbol": symbol, "data": mock_stock_price_data}
+
+    with patch.object(StockDataService, 'get_stock_price', side_effect=fake_price):
+        result = stock_service.get_stock_prices(
+            ["VNM", "BAD", "FPT", "VNM"], "2024-01-01", "2024-01-31", max_concurrency=2
+        )
+
+    assert list(result["data"].keys()) == ["VNM", "FPT"]
+    assert len(result["data"]["VNM"]) == len(mock_stock_price_data)
+    assert "BAD" in result["errors"]
+
+def test_fundamental_analysis_deadline(stock_service):
+    """Test phân tích cơ bản: mục chậm bị đánh dấu timeout, các mục khác vẫn trả về"""
+    import time
+    import pandas as pd
+
+    def fake_routed_call(kind, symbol, call):
+        if kind == 'finance.valuation':
+            time.sleep(1.0)
+        if kind == 'company.info':
+            raise Exception("Not supported")
+        if kind == 'finance.statements':
+            return None
+        return pd.DataFrame([{"kind": kind}])
+
+    with patch.object(StockDataService, '_routed_call', side_effect=fake_routed_call):
+        started = time.monotonic()
+        result = stock_service.get_fundamental_analysis("VNM", deadline=0.2)
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.8
+    assert result["sections"] == {
+        "financial_ratios": "ok",
+        "statements": "ok",
+        "valuation": "timeout",
+        "company_info": "error"
+    }
+    assert result["data"]["financial_ratios"] == [{"kind": "finance.ratios"}]
+    assert result["data"]["valuation"] == []
+    assert result["data"]["company_info"] == {}
+
+    # Mục quá hạn vẫn giữ slot của lane đến khi thực sự chạy xong, rồi trả lại
+    def busy():
+        return stock_service.fanout.stats()["lanes"]["fundamental"]["busy"]
+
+    assert busy() == 1
+    for _ in range(50):
+        if busy() == 0:
+            break
+        time.sleep(0.05)
+    assert busy() == 0
@@ -0,0 +1,131 @@
+"""
+Tests for the in-memory symbol universe
+"""
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.services.stock_data import StockDataService
+from app.services.universe import SymbolUniverse, UniverseSnapshot
+
+LISTING = [
+    {'symbol': 'VNM', 'organ_name': 'Vinamilk'},
+    {'symbol': 'FPT', 'organ_name': 'FPT Corp'},
+    {'symbol': 'ACB', 'organ_name': None}
+]
+
+class CountingLoader:
+    """Loader đếm số lần gọi, có thể đổi dữ liệu hoặc ném lỗi"""
+
+    def __init__(self, listing):
+        self.listing = listing
+        self.calls = 0
+        self.error = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.listing
+
+def test_snapshot_sorted_and_versioned():
+    """Snapshot được sắp xếp theo mã, phiên bản chỉ đổi khi dữ liệu đổi"""
+    snapshot = UniverseSnapshot.from_listing(LISTING)
+    assert [row['symbol'] for row in snapshot.rows()] == ['ACB', 'FPT', 'VNM']
+    assert snapshot.screen(2) == [{'symbol': 'ACB', 'name': None}, {'symbol': 'FPT', 'name': 'FPT Corp'}]
+    assert snapshot.get('vnm')['organ_name'] == 'Vinamilk'
+    assert snapshot.get('XXX') is None
+
+    assert UniverseSnapshot.from_listing(list(reversed(LISTING))).version == snapshot.version
+    changed = LISTING + [{'symbol': 'HPG', 'organ_name': 'Hoa Phat'}]
+    assert UniverseSnapshot.from_listing(changed).version != snapshot.version
+
+def test_snapshot_keeps_only_columns():
+    """Snapshot chỉ giữ các cột; dòng được tạo cho trang và các cột được yêu cầu"""
+    snapshot = UniverseSnapshot.from_listing(LISTING)
+    assert not any(isinstance(value, list) for value in vars(snapshot).values())
+
+    assert snapshot.page('acb', 1, fields=['organ_name']) == ([{'organ_name': 'FPT Corp'}], 'FPT')
+    assert snapshot.page(None, 0, fields=['name'], screen=True) == (
+        [{'name': None}, {'name': 'FPT Corp'}, {'name': 'Vinamilk'}], None
+    )
+    assert snapshot.get('FPT') == {'symbol': 'FPT', 'organ_name': 'FPT Corp'}
+    assert list(snapshot.iter_rows(['symbol', 'exchange']))[0] == {'symbol': 'ACB', 'exchange': None}
+
+def test_listing_loaded_once():
+    """Danh sách và bộ lọc dùng chung snapshot, chỉ tải một lần"""
+    loader = CountingLoader(LISTING)
+    service = StockDataService(universe=SymbolUniverse(loader))
+
+    assert len(service.get_stock_list()) == 3
+    assert len(service.screen_stocks(limit=0)) == 3
+    assert loader.calls == 1
+
+def test_cursor_pages_and_fields():
+    """Phân trang bằng con trỏ theo mã và chỉ trả về các cột được yêu cầu"""
+    service = StockDataService(universe=SymbolUniverse(CountingLoader(LISTING)))
+
+    first, cursor = service.get_stock_list_page(limit=2, fields=['symbol'])
+    assert first == [{'symbol': 'ACB'}, {'symbol': 'FPT'}]
+    second, last = service.get_stock_list_page(cursor=cursor, limit=2, fields=['symbol'])
+    assert second == [{'symbol': 'VNM'}]
+    assert last is None
+
+    rows, cursor = service.screen_stocks_page(limit=1)
+    assert rows == [{'symbol': 'ACB', 'name': None}]
+    assert service.screen_stocks_page(limit=1, cursor=cursor)[0] == [{'symbol': 'FPT', 'name': 'FPT Corp'}]
+
+    with pytest.raises(ValueError):
+        service.get_stock_list_page(fields=['price'])
+    with pytest.raises(ValueError):
+        service.get_stock_list_page(cursor='not-a-cursor')
+
+def test_forged_cursor_is_rejected():
+    """Con trỏ giả mạo (sai kiểu giá trị) bị từ chối bằng ValueError thay vì lỗi 500"""
+    service = StockDataService(universe=SymbolUniverse(CountingLoader(LISTING)))
+
+    for forged in ([[5]], [5], [None]):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            service.get_stock_list_page(cursor=encode_cursor(forged))
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            service.screen_stocks_page(cursor=encode_cursor(forged))
+    for forged in ([[1], 'AAA'], [None, 'AAA'], ['1', 'AAA'], [True, 'AAA'], [float('nan'), 'AAA'], [1.0, 5]):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            service.screen_stocks_page(sort='roe', cursor=encode_cursor(forged))
+
+    # Khóa +inf (giá trị thiếu xếp cuối) vẫn là con trỏ hợp lệ
+    assert decode_cursor(encode_cursor([float('inf'), 'DDD']), 2, (float, str)) == [float('inf'), 'DDD']
+
+def test_failed_refresh_keeps_snapshot():
+    """Làm mới lỗi thì vẫn phục vụ snapshot cũ"""
+    loader = CountingLoader(LISTING)
+    universe = SymbolUniverse(loader)
+    version = universe.snapshot().version
+
+    loader.error = ConnectionError("listing down")
+    with pytest.raises(ConnectionError):
+        universe.refresh()
+    assert universe.snapshot().version == version
+    assert universe.stats()['failures'] == 1
+
+def test_empty_or_malformed_refresh_keeps_snapshot():
+    """Làm mới trả về danh sách rỗng hoặc thiếu cột symbol thì giữ snapshot cũ và chỉ mục tìm kiếm"""
+    loader = CountingLoader(LISTING)
+    universe = SymbolUniverse(loader)
+    synced = []
+    universe.subscribe(synced.append)
+    version = universe.snapshot().version
+
+    for listing in (None, [], [{'ticker': 'VNM', 'organ_name': 'Vinamilk'}]):
+        loader.listing = listing
+        with pytest.raises(ValueError):
+            universe.refresh()
+
+    assert universe.snapshot().version == version
+    assert len(synced) == 1
+    assert universe.stats()['failures'] == 3
+
+def test_empty_listing():
+    """Không có dữ liệu thì trả về danh sách rỗng"""
+    universe = SymbolUniverse(CountingLoader(None))
+    assert universe.snapshot().rows() == []
+    assert universe.snapshot().screen(10) == []